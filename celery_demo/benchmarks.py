@@ -0,0 +1,379 @@
+"""
+Benchmark harness for the celery_demo task pipelines.
+
+Runs chains, groups and chords of ``slow_add``/``multiply``/``subtract`` through
+an in-process worker on the ``memory://`` broker and an in-memory result backend,
+with the simulated latency and failures switched off, and reports throughput,
+per-step latency percentiles and per-message overhead.
+
+``serializers`` measures the publishing side's payload codecs. The HR load
+tests, including the latency publishing adds to ``POST /api/employees/``,
+live in ``hr.bench``; the helpers both use are in ``pristine.bench``.
+"""
+
+import os
+import random
+import threading
+import time
+import timeit
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+
+from celery import chain, chord, group, states
+from celery.contrib.testing.worker import start_worker
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.test.utils import override_settings
+from kombu import serialization
+
+from pristine.bench import percentile, quiet_loggers
+from pristine.celery import app
+from pristine.results import tail_only
+
+from .tasks import multiply, slow_add, subtract, total
+
+# Metrics compared against a stored baseline, and whether higher is better
+TRACKED_METRICS = {
+    "tasks_per_sec": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "overhead_per_message_ms": False,
+}
+
+M2M_TASK = "hr.tasks.process_m2m_signal"
+NOISY_LOGGERS = ("celery", "celery_demo", "hr.tasks")
+
+# Seconds between polls of the in-memory broker and result backend
+POLL_INTERVAL = 0.005
+
+
+class TaskTimings:
+    """
+    Collects publish/start/finish timestamps per task id from Celery signals.
+        A task replaced by a deferred copy keeps its id, so its first publish and
+        first start are kept along with the finish of its final run.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.published = {}
+        self.started = {}
+        self.finished = {}
+        self.names = {}
+
+    def on_publish(self, sender=None, headers=None, **kwargs):
+        """Record when a message left the producer."""
+        with self.lock:
+            self.published.setdefault(headers["id"], time.perf_counter())
+            self.names[headers["id"]] = sender
+
+    def on_prerun(self, task_id=None, **kwargs):
+        """Record when a worker started executing a task."""
+        with self.lock:
+            self.started.setdefault(task_id, time.perf_counter())
+
+    def on_postrun(self, task_id=None, state=None, **kwargs):
+        """Record when a worker finished a task for good (not retried/replaced)."""
+        if state in states.READY_STATES:
+            with self.lock:
+                self.finished[task_id] = time.perf_counter()
+
+    def settle(self, timeout=5):
+        """
+        Wait for postrun of tasks whose results are already stored.
+            The worker saves the result before it sends ``task_postrun``, so a
+            caller's ``get()`` can return just ahead of the last timestamps.
+        """
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            with self.lock:
+                if self.published.keys() <= self.finished.keys():
+                    return
+            time.sleep(POLL_INTERVAL)
+
+    @contextmanager
+    def connected(self):
+        """Listen to the task signals for the duration of the block."""
+        before_task_publish.connect(self.on_publish, weak=False)
+        task_prerun.connect(self.on_prerun, weak=False)
+        task_postrun.connect(self.on_postrun, weak=False)
+        try:
+            yield self
+        finally:
+            before_task_publish.disconnect(self.on_publish)
+            task_prerun.disconnect(self.on_prerun)
+            task_postrun.disconnect(self.on_postrun)
+
+    def peak_in_flight(self):
+        """Most tasks that were started but not yet finished at the same time."""
+        events = sorted(
+            [(at, 1) for at in self.started.values()]
+            + [(at, -1) for tid, at in self.finished.items() if tid in self.started]
+        )
+        peak = current = 0
+        for _, step in events:
+            current += step
+            peak = max(peak, current)
+        return peak
+
+    def summary(self, wall_seconds):
+        """Summarise the collected timings for one scenario."""
+        completed = [tid for tid in self.finished if tid in self.published]
+        latencies = defaultdict(list)
+        overheads = []
+        for task_id in completed:
+            name = self.names[task_id].rsplit(".", 1)[-1]
+            latency = self.finished[task_id] - self.published[task_id]
+            runtime = self.finished[task_id] - self.started.get(
+                task_id, self.published[task_id]
+            )
+            latencies[name].append(latency * 1000)
+            overheads.append((latency - runtime) * 1000)
+        every = [value for values in latencies.values() for value in values]
+        return {
+            "tasks": len(completed),
+            "wall_seconds": round(wall_seconds, 4),
+            "tasks_per_sec": round(len(completed) / wall_seconds, 2),
+            "p50_ms": round(percentile(every, 50), 3),
+            "p99_ms": round(percentile(every, 99), 3),
+            "overhead_per_message_ms": round(
+                sum(overheads) / max(1, len(overheads)), 3
+            ),
+            "peak_in_flight": self.peak_in_flight(),
+            "steps": {
+                name: {
+                    "count": len(values),
+                    "p50_ms": round(percentile(values, 50), 3),
+                    "p99_ms": round(percentile(values, 99), 3),
+                }
+                for name, values in sorted(latencies.items())
+            },
+        }
+
+
+def _chains(count):
+    return [
+        tail_only(chain(slow_add.s(i, 1), multiply.s(), subtract.s()))()
+        for i in range(count)
+    ]
+
+
+def _groups(count):
+    return [group(slow_add.s(i, i) for i in range(count))()]
+
+
+def _chords(count):
+    return [chord(slow_add.s(i, i) for i in range(count))(total.s())]
+
+
+SCENARIOS = {"chain": _chains, "group": _groups, "chord": _chords}
+
+
+@contextmanager
+def in_memory_worker(concurrency=4, queues=None):
+    """
+    Point the app at in-memory transports and run a threaded worker.
+        Settings are restored on exit, but connections and the result backend
+        the app already opened stay cached on it for the rest of the process.
+    """
+    environ = {
+        # Celery reads these environment variables ahead of the Django settings
+        "CELERY_BROKER_URL": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
+    }
+    conf = {
+        "task_always_eager": False,
+        # The virtual transport otherwise polls its queues once a second
+        "broker_transport_options": {"polling_interval": POLL_INTERVAL},
+        # With a full prefetch window the threads pool's consumer loop idles in
+        # a 2s drain timeout on virtual transports, which would dominate latencies
+        "worker_prefetch_multiplier": 0,
+    }
+    previous_environ = {key: os.environ.get(key) for key in environ}
+    previous_conf = {key: app.conf[key] for key in conf}
+    os.environ.update(environ)
+    app.conf.update(conf)
+    try:
+        with (
+            override_settings(
+                CELERY_DEMO_SIMULATED_DELAY=0,
+                CELERY_DEMO_FAILURE_RATE=0,
+                TASK_METRICS_DIR=None,
+                TASK_METRICS_PORT=None,
+            ),
+            start_worker(
+                app,
+                pool="threads",
+                concurrency=concurrency,
+                perform_ping_check=False,
+                queues=queues,
+            ),
+        ):
+            # Starting a worker re-applies the logging config, so quieten after
+            with quiet_loggers(*NOISY_LOGGERS):
+                yield
+    finally:
+        app.conf.update(previous_conf)
+        for key, value in previous_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run(scenarios=None, count=200, concurrency=4, timeout=120):
+    """Run each scenario ``count`` wide and return a report dict per scenario."""
+    report = {}
+    with in_memory_worker(concurrency):
+        for name in scenarios or SCENARIOS:
+            with TaskTimings().connected() as timings:
+                started = time.perf_counter()
+                for result in SCENARIOS[name](count):
+                    result.get(timeout=timeout, interval=POLL_INTERVAL)
+                wall = time.perf_counter() - started
+                timings.settle()
+            report[name] = timings.summary(wall)
+    return report
+
+
+def in_flight(count=50, concurrency=4, delay=0.2, timeout=120):
+    """
+    Run ``count`` slow_add tasks with ``delay`` seconds of simulated latency,
+    once sleeping in the worker slot and once deferred by countdown, and
+    report both runs so the number of tasks kept in flight can be compared.
+    """
+    report = {}
+    with in_memory_worker(concurrency):
+        for mode, defer in (("blocking", False), ("deferred", True)):
+            with (
+                override_settings(
+                    CELERY_DEMO_SIMULATED_DELAY=delay, CELERY_DEMO_DEFER_LATENCY=defer
+                ),
+                TaskTimings().connected() as timings,
+            ):
+                started = time.perf_counter()
+                for result in [slow_add.delay(i, i) for i in range(count)]:
+                    result.get(timeout=timeout, interval=POLL_INTERVAL)
+                wall = time.perf_counter() - started
+                timings.settle()
+            report[mode] = timings.summary(wall)
+    return report
+
+
+def _flood(bulk, interactive, timeout, **options):
+    with TaskTimings().connected() as timings:
+        started = time.perf_counter()
+        results = [
+            app.send_task(M2M_TASK, args=(i, "post_add", [1]), **options)
+            for i in range(bulk)
+        ]
+        # multiply ignores its result outside chains; the flood waits on it
+        results += [
+            multiply.apply_async((i,), ignore_result=False, **options)
+            for i in range(interactive)
+        ]
+        for result in results:
+            result.get(timeout=timeout, interval=POLL_INTERVAL)
+        wall = time.perf_counter() - started
+        timings.settle()
+    return timings.summary(wall)
+
+
+@contextmanager
+def bulk_cost(seconds):
+    """Make every m2m signal task spend ``seconds`` working, like real writes would."""
+
+    def work(sender=None, **kwargs):
+        if sender.name == M2M_TASK:
+            time.sleep(seconds)
+
+    task_prerun.connect(work, weak=False)
+    try:
+        yield
+    finally:
+        task_prerun.disconnect(work)
+
+
+def contention(bulk=1000, interactive=50, concurrency=4, cost=0.005, timeout=120):
+    """
+    Publish a burst of ``bulk`` m2m signal tasks (``cost`` seconds of work
+    each) followed by ``interactive`` multiply tasks, once through a single
+    shared queue and once through the routed per-workload queues (with
+    ``concurrency`` split between a bulk and an interactive worker), and
+    report per-step latencies for both runs.
+    """
+    report = {}
+    share = max(1, concurrency // 2)
+    with bulk_cost(cost):
+        with in_memory_worker(concurrency, queues=["shared"]):
+            report["shared"] = _flood(bulk, interactive, timeout, queue="shared")
+        with (
+            in_memory_worker(share, queues=["bulk"]),
+            in_memory_worker(max(1, concurrency - share), queues=["interactive"]),
+        ):
+            report["routed"] = _flood(bulk, interactive, timeout)
+    return report
+
+
+def _message(*args):
+    """A task message body as Celery's protocol 2 publishes it."""
+    embed = {"callbacks": None, "errbacks": None, "chain": None, "chord": None}
+    return [list(args), {}, embed]
+
+
+def _result(value):
+    """A result-backend record as Celery stores it."""
+    return {
+        "status": "SUCCESS",
+        "result": value,
+        "traceback": None,
+        "children": [],
+        "date_done": "2025-05-19T16:20:53.313000+00:00",
+        "task_id": "4e70b858-16c1-487b-9777-fbd756514e6b",
+    }
+
+
+def _department_ids(count, seed=0):
+    """Ascending, gappy primary keys like a large department's id set."""
+    return sorted(random.Random(seed).sample(range(1, count * 20), count))
+
+
+PAYLOADS = {
+    "m2m_typical": lambda: _message(42, "post_add", [3, 7, 12, 15]),
+    "m2m_large": lambda: _message(42, "post_add", _department_ids(10_000)),
+    "m2m_large_unsorted": lambda: _message(
+        42, "post_add", random.Random(1).sample(_department_ids(10_000), 10_000)
+    ),
+    "m2m_batch": lambda: _message(
+        [[pk, "post_add", _department_ids(20, pk)] for pk in range(500)]
+    ),
+    "chain_result": lambda: _result(15),
+    "batch_add_result": lambda: _result(list(range(0, 10_000, 2))),
+}
+
+
+def serializers(names=("json", "compact"), number=None, repeat=5):
+    """
+    Encode and decode every payload in ``PAYLOADS`` with each serializer in
+    ``names`` through kombu's registry, and report bytes and best-of-``repeat``
+    per-call timings in microseconds.
+    """
+    report = {}
+    for payload_name, build in PAYLOADS.items():
+        payload = build()
+        report[payload_name] = {}
+        for name in names:
+            content_type, encoding, data = serialization.dumps(payload, serializer=name)
+            encode = timeit.Timer(
+                partial(serialization.dumps, payload, serializer=name)
+            )
+            decode = timeit.Timer(
+                partial(serialization.loads, data, content_type, encoding)
+            )
+            calls = number or encode.autorange()[0]
+            report[payload_name][name] = {
+                "bytes": len(data),
+                "encode_us": round(min(encode.repeat(repeat, calls)) / calls * 1e6, 2),
+                "decode_us": round(min(decode.repeat(repeat, calls)) / calls * 1e6, 2),
+            }
+    return report
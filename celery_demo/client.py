@@ -0,0 +1,59 @@
+"""
+Client-side helpers for fanning large workloads out to the batch tasks.
+"""
+
+import math
+from collections.abc import Sequence
+
+from celery import group
+from celery.result import GroupResult
+
+from .tasks import batch_add
+
+MIN_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 5000
+TARGET_CHUNKS = 32
+
+
+def choose_chunk_size(
+    total: int,
+    target_chunks: int = TARGET_CHUNKS,
+    min_size: int = MIN_CHUNK_SIZE,
+    max_size: int = MAX_CHUNK_SIZE,
+) -> int:
+    """
+    Pick a chunk size that spreads ``total`` items over about ``target_chunks``
+    tasks, bounded so tiny chunks do not waste messages and huge ones do not
+    produce oversized payloads or starve other workers.
+    """
+    if total <= 0:
+        return min_size
+    return max(min_size, min(max_size, math.ceil(total / target_chunks)))
+
+
+def split(items: Sequence, chunk_size: int) -> list[list]:
+    """Split ``items`` into consecutive lists of at most ``chunk_size``."""
+    starts = range(0, len(items), chunk_size)
+    return [list(items[start : start + chunk_size]) for start in starts]
+
+
+def add_many_async(
+    pairs: Sequence[Sequence[float]], chunk_size: int | None = None
+) -> GroupResult:
+    """Publish ``pairs`` as a group of ``batch_add`` tasks, one per chunk."""
+    chunk_size = chunk_size or choose_chunk_size(len(pairs))
+    return group(batch_add.s(chunk) for chunk in split(pairs, chunk_size))()
+
+
+def gather(result: GroupResult, timeout: float | None = None) -> list:
+    """Wait for a batch group and return the flattened results in input order."""
+    return [value for chunk in result.get(timeout=timeout) for value in chunk]
+
+
+def add_many(
+    pairs: Sequence[Sequence[float]],
+    chunk_size: int | None = None,
+    timeout: float | None = None,
+) -> list:
+    """Add every (x, y) pair through batched tasks and return ordered sums."""
+    return gather(add_many_async(pairs, chunk_size), timeout=timeout)
@@ -0,0 +1,112 @@
+"""
+Management command running the celery_demo pipeline benchmarks.
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from celery_demo import benchmarks
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Benchmark chains, groups and chords on the in-memory broker."""
+
+    help = (
+        "Run slow_add/multiply/subtract chains, groups and chords against the "
+        "memory:// broker and report throughput, latency and per-message overhead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(benchmarks.SCENARIOS),
+            help="Scenario to run (repeatable, default: all).",
+        )
+        parser.add_argument("--count", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--in-flight",
+            action="store_true",
+            help=(
+                "Compare slow_add sleeping in the worker slot with deferred "
+                "latency instead of running the pipeline scenarios."
+            ),
+        )
+        parser.add_argument(
+            "--contention",
+            action="store_true",
+            help=(
+                "Measure interactive task latency during a burst of m2m signal "
+                "tasks, on one shared queue and on the routed workload queues."
+            ),
+        )
+        parser.add_argument(
+            "--bulk",
+            type=int,
+            default=1000,
+            help="Number of m2m signal tasks in the --contention burst.",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.2,
+            help="Simulated latency per task for --in-flight, in seconds.",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=Path(settings.BASE_DIR) / "benchmarks" / "celery_pipeline.json",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store this run as the new baseline.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative regression against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        if options["in_flight"]:
+            report = benchmarks.in_flight(
+                options["count"], options["concurrency"], options["delay"]
+            )
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+        if options["contention"]:
+            # The m2m signal tasks update the membership index
+            with bench.scratch_database():
+                report = benchmarks.contention(
+                    options["bulk"], options["count"], options["concurrency"]
+                )
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+        report = benchmarks.run(
+            options["scenario"], options["count"], options["concurrency"]
+        )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+        if options["save_baseline"]:
+            bench.save_baseline(options["baseline"], report)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+        baseline = bench.load_baseline(options["baseline"])
+        if baseline is None:
+            self.stdout.write(
+                "No baseline found; run with --save-baseline to store one."
+            )
+            return
+        found = bench.regressions(
+            report, baseline, benchmarks.TRACKED_METRICS, options["tolerance"]
+        )
+        if found:
+            raise CommandError("Regressions against baseline:\n" + "\n".join(found))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,33 @@
+"""
+Management command comparing task payload serializers.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from celery_demo import benchmarks
+
+
+class Command(BaseCommand):
+    """Micro-benchmark the json and compact serializers on typical payloads."""
+
+    help = (
+        "Encode and decode typical and large m2m payloads and results with each "
+        "serializer and report bytes on the wire and per-call timings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--serializer",
+            action="append",
+            help="Serializer to compare (repeatable, default: json and compact).",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        report = benchmarks.serializers(
+            tuple(options["serializer"] or ("json", "compact")),
+            repeat=options["repeat"],
+        )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
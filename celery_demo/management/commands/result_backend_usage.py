@@ -0,0 +1,35 @@
+"""
+Management command reporting what the Celery result backend holds.
+"""
+
+import json
+
+from celery.backends.redis import RedisBackend
+from django.core.management.base import BaseCommand, CommandError
+
+from pristine.celery import app
+from pristine.results import usage
+
+
+class Command(BaseCommand):
+    """Print result-backend key counts and memory per task name."""
+
+    help = (
+        "Scan the Redis result backend and report, per task name, how many "
+        "results it holds, their memory use and how many never expire."
+    )
+
+    def handle(self, *args, **options):
+        if not isinstance(app.backend, RedisBackend):
+            raise CommandError(
+                "Only Redis result backends can be inspected, not "
+                f"{type(app.backend).__name__}"
+            )
+        report = usage(app.backend)
+        totals = {
+            column: sum(row[column] for row in report.values())
+            for column in ("keys", "bytes", "no_ttl")
+        }
+        self.stdout.write(
+            json.dumps({"tasks": report, "total": totals}, indent=2, sort_keys=True)
+        )
@@ -3,33 +3,133 @@ Celery tasks module: defines asynchronous operations for addition, multiplicatio
 """
 
 import logging
+import operator
 import random
 import time
 
 from celery import shared_task
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
 
 logger = logging.getLogger("celery_demo")
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=5, acks_late=True)
-def slow_add(self, operand1, operand2):
+def simulated_delay():
+    """Seconds of artificial latency per task (CELERY_DEMO_SIMULATED_DELAY)."""
+    return getattr(settings, "CELERY_DEMO_SIMULATED_DELAY", 2)
+
+
+def simulated_failure():
+    """Return True if this run should fail (CELERY_DEMO_FAILURE_RATE, default 0.5)."""
+    return random.random() < getattr(settings, "CELERY_DEMO_FAILURE_RATE", 0.5)
+
+
+def defer_latency():
+    """Wait out the simulated latency off the worker slot (CELERY_DEMO_DEFER_LATENCY)."""
+    return getattr(settings, "CELERY_DEMO_DEFER_LATENCY", True)
+
+
+def retry_backoff(retries):
+    """
+    Seconds to wait before the next retry: exponential in ``retries``, capped
+    at CELERY_DEMO_RETRY_BACKOFF_MAX and fully jittered, so tasks failing
+    together do not all come back at the same moment.
+    """
+    return get_exponential_backoff_interval(
+        factor=getattr(settings, "CELERY_DEMO_RETRY_BACKOFF", 1),
+        retries=retries,
+        maximum=getattr(settings, "CELERY_DEMO_RETRY_BACKOFF_MAX", 60),
+        full_jitter=True,
+    )
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def slow_add(self, operand1, operand2, deferred=False):
     """
     Adds two numbers with retry simulation and logs lifecycle.
+        The simulated latency is served as a countdown: the task replaces itself
+        with a copy (same task id, chain and chord links, result retention)
+        published with a countdown, instead of sleeping in a worker slot.
+        The broker delivers it right away; a worker reserves it and holds it
+        in memory until it is due, with its pool slots free meanwhile.
+        Retries re-run the original call, latency included.
     """
     task_id = self.request.id
-    logger.info(
-        "[%s] Task slow_add received with x=%s, y=%s", task_id, operand1, operand2
-    )
+    if not deferred:
+        logger.info(
+            "[%s] Task slow_add received with x=%s, y=%s", task_id, operand1, operand2
+        )
+        if simulated_delay() and defer_latency():
+            return self.replace(
+                self.si(operand1, operand2, deferred=True).set(
+                    countdown=simulated_delay(),
+                    ignore_result=self.request.ignore_result,
+                    # A retry replaces itself too; keep counting towards max_retries
+                    retries=self.request.retries,
+                )
+            )
+        time.sleep(simulated_delay())
     try:
-        time.sleep(2)
-        if random.choice([True, False]):
+        if simulated_failure():
             raise ValueError("Simulated random failure")
         result = operand1 + operand2
         logger.info("[%s] Task succeeded with result: %s", task_id, result)
         return result
     except Exception as exc:
-        logger.warning("[%s] Task failed: %s. Retrying...", task_id, exc)
-        raise self.retry(exc=exc) from exc
+        countdown = retry_backoff(self.request.retries)
+        logger.warning(
+            "[%s] Task failed: %s. Retrying in %ss...", task_id, exc, countdown
+        )
+        # Not the deferred copy's kwargs: each attempt serves its latency again
+        raise self.retry(
+            args=(operand1, operand2), kwargs={}, exc=exc, countdown=countdown
+        ) from exc
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True, serializer="compact")
+def batch_add(self, pairs, deferred=False):
+    """
+    Adds many (x, y) operand pairs in one invocation and stores one result.
+        The simulated latency and failure are paid once per batch, not per pair;
+        the latency is deferred the same way as in ``slow_add``.
+    """
+    task_id = self.request.id
+    if not deferred:
+        logger.info("[%s] Task batch_add received %s pair(s)", task_id, len(pairs))
+        if simulated_delay() and defer_latency():
+            return self.replace(
+                self.si(pairs, deferred=True).set(
+                    countdown=simulated_delay(),
+                    ignore_result=self.request.ignore_result,
+                    # A retry replaces itself too; keep counting towards max_retries
+                    retries=self.request.retries,
+                )
+            )
+        time.sleep(simulated_delay())
+    try:
+        if simulated_failure():
+            raise ValueError("Simulated random failure")
+        result = list(map(operator.add, *zip(*pairs))) if pairs else []
+        logger.info("[%s] Task succeeded with %s result(s)", task_id, len(result))
+        return result
+    except Exception as exc:
+        countdown = retry_backoff(self.request.retries)
+        logger.warning(
+            "[%s] Task failed: %s. Retrying in %ss...", task_id, exc, countdown
+        )
+        # Not the deferred copy's kwargs: each attempt serves its latency again
+        raise self.retry(
+            args=(pairs,), kwargs={}, exc=exc, countdown=countdown
+        ) from exc
+
+
+@shared_task
+def total(values):
+    """
+    Sums a list of results (e.g. the header results of a chord).
+    """
+    logger.info("Summing %s value(s)", len(values))
+    return sum(values)
 
 
 @shared_task
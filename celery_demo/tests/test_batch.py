@@ -0,0 +1,73 @@
+"""
+Test suite for the batched addition task and its client helper.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from celery_demo import client
+from celery_demo.tasks import batch_add
+from pristine.celery import app
+
+
+class EagerCeleryMixin:
+    """Run tasks in-process with the simulated sleep and failures disabled."""
+
+    def setUp(self):
+        super().setUp()
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+        patches = [
+            mock.patch("celery_demo.tasks.time.sleep"),
+            mock.patch("celery_demo.tasks.simulated_failure", return_value=False),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class BatchAddTaskTests(EagerCeleryMixin, SimpleTestCase):
+    """batch_add sums every pair in one invocation."""
+
+    def test_adds_all_pairs(self):
+        result = batch_add.apply(args=([[1, 2], [3, 4], [5.5, 0.5]],))
+        self.assertEqual(result.get(), [3, 7, 6.0])
+
+    def test_empty_batch(self):
+        self.assertEqual(batch_add.apply(args=([],)).get(), [])
+
+    def test_failure_retries(self):
+        with mock.patch(
+            "celery_demo.tasks.simulated_failure", side_effect=[True, False]
+        ):
+            result = batch_add.apply(args=([[1, 1]],))
+        self.assertEqual(result.get(), [2])
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2)
+    def test_retries_are_bounded(self):
+        with mock.patch("celery_demo.tasks.simulated_failure", return_value=True):
+            result = batch_add.apply(args=([[1, 1]],))
+        self.assertIsInstance(result.result, ValueError)
+
+
+class AddManyClientTests(EagerCeleryMixin, SimpleTestCase):
+    """The client helper chunks inputs and reassembles ordered results."""
+
+    def test_choose_chunk_size_is_bounded(self):
+        self.assertEqual(client.choose_chunk_size(10), client.MIN_CHUNK_SIZE)
+        self.assertEqual(client.choose_chunk_size(32_000), 1000)
+        self.assertEqual(client.choose_chunk_size(10**8), client.MAX_CHUNK_SIZE)
+
+    def test_split(self):
+        self.assertEqual(client.split([1, 2, 3, 4, 5], 2), [[1, 2], [3, 4], [5]])
+
+    def test_add_many_preserves_order(self):
+        pairs = [(i, i * 10) for i in range(25)]
+        with mock.patch.object(batch_add, "s", wraps=batch_add.s) as signature:
+            results = client.add_many(pairs, chunk_size=4)
+        self.assertEqual(signature.call_count, 7)
+        self.assertEqual(results, [i * 11 for i in range(25)])
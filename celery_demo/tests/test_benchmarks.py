@@ -0,0 +1,47 @@
+"""
+Test suite for the pipeline and serializer benchmarks.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from celery_demo import benchmarks
+
+
+class TaskTimingsTests(SimpleTestCase):
+    """Signal timestamps are folded into per-step latency and overhead."""
+
+    def test_summary(self):
+        timings = benchmarks.TaskTimings()
+        clock = iter([0.0, 0.010, 0.030, 1.0, 1.002, 1.003])
+        with mock.patch("celery_demo.benchmarks.time.perf_counter", clock.__next__):
+            for task_id, name in (("a", "slow_add"), ("b", "multiply")):
+                timings.on_publish(
+                    sender=f"celery_demo.tasks.{name}", headers={"id": task_id}
+                )
+                timings.on_prerun(task_id=task_id)
+                timings.on_postrun(task_id=task_id, state="SUCCESS")
+        summary = timings.summary(wall_seconds=0.5)
+        self.assertEqual(summary["tasks"], 2)
+        self.assertEqual(summary["tasks_per_sec"], 4.0)
+        self.assertEqual(
+            summary["steps"]["slow_add"], {"count": 1, "p50_ms": 30.0, "p99_ms": 30.0}
+        )
+        self.assertEqual(summary["steps"]["multiply"]["p50_ms"], 3.0)
+        # Queue wait only: 10ms for slow_add, 2ms for multiply
+        self.assertEqual(summary["overhead_per_message_ms"], 6.0)
+
+
+class SerializerBenchmarkTests(SimpleTestCase):
+    """The serializer comparison covers every payload with every codec."""
+
+    def test_report(self):
+        report = benchmarks.serializers(number=1, repeat=1)
+        self.assertEqual(set(report), set(benchmarks.PAYLOADS))
+        large = report["m2m_large"]
+        self.assertEqual(set(large), {"json", "compact"})
+        self.assertEqual(set(large["compact"]), {"bytes", "encode_us", "decode_us"})
+        self.assertLess(large["compact"]["bytes"], large["json"]["bytes"] / 4)
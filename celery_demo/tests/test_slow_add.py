@@ -0,0 +1,125 @@
+"""
+Test suite for slow_add's deferred latency and retry backoff.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from celery_demo.tasks import retry_backoff, slow_add
+from pristine.celery import app
+
+
+@override_settings(CELERY_DEMO_RETRY_BACKOFF=2, CELERY_DEMO_RETRY_BACKOFF_MAX=30)
+class RetryBackoffTests(SimpleTestCase):
+    """Retry countdowns grow exponentially, are capped and fully jittered."""
+
+    def test_upper_bound_doubles_until_cap(self):
+        with mock.patch("random.randrange", side_effect=lambda n: n - 1):
+            bounds = [retry_backoff(retries) for retries in range(6)]
+        self.assertEqual(bounds, [2, 4, 8, 16, 30, 30])
+
+    def test_jitter_spreads_retries(self):
+        countdowns = {retry_backoff(3) for _ in range(200)}
+        self.assertTrue(countdowns <= set(range(17)))
+        self.assertGreater(len(countdowns), 5)
+
+
+class SlowAddTests(SimpleTestCase):
+    """slow_add defers its latency and retries with backoff."""
+
+    def setUp(self):
+        super().setUp()
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2, CELERY_DEMO_FAILURE_RATE=0)
+    def test_latency_is_deferred_not_slept(self):
+        with (
+            mock.patch("celery_demo.tasks.time.sleep") as sleep,
+            mock.patch.object(slow_add, "replace", return_value=None) as replace,
+        ):
+            slow_add.apply(args=(2, 3))
+        sleep.assert_not_called()
+        replacement = replace.call_args.args[0]
+        self.assertEqual(replacement.args, (2, 3))
+        self.assertEqual(replacement.kwargs, {"deferred": True})
+        self.assertEqual(replacement.options["countdown"], 2)
+        self.assertFalse(replacement.options["ignore_result"])
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2)
+    def test_replacement_keeps_result_retention(self):
+        with mock.patch.object(slow_add, "replace", return_value=None) as replace:
+            slow_add.apply(args=(2, 3), ignore_result=True)
+        self.assertTrue(replace.call_args.args[0].options["ignore_result"])
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2)
+    def test_replacement_returns_result(self):
+        with mock.patch("celery_demo.tasks.simulated_failure", return_value=False):
+            self.assertEqual(slow_add.apply(args=(2, 3)).get(), 5)
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2, CELERY_DEMO_DEFER_LATENCY=False)
+    def test_blocking_mode_sleeps(self):
+        with (
+            mock.patch("celery_demo.tasks.time.sleep") as sleep,
+            mock.patch("celery_demo.tasks.simulated_failure", return_value=False),
+        ):
+            self.assertEqual(slow_add.apply(args=(2, 3)).get(), 5)
+        sleep.assert_called_once_with(2)
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=0)
+    def test_failure_retries_with_backoff(self):
+        with (
+            mock.patch(
+                "celery_demo.tasks.simulated_failure", side_effect=[True, True, False]
+            ),
+            mock.patch("celery_demo.tasks.retry_backoff", return_value=7) as backoff,
+            mock.patch.object(slow_add, "retry", wraps=slow_add.retry) as retry,
+        ):
+            self.assertEqual(slow_add.apply(args=(2, 3)).get(), 5)
+        self.assertEqual([c.args for c in backoff.call_args_list], [(0,), (1,)])
+        self.assertEqual(retry.call_args.kwargs["countdown"], 7)
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2, CELERY_DEMO_FAILURE_RATE=1)
+    def test_retry_of_the_deferred_copy_is_the_original_call(self):
+        with mock.patch.object(slow_add, "retry", side_effect=RuntimeError) as retry:
+            slow_add.apply(args=(2, 3), kwargs={"deferred": True})
+        self.assertEqual(retry.call_args.kwargs["args"], (2, 3))
+        self.assertEqual(retry.call_args.kwargs["kwargs"], {})
+
+    @override_settings(CELERY_DEMO_SIMULATED_DELAY=2)
+    def test_retries_are_bounded(self):
+        with mock.patch("celery_demo.tasks.simulated_failure", return_value=True):
+            result = slow_add.apply(args=(2, 3))
+        self.assertIsInstance(result.result, ValueError)
+
+
+class InFlightTests(SimpleTestCase):
+    """Deferring the latency lets one worker keep more tasks in flight."""
+
+    def test_in_flight(self):
+        # A fresh process, as in_memory_worker cannot swap the transports of an
+        # app that already published or read results
+        command = [sys.executable, "manage.py", "bench_pipeline", "--in-flight"]
+        command += ["--count", "12", "--concurrency", "2", "--delay", "0.2"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        # Sleeping tasks hold their slot; deferred ones free it for the next
+        self.assertLessEqual(report["blocking"]["peak_in_flight"], 2)
+        self.assertGreater(report["deferred"]["peak_in_flight"], 2)
+        for run in report.values():
+            self.assertEqual(run["tasks"], 12)
@@ -0,0 +1,36 @@
+"""
+Shared pytest configuration for the pristine project.
+"""
+
+import pytest
+
+
+def pytest_configure(config):  # pylint: disable=unused-argument
+    """Run the test suite against a local-memory cache instead of Redis."""
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache."""
+    # pylint: disable=import-outside-toplevel
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def hr_log_file(tmp_path_factory):
+    """Write the hr file log to a temporary directory instead of logs/."""
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+    from django.utils.log import configure_logging
+
+    path = tmp_path_factory.mktemp("logs") / "hr.log"
+    settings.LOGGING["handlers"]["hr_file"]["filename"] = str(path)
+    configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
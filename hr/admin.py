@@ -2,50 +2,232 @@
 Django admin customization for the HR app, defining admin interfaces for Department and Employee.
 """
 
+from django.conf import settings
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
 
-from .models import Department, Employee
+from . import membership
+from .models import Department, Employee, Membership
+from .search import search_employees
+from .signals import notify_m2m_changes
 
 
-class EmployeeInline(admin.TabularInline):
-    """Inline through model for Employee-Department relationships."""
+def large_table_threshold():
+    """Return the row count above which admin widgets switch to autocomplete."""
+    return getattr(settings, "HR_ADMIN_LARGE_TABLE_THRESHOLD", 1000)
 
-    model = Employee.departments.through
+
+def exceeds_threshold(model, threshold=None):
+    """Return True if ``model`` has more rows than ``threshold`` (no full COUNT)."""
+    threshold = large_table_threshold() if threshold is None else threshold
+    rows = model._default_manager.order_by().values_list("pk", flat=True)
+    return rows[threshold:].exists()
+
+
+class SizeAwareWidgetsMixin:
+    """
+    Switches relation widgets to paginated autocomplete for large tables.
+        ``size_aware_fields`` maps a field name to the related model; a field
+        becomes an autocomplete widget once that model passes the threshold.
+    """
+
+    size_aware_fields: dict = {}
+
+    def get_autocomplete_fields(self, request):
+        """Add size-aware fields whose related table is large to autocomplete."""
+        fields = list(super().get_autocomplete_fields(request))
+        fields.extend(
+            name
+            for name, model in self.size_aware_fields.items()
+            if name not in fields and exceeds_threshold(model)
+        )
+        return tuple(fields)
+
+
+class CappedInlineFormSet(BaseInlineFormSet):
+    """Inline formset that only loads the first ``max_rows`` related rows."""
+
+    max_rows = 50
+
+    def get_queryset(self):
+        """Return the related rows, sliced to ``max_rows``."""
+        if not hasattr(self, "_queryset"):
+            self._queryset = super().get_queryset()[: self.max_rows]
+        return self._queryset
+
+
+def membership_events(formset):
+    """
+    Return the ``(employee_id, action, pk_list)`` events of a saved
+    ``Membership`` formset.
+        Inline rows are saved through the model, without ``m2m_changed``; a
+        row moved to another employee or department is a remove and an add.
+    """
+    events = [
+        (row.employee_id, "post_add", [row.department_id])
+        for row in formset.new_objects
+    ]
+    events.extend(
+        (row.employee_id, "post_remove", [row.department_id])
+        for row in formset.deleted_objects
+    )
+    changed = {row.pk for row, _ in formset.changed_objects}
+    for form in formset.initial_forms:
+        row = form.instance
+        if row.pk not in changed:
+            continue
+        employee_id, department_id = (
+            form.initial["employee"],
+            form.initial["department"],
+        )
+        if (employee_id, department_id) != (row.employee_id, row.department_id):
+            events.append((employee_id, "post_remove", [department_id]))
+            events.append((row.employee_id, "post_add", [row.department_id]))
+    return events
+
+
+class MembershipInline(SizeAwareWidgetsMixin, admin.TabularInline):
+    """
+    Inline ``Membership`` rows, capped at HR_ADMIN_INLINE_MAX_ROWS.
+        ``joined_at`` is shown but set by the database.
+    """
+
+    model = Membership
+    formset = CappedInlineFormSet
     extra = 0
+    readonly_fields = ("joined_at",)
+
+    def get_formset(self, request, obj=None, **kwargs):
+        """Cap the inline at HR_ADMIN_INLINE_MAX_ROWS rows."""
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.max_rows = getattr(settings, "HR_ADMIN_INLINE_MAX_ROWS", 50)
+        return formset
+
+
+class EmployeeInline(MembershipInline):
+    """
+    Inline employees of a department.
+        Only the first rows are rendered; the full list is reachable through
+        the department's "View N Employees" link.
+    """
+
     verbose_name = "Employee"
     verbose_name_plural = "Employees"
+    size_aware_fields = {"employee": Employee}
+
+
+class DepartmentInline(MembershipInline):
+    """Inline departments of an employee, autocomplete once departments are large."""
+
+    verbose_name = "Department"
+    verbose_name_plural = "Departments"
+    size_aware_fields = {"department": Department}
+
+
+class MembershipEventsMixin:
+    """Publish the m2m change events of saved membership inlines."""
+
+    def save_formset(self, request, form, formset, change):
+        """Save the formset, then notify its membership changes."""
+        super().save_formset(request, form, formset, change)
+        if formset.model is Membership:
+            if events := membership_events(formset):
+                notify_m2m_changes(events)
+
+
+class DepartmentListFilter(admin.SimpleListFilter):
+    """
+    Filter employees by department without listing every department.
+        Only the first departments by name (plus the selected one) are offered;
+        any department id still works through ``?departments__id__exact=``.
+    """
+
+    title = "departments"
+    parameter_name = "departments__id__exact"
+    max_choices = 50
+
+    def lookups(self, request, model_admin):
+        """Return a capped list of departments plus the current selection."""
+        choices = list(
+            Department.objects.order_by("name").values_list("pk", "name")[
+                : self.max_choices
+            ]
+        )
+        selected = self.value()
+        if selected and selected.isdigit() and int(selected) not in dict(choices):
+            choices.extend(
+                Department.objects.filter(pk=selected).values_list("pk", "name")
+            )
+        return [(str(pk), name) for pk, name in choices]
+
+    def queryset(self, request, queryset):
+        """Restrict employees to the selected department."""
+        if self.value():
+            return queryset.filter(departments__id=self.value())
+        return queryset
+
+
+class EmployeeCountFilter(admin.SimpleListFilter):
+    """Filter departments by headcount bucket using the annotated count."""
+
+    title = "number of employees"
+    parameter_name = "headcount"
+    buckets = {
+        "0": (0, 0),
+        "1-10": (1, 10),
+        "11-100": (11, 100),
+        "101-1000": (101, 1000),
+        "1000+": (1001, None),
+    }
+
+    def lookups(self, request, model_admin):
+        """Return the headcount buckets shown in the sidebar."""
+        return [(key, key) for key in self.buckets]
+
+    def queryset(self, request, queryset):
+        """Restrict the annotated queryset to the selected bucket."""
+        if self.value() not in self.buckets:
+            return queryset
+        low, high = self.buckets[self.value()]
+        queryset = queryset.filter(_employee_count__gte=low)
+        if high is not None:
+            queryset = queryset.filter(_employee_count__lte=high)
+        return queryset
 
 
 @admin.register(Department)
-class DepartmentAdmin(admin.ModelAdmin):
+class DepartmentAdmin(MembershipEventsMixin, admin.ModelAdmin):
     """
     Advanced admin for Department:
-    - List display with employee count
-    - Search and filter
+    - List display with employee count (annotated from the membership index,
+      sortable; see hr.membership for its lag)
+    - Search and filter by headcount
     - Inline employees
     """
 
     list_display = ("id", "name", "employee_count", "view_employees_link")
     search_fields = ("name",)
-    list_filter = ("employees",)
+    list_filter = (EmployeeCountFilter,)
     inlines = [EmployeeInline]
     readonly_fields = ("employee_count", "view_employees_link")
 
     def get_queryset(self, request):
-        """Return departments with related employees prefetched for performance."""
+        """Return departments annotated with their indexed employee count."""
         qs = super().get_queryset(request)
-        return qs.prefetch_related("employees")
+        return qs.annotate(_employee_count=membership.member_count_expression())
 
     def employee_count(self, obj):
         """Return the number of employees in this department."""
-        return obj.employees.count()
+        count = getattr(obj, "_employee_count", None)
+        return membership.member_count(obj.pk) if count is None else count
 
     employee_count.short_description = "Number of Employees"  # type: ignore[attr-defined]
+    employee_count.admin_order_field = "_employee_count"  # type: ignore[attr-defined]
 
     def view_employees_link(self, obj):
         """Render a link to view all employees in this department."""
-        count = obj.employees.count()
+        count = self.employee_count(obj)
         url = f"../employee/?departments__id__exact={obj.id}"
         return format_html('<a href="{}">{}</a>', url, f"View {count} Employees")
 
@@ -53,26 +235,30 @@ class DepartmentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(MembershipEventsMixin, admin.ModelAdmin):
     """
     Advanced admin for Employee:
     - List display with departments
-    - Search by name/email
-    - Filter by departments
-    - ManyToMany field horizontal filter
+    - Search by email prefix / indexed name match (see hr.search)
+    - Filter by departments (capped choice list)
+    - Inline departments, autocomplete once departments are large
     - Custom actions
     """
 
     list_display = ("id", "name", "email", "department_list")
     search_fields = ("name", "email")
-    list_filter = ("departments",)
-    filter_horizontal = ("departments",)
+    list_filter = (DepartmentListFilter,)
+    inlines = [DepartmentInline]
 
     def get_queryset(self, request):
         """Return employees with related departments prefetched for performance."""
         qs = super().get_queryset(request)
         return qs.prefetch_related("departments")
 
+    def get_search_results(self, request, queryset, search_term):
+        """Use the indexed search path instead of ``icontains`` on every field."""
+        return search_employees(queryset, search_term), False
+
     def department_list(self, obj):
         """Return comma-separated department names for this employee."""
         names = [d.name for d in obj.departments.all()]
@@ -0,0 +1,242 @@
+# pylint: disable=unused-argument
+"""
+Async (ASGI) variants of the HR API read paths, served under ``/api/async/``.
+
+These are plain Django async views: rows are read with ``aget()``,
+``aiterator()`` and ``async for``, then rendered with the same DRF serializers,
+cursor pagination and versioned cache as the ``hr.views`` viewsets, so the
+payloads, cursors and ETags match. DRF's dispatch is synchronous, so these
+views run its authentication and permission checks themselves (in a thread),
+skip its throttling and content negotiation and only speak JSON.
+
+Under the sync viewsets an ASGI server runs every request in a thread. Here
+the event loop only gives up the request for its ORM calls.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from .cache import acached_response, departments_key, employee_key
+from .models import Department, Employee
+from .pagination import IdCursorPagination, StreamingListMixin, astream_rows
+from .search import search_employees
+from .serializers import DepartmentSerializer, EmployeeSerializer
+from .views import department_filter, filter_departments
+
+RENDERER = JSONRenderer()
+
+
+class DataResponse(HttpResponse):
+    """JSON response rendered as DRF renders ``data``, which it keeps."""
+
+    def __init__(self, data=None, status=status.HTTP_200_OK):
+        content = b"" if data is None else RENDERER.render(data)
+        super().__init__(content, content_type="application/json", status=status)
+        self.data = data
+
+
+async def employee_queryset(params):
+    """The ``EmployeeViewSet.get_queryset`` filters, built without blocking."""
+    queryset = Employee.objects.prefetch_related("departments").all()
+    if department_ids := department_filter(params):
+        # Intersections read the membership index
+        queryset = await sync_to_async(filter_departments)(queryset, department_ids)
+    if term := params.get("search", None):
+        # The first search on a database inspects its tables, a sync-only call
+        queryset = await sync_to_async(search_employees)(queryset, term)
+    return queryset
+
+
+class AsyncAPIView(View):
+    """
+    Base class: DRF requests, auth, pagination, streaming and JSON errors.
+        Requests are authenticated and checked against the same DRF settings
+        as the viewsets. Unlike DRF's ``APIView`` these views are not exempt
+        from the CSRF middleware, so a POST needs a CSRF token. Errors answer
+        with the payload and status DRF's exception handler gives them.
+    """
+
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    pagination_class = IdCursorPagination
+    stream_chunk_size = StreamingListMixin.stream_chunk_size
+    stream_query_param = StreamingListMixin.stream_query_param
+
+    def setup(self, request, *args, **kwargs):
+        authenticators = [auth() for auth in self.authentication_classes]
+        request = Request(
+            request, parsers=[JSONParser()], authenticators=authenticators
+        )
+        super().setup(request, *args, **kwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            # Authenticators may read the session and user tables
+            await sync_to_async(self.check_permissions)()
+            return await super().dispatch(self.request, *args, **kwargs)
+        except (Http404, exceptions.APIException) as exc:
+            return self.handle_exception(exc)
+
+    def permission_denied(self, message=None, code=None):
+        """Raise the exception ``APIView.permission_denied`` would."""
+        if self.request.authenticators and not self.request.successful_authenticator:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(detail=message, code=code)
+
+    def check_permissions(self):
+        """Authenticate the request and run ``has_permission`` checks."""
+        for permission in (permission() for permission in self.permission_classes):
+            if not permission.has_permission(self.request, self):
+                self.permission_denied(
+                    getattr(permission, "message", None),
+                    getattr(permission, "code", None),
+                )
+
+    def check_object_permissions(self, obj):
+        """Run ``has_object_permission`` checks, as ``get_object`` does."""
+        for permission in (permission() for permission in self.permission_classes):
+            if not permission.has_object_permission(self.request, self, obj):
+                self.permission_denied(
+                    getattr(permission, "message", None),
+                    getattr(permission, "code", None),
+                )
+
+    def handle_exception(self, exc):
+        """Render ``exc`` as ``APIView.handle_exception`` does."""
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            authenticators = self.request.authenticators
+            header = (
+                authenticators[0].authenticate_header(self.request)
+                if authenticators
+                else None
+            )
+            if header:
+                exc.auth_header = header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        response = exception_handler(exc, {"view": self, "request": self.request})
+        result = DataResponse(response.data, status=response.status_code)
+        if "WWW-Authenticate" in response:
+            result["WWW-Authenticate"] = response["WWW-Authenticate"]
+        return result
+
+    async def get_object(self, queryset, pk):
+        """Fetch the ``pk`` row of ``queryset`` and check object permissions."""
+        obj = await aget_object_or_404(queryset, pk=pk)
+        await sync_to_async(self.check_object_permissions)(obj)
+        return obj
+
+    def serialize(self, serializer_class, instance, many=True):
+        """Serialize already-fetched rows; must not touch the database."""
+        context = {"request": self.request}
+        return serializer_class(instance, many=many, context=context).data
+
+    def wants_stream(self):
+        """Return True for ``?stream=true`` list requests."""
+        value = self.request.query_params.get(self.stream_query_param, "")
+        return value.lower() in ("1", "true", "yes")
+
+    def streaming_response(self, queryset, serializer_class):
+        """Stream ``queryset`` as a JSON array, as ``StreamingListMixin`` does."""
+        rows = astream_rows(
+            queryset.order_by("pk"),
+            lambda chunk: self.serialize(serializer_class, chunk),
+            self.stream_chunk_size,
+        )
+        response = StreamingHttpResponse(rows, content_type="application/json")
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def paginated_response(self, queryset, serializer_class):
+        """Return one cursor page of ``queryset``."""
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.request)
+        data = self.serialize(serializer_class, page)
+        return DataResponse(paginator.get_paginated_response(data).data)
+
+    async def list_response(self, queryset, serializer_class):
+        """Stream or paginate ``queryset`` depending on the request."""
+        if self.wants_stream():
+            return self.streaming_response(queryset, serializer_class)
+        return await self.paginated_response(queryset, serializer_class)
+
+
+class EmployeeListView(AsyncAPIView):
+    """GET and POST ``/api/async/employees/``."""
+
+    async def get(self, request):
+        queryset = await employee_queryset(request.query_params)
+        return await self.list_response(queryset, EmployeeSerializer)
+
+    def create(self, data):
+        """Validate and save one employee; returns (payload, status)."""
+        serializer = EmployeeSerializer(data=data, context={"request": self.request})
+        if not serializer.is_valid():
+            return serializer.errors, status.HTTP_400_BAD_REQUEST
+        serializer.save()
+        return serializer.data, status.HTTP_201_CREATED
+
+    async def post(self, request):
+        # The write, and the Celery task publish its m2m signal triggers, run
+        # in the request's sync thread rather than on the event loop
+        data, code = await sync_to_async(self.create)(request.data)
+        return DataResponse(data, status=code)
+
+
+class EmployeeDetailView(AsyncAPIView):
+    """GET ``/api/async/employees/{pk}/``."""
+
+    async def get(self, request, pk):
+        queryset = await employee_queryset(request.query_params)
+        employee = await self.get_object(queryset, pk)
+        return DataResponse(self.serialize(EmployeeSerializer, employee, many=False))
+
+
+class EmployeeDepartmentsView(AsyncAPIView):
+    """GET ``/api/async/employees/{pk}/departments/``."""
+
+    @acached_response(departments_key, employee_key, response_class=DataResponse)
+    async def get(self, request, pk):
+        queryset = await employee_queryset(request.query_params)
+        employee = await self.get_object(queryset, pk)
+        # Served from the prefetch, like the sync action
+        departments = employee.departments.all()
+        return DataResponse(self.serialize(DepartmentSerializer, departments))
+
+
+class DepartmentListView(AsyncAPIView):
+    """GET ``/api/async/departments/``."""
+
+    @acached_response(departments_key, response_class=DataResponse)
+    async def get(self, request):
+        return await self.list_response(Department.objects.all(), DepartmentSerializer)
+
+
+class DepartmentDetailView(AsyncAPIView):
+    """GET ``/api/async/departments/{pk}/``."""
+
+    @acached_response(departments_key, response_class=DataResponse)
+    async def get(self, request, pk):
+        department = await self.get_object(Department, pk)
+        return DataResponse(
+            self.serialize(DepartmentSerializer, department, many=False)
+        )
+
+
+class DepartmentEmployeesView(AsyncAPIView):
+    """GET ``/api/async/departments/{pk}/employees/`` (cursor-paginated)."""
+
+    async def get(self, request, pk):
+        department = await self.get_object(Department, pk)
+        queryset = department.employees.prefetch_related("departments")
+        return await self.paginated_response(queryset, EmployeeSerializer)
@@ -0,0 +1,195 @@
+"""
+Coalescing buffer for Employee ↔ Department m2m_changed events.
+
+Instead of publishing one Celery message per m2m change, events raised inside a
+database transaction are collected per thread and savepoint, merged per employee
+and flushed with ``transaction.on_commit`` as chunked ``process_m2m_signal_batch``
+tasks.
+"""
+
+import logging
+import threading
+from collections.abc import Iterable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger("hr.signals")
+
+DEFAULT_BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+def batching_enabled() -> bool:
+    """Return True when m2m change events should be buffered and batched."""
+    return getattr(settings, "HR_M2M_SIGNAL_BATCHING", True)
+
+
+def batch_size() -> int:
+    """Return the maximum number of events sent in a single batch task."""
+    return max(1, getattr(settings, "HR_M2M_SIGNAL_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+
+
+class _EmployeeChange:
+    """Net department membership change for a single employee."""
+
+    __slots__ = ("cleared", "cleared_pks", "added", "removed")
+
+    def __init__(self):
+        self.cleared = False
+        # Every department the employee may have left, for the clear event
+        self.cleared_pks: set[int] = set()
+        self.added: set[int] = set()
+        self.removed: set[int] = set()
+
+    def apply(self, action: str, pk_list: Iterable[int]) -> None:
+        """
+        Fold one m2m action into the net change.
+            An add followed by a remove of the same department cancels out:
+            ``post_add`` only lists departments it inserted. A remove
+            followed by an add does not, because ``post_remove`` also lists
+            departments the employee was not in, so the add is kept.
+        """
+        if action == "post_clear":
+            self.cleared = True
+            self.cleared_pks.update(pk_list, self.added, self.removed)
+            self.added.clear()
+            self.removed.clear()
+            return
+        for pk in pk_list:
+            if action == "post_add":
+                self.removed.discard(pk)
+                self.added.add(pk)
+            elif action == "post_remove":
+                if pk in self.added:
+                    self.added.discard(pk)
+                elif not self.cleared:
+                    self.removed.add(pk)
+
+    def events(self, instance_id: int) -> Iterator[list]:
+        """Yield the minimal ``[instance_id, action, pk_list]`` events for this change."""
+        if self.cleared:
+            yield [instance_id, "post_clear", sorted(self.cleared_pks)]
+        if self.added:
+            yield [instance_id, "post_add", sorted(self.added)]
+        if self.removed:
+            yield [instance_id, "post_remove", sorted(self.removed)]
+
+
+class M2MChangeBuffer:
+    """
+    Collects m2m change events until the surrounding transaction commits.
+        Events are keyed by Employee PK so redundant add/remove pairs collapse
+        before anything is sent to the broker.
+    """
+
+    def __init__(self, size: int | None = None):
+        self.size = size or batch_size()
+        self.changes: dict[int, _EmployeeChange] = {}
+        self.received = 0
+        # Set while the flush is registered with on_commit, and the
+        # connection's callback list it was appended to
+        self.registered = False
+        self.callbacks: list | None = None
+
+    def register(self, connection) -> None:
+        """Flush this buffer when the transaction on ``connection`` commits."""
+        transaction.on_commit(self.flush, using=connection.alias)
+        self.registered = True
+        self.callbacks = connection.run_on_commit
+
+    def pending(self, connection) -> bool:
+        """
+        Return True while this buffer's flush is registered with ``connection``.
+            Rolling back the transaction or a savepoint replaces the
+            connection's list of on_commit callbacks, so the buffer is then
+            treated as discarded, even if its own flush survived.
+        """
+        return self.registered and connection.run_on_commit is self.callbacks
+
+    def add(self, instance_id: int, action: str, pk_list: Iterable[int]) -> None:
+        """Record a single (employee, action, department pks) event."""
+        self.received += 1
+        change = self.changes.get(instance_id)
+        if change is None:
+            change = self.changes[instance_id] = _EmployeeChange()
+        change.apply(action, pk_list)
+
+    def events(self) -> list[list]:
+        """Return the merged events in insertion order of their employees."""
+        return [
+            event
+            for instance_id, change in self.changes.items()
+            for event in change.events(instance_id)
+        ]
+
+    def chunks(self) -> Iterator[list[list]]:
+        """Yield the merged events split into chunks of at most ``size``."""
+        events = self.events()
+        for start in range(0, len(events), self.size):
+            end = start + self.size
+            yield events[start:end]
+
+    def flush(self) -> None:
+        """Publish merged events as batch tasks and detach this buffer."""
+        # pylint: disable=import-outside-toplevel
+        from .tasks import process_m2m_signal_batch
+
+        self.registered = False
+        buffers = _buffers()
+        for key in [key for key, buffer in buffers.items() if buffer is self]:
+            del buffers[key]
+        batches = 0
+        sent = 0
+        for chunk in self.chunks():
+            process_m2m_signal_batch.delay(chunk)
+            batches += 1
+            sent += len(chunk)
+        logger.debug(
+            "Flushed m2m buffer: %s events received, %s sent in %s batch task(s)",
+            self.received,
+            sent,
+            batches,
+        )
+
+
+def _buffers() -> dict[tuple, M2MChangeBuffer]:
+    """Return this thread's buffers, keyed by the savepoint stack they belong to."""
+    if not hasattr(_local, "buffers"):
+        _local.buffers = {}
+    return _local.buffers
+
+
+def get_buffer() -> M2MChangeBuffer:
+    """
+    Return the buffer of the current transaction or savepoint, creating it if needed.
+        Each savepoint gets its own buffer, registered with on_commit inside
+        it, so rolling the savepoint back drops its events along with the
+        flush. A buffer discarded by a rollback is replaced by a fresh one.
+    """
+    connection = transaction.get_connection()
+    buffers = _buffers()
+    # Blocks entered without a savepoint (None) commit or roll back with their parent
+    key = tuple(sid for sid in connection.savepoint_ids if sid is not None)
+    buffer = buffers.get(key)
+    if buffer is None or not buffer.pending(connection):
+        # Rolled back buffers never flush; drop them instead of leaking them
+        for stale in [k for k, b in buffers.items() if not b.pending(connection)]:
+            del buffers[stale]
+        buffer = buffers[key] = M2MChangeBuffer()
+        buffer.register(connection)
+    return buffer
+
+
+def record(instance_id: int, action: str, pk_list: Iterable[int]) -> None:
+    """
+    Buffer an m2m change event until the current transaction commits.
+        Outside of an atomic block the event is published straight away.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        buffer = M2MChangeBuffer()
+        buffer.add(instance_id, action, pk_list)
+        buffer.flush()
+        return
+    get_buffer().add(instance_id, action, pk_list)
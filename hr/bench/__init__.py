@@ -0,0 +1,13 @@
+"""
+Load tests and benchmarks for the HR app, one module per concern.
+
+``api`` compares the sync and async read endpoints under WSGI and ASGI,
+``serializers`` the employee list serializer and its fast path, ``log_pipeline``
+what the hr log pipeline adds to requests, ``endpoints`` load-tests every HR
+API endpoint against the current data, ``database`` compares the database
+profile with the defaults, ``feed`` compares syncing through
+``/api/changes/`` with re-downloading, ``search`` times employee search as
+the table grows, and ``enqueue`` measures the latency publishing m2m tasks
+adds to requests. ``harness`` holds the HR load loops
+they share; project-wide helpers are in ``pristine.bench``.
+"""
@@ -0,0 +1,116 @@
+"""
+Sync and async HR read endpoints under WSGI and ASGI, for ``bench_api``.
+"""
+
+import asyncio
+import random
+import time
+
+from django.core.handlers.asgi import ASGIHandler
+
+from .harness import seed_directory, summary, wsgi_run
+
+# Read requests in the API load test, as (path under /api/, query string)
+API_READS = (
+    ("employees/", "page_size=50"),
+    ("employees/{employee}/", ""),
+    ("employees/{employee}/departments/", ""),
+    ("departments/{department}/employees/", "page_size=50"),
+)
+
+
+# The sync viewsets, served by WSGI threads or by ASGI, and the async views
+API_RUNS = {
+    "wsgi_sync": ("/api/", "wsgi"),
+    "asgi_sync": ("/api/", "asgi"),
+    "asgi_async": ("/api/async/", "asgi"),
+}
+
+
+def _api_targets(prefix, count, employee_ids, department_ids, seed=0):
+    rng = random.Random(seed)
+    targets = []
+    for _ in range(count):
+        path, query = rng.choice(API_READS)
+        path = path.format(
+            employee=rng.choice(employee_ids), department=rng.choice(department_ids)
+        )
+        targets.append((prefix + path, query))
+    return targets
+
+
+async def _asgi_get(handler, path, query):
+    """Serve one GET through ``handler`` as an ASGI server would; return the status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    body = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = []
+
+    async def receive():
+        if body:
+            return body.pop()
+        # Nobody disconnects; the handler cancels this wait once it has responded
+        return await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await handler(scope, receive, send)
+    return status[0]
+
+
+async def _asgi_run(targets, concurrency):
+    """Serve ``targets`` through ``ASGIHandler`` from ``concurrency`` clients."""
+    handler = ASGIHandler()
+    latencies, errors = [], []
+    pending = iter(targets)
+
+    async def client():
+        for path, query in pending:
+            started = time.perf_counter()
+            code = await _asgi_get(handler, path, query)
+            elapsed = (time.perf_counter() - started) * 1000
+            if code == 200:
+                latencies.append(elapsed)
+            else:
+                errors.append(code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summary(latencies, errors, time.perf_counter() - started)
+
+
+def api_concurrency(requests=400, concurrency=16, employees=500, departments=10):
+    """
+    Replay the same mix of ``requests`` employee/department reads (``API_READS``)
+    with ``concurrency`` clients in flight against a seeded directory, for each
+    of ``API_RUNS``: the sync viewsets served by ``WSGIHandler`` threads and by
+    ``ASGIHandler``, and the async views served by ``ASGIHandler``. Reports
+    throughput and p50/p99 latency per run.
+    """
+    employee_ids, department_ids = seed_directory(employees, departments)
+    report = {}
+    for run, (prefix, server) in API_RUNS.items():
+        targets = _api_targets(prefix, requests, employee_ids, department_ids)
+        # Warm up on the tail of the mix: imports, URL resolution, cached pages
+        warmup = targets[-concurrency:]
+        if server == "wsgi":
+            wsgi_run(warmup, concurrency)
+            report[run] = wsgi_run(targets, concurrency)
+        else:
+            asyncio.run(_asgi_run(warmup, concurrency))
+            report[run] = asyncio.run(_asgi_run(targets, concurrency))
+    return report
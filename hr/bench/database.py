@@ -0,0 +1,104 @@
+"""
+Concurrent writes with and without the database profile, for ``bench_database``.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.test import APIClient
+
+from pristine.bench import percentile, quiet_loggers, scratch_database
+
+from ..models import Department
+from .harness import EMPLOYEES_URL, request_run
+
+# Connection settings left at Django's defaults, for database_concurrency
+DEFAULT_CONNECTION = {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {}}
+
+
+def _read_employees(stop, latencies, errors):
+    client = APIClient(SERVER_NAME="localhost", raise_request_exception=False)
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.get(EMPLOYEES_URL, {"page_size": 20})
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code == 200:
+                latencies.append(elapsed)
+            else:
+                errors.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+def _mixed_run(requests, writers, readers, department_ids):
+    """POST employees from ``writers`` threads while ``readers`` threads list them."""
+    stop = threading.Event()
+    latencies, errors = [], []
+    reading = [
+        threading.Thread(target=_read_employees, args=(stop, latencies, errors))
+        for _ in range(readers)
+    ]
+    for reader in reading:
+        reader.start()
+    started = time.perf_counter()
+    try:
+        result = request_run("load", requests, writers, department_ids)
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for reader in reading:
+            reader.join()
+    result["writes_per_sec"] = round(result["requests"] / elapsed, 1)
+    result["reads"] = len(latencies)
+    result["read_errors"] = len(errors)
+    result["reads_per_sec"] = round(len(latencies) / elapsed, 1)
+    result["read_p99_ms"] = round(percentile(latencies, 99), 3)
+    return result
+
+
+def database_concurrency(requests=400, writers=8, readers=4, departments=3):
+    """
+    POST ``requests`` employees from ``writers`` threads while ``readers``
+    threads page through the employee list, against a fresh scratch
+    database: once with Django's default connection settings, once with the
+    configured ``DATABASE_PROFILE`` (its ``OPTIONS``, on SQLite with the
+    pragmas of ``init_command``, and ``CONN_MAX_AGE``). Reports write and
+    read throughput, latency and failed requests of each run, and the
+    profile's write gain.
+    """
+    configured = connections["default"].settings_dict
+    profile = {key: configured[key] for key in DEFAULT_CONNECTION}
+    # scratch_database adjusts the OPTIONS dict in place
+    profile["OPTIONS"] = dict(profile["OPTIONS"])
+    runs = {"default": DEFAULT_CONNECTION, "profile": profile}
+    report = {}
+    # Default-settings runs fail requests with "database is locked"
+    with quiet_loggers("hr.signals", "django.request", level=logging.CRITICAL):
+        for run, connection_settings in runs.items():
+            previous = {key: configured[key] for key in DEFAULT_CONNECTION}
+            configured.update(connection_settings)
+            configured["OPTIONS"] = dict(connection_settings["OPTIONS"])
+            connections["default"].close()
+            try:
+                # The init_command pragmas apply from the connection migrating
+                # the scratch database; WAL mode sticks to the file
+                with scratch_database():
+                    # Without the options scratch_database adds for migrating
+                    configured["OPTIONS"] = dict(connection_settings["OPTIONS"])
+                    connections["default"].close()
+                    department_ids = [
+                        Department.objects.create(name=f"Load {n}").pk
+                        for n in range(departments)
+                    ]
+                    report[run] = _mixed_run(requests, writers, readers, department_ids)
+            finally:
+                connections.close_all()
+                configured.update(previous)
+    gain = report["profile"]["writes_per_sec"] / report["default"]["writes_per_sec"]
+    report["profile"]["write_gain"] = round(gain, 2)
+    report["profile"]["database_profile"] = settings.DATABASE_PROFILE
+    return report
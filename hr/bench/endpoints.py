@@ -0,0 +1,106 @@
+"""
+Per-endpoint load test of ``hr.urls`` against the current data, for
+``bench_endpoints``.
+"""
+
+import random
+
+from django.db import connections
+from django.db.models import Max, Min
+from django.urls import URLResolver, reverse
+
+from pristine.bench import quiet_loggers
+
+from .. import synthetic
+from .. import urls as hr_urls
+from ..models import Department, Employee
+from .harness import wsgi_run
+
+# Metrics compared against a stored baseline, and whether higher is better
+ENDPOINT_METRICS = {
+    "requests_per_sec": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "queries_per_request": False,
+}
+
+
+def _serves_get(view):
+    actions = getattr(view, "actions", None)
+    if actions is not None:
+        return "get" in actions
+    return hasattr(getattr(view, "view_class", None), "get")
+
+
+def _routes(patterns):
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            yield from _routes(entry.url_patterns)
+        # The router also registers every route with a format suffix
+        elif (
+            entry.name
+            and "format" not in entry.pattern.regex.groupindex
+            and _serves_get(entry.callback)
+        ):
+            yield entry.name, sorted(entry.pattern.regex.groupindex)
+
+
+def hr_endpoints():
+    """Return ``{url name: URL kwargs}`` for every GET route in ``hr.urls``."""
+    return dict(_routes(hr_urls.urlpatterns))
+
+
+def _sample_ids(model, count, rng):
+    """Draw up to ``count`` existing primary keys of ``model``, with repeats."""
+    bounds = model.objects.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return []
+    candidates = {rng.randint(bounds["low"], bounds["high"]) for _ in range(count)}
+    found = sorted(model.objects.filter(pk__in=candidates).values_list("pk", flat=True))
+    return [rng.choice(found) for _ in range(count)] if found else []
+
+
+def _endpoint_run(targets, concurrency):
+    # Warm up: imports, URL resolution, cached payloads
+    wsgi_run(targets[-concurrency:], concurrency)
+    queries = []
+    result = wsgi_run(targets, concurrency, queries)
+    result["queries_per_request"] = round(sum(queries) / len(queries), 2)
+    result["max_queries"] = max(queries)
+    return result
+
+
+def endpoint_load(endpoints=None, requests=100, concurrency=8, seed=0):
+    """
+    Load-test each GET endpoint of ``hr.urls`` (default: all) in turn with
+    ``requests`` requests from ``concurrency`` threads through
+    ``WSGIHandler``, against the data already in the database.
+        Detail routes get employee or department ids drawn from the table.
+        Reports the dataset and, per URL name, throughput, p50/p90/p99
+        latency and SQL queries per request (mean and max).
+    """
+    routes = hr_endpoints()
+    rng = random.Random(seed)
+    ids = {
+        "employee": _sample_ids(Employee, requests, rng),
+        "department": _sample_ids(Department, requests, rng),
+    }
+    report = {
+        "dataset": synthetic.dataset(),
+        "database": connections["default"].vendor,
+        "requests": requests,
+        "concurrency": concurrency,
+        "endpoints": {},
+    }
+    with quiet_loggers("django.request"):
+        for name in endpoints or routes:
+            resource = name.removeprefix("async-").split("-")[0]
+            if not routes[name]:
+                targets = [(reverse(name), "")] * requests
+            else:
+                targets = [
+                    (reverse(name, kwargs={"pk": pk}), "") for pk in ids[resource]
+                ]
+            if targets:
+                report["endpoints"][name] = _endpoint_run(targets, concurrency)
+    return report
@@ -0,0 +1,111 @@
+"""
+Load test of the latency enqueuing m2m tasks adds to ``POST /api/employees/``.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.test.utils import override_settings
+
+from pristine.bench import percentile, quiet_loggers
+from pristine.celery import app
+
+from .. import outbox
+from ..models import Department, OutboxEvent
+from .harness import request_run
+
+
+def _resize_broker_pool(limit):
+    # Producers hold a connection each, so close them before the connections
+    for pool in (app.producer_pool, app.pool):
+        pool.resize(limit, force=True, reset=True)
+
+
+@contextmanager
+def broker_pool(limit):
+    """Publish through a pool of ``limit`` kept connections (0: one per publish)."""
+    try:
+        _resize_broker_pool(limit)
+        yield
+    finally:
+        _resize_broker_pool(app.conf.broker_pool_limit)
+
+
+@contextmanager
+def publishing_disabled():
+    """Drop every task message before it reaches the producer pool."""
+    app.send_task = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        del app.send_task
+
+
+@contextmanager
+def publish_timings():
+    """Collect how long each ``send_task`` call holds its thread, in ms."""
+    durations = []
+    # May itself be an override (publishing_disabled) to restore afterwards
+    override = vars(app).get("send_task")
+    send_task = app.send_task
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return send_task(*args, **kwargs)
+        finally:
+            durations.append((time.perf_counter() - started) * 1000)
+
+    app.send_task = timed
+    try:
+        yield durations
+    finally:
+        if override is None:
+            del app.send_task
+        else:
+            app.send_task = override
+
+
+def enqueue_latency(requests=200, threads=8, pool_limit=None, departments=3):
+    """
+    POST ``requests`` employees (with ``departments`` each, so every request
+    emits an m2m change) from ``threads`` concurrent request threads: with
+    publishing dropped, connecting to the broker per publish, through the
+    shared producer pool of ``pool_limit`` connections (default: the
+    configured size), and writing to the outbox table. Reports the p50/p99
+    request latency of each run, the p99 latency each adds over the first,
+    and how fast ``hr.outbox.relay`` then publishes the outbox run's events.
+    """
+    pool_limit = pool_limit or app.conf.broker_pool_limit
+    department_ids = [
+        Department.objects.create(name=f"Load {n}").pk for n in range(departments)
+    ]
+    runs = {
+        "no_publish": publishing_disabled(),
+        "unpooled": broker_pool(0),
+        "pooled": broker_pool(pool_limit),
+        "outbox": nullcontext(),
+    }
+    report = {}
+    with quiet_loggers("hr.signals", "django.request"):
+        for run, setup in runs.items():
+            with override_settings(HR_M2M_SIGNAL_OUTBOX=run == "outbox"), setup:
+                # Warm up: first requests pay for imports, the schema cache and
+                # opening the pooled connections
+                request_run(f"{run}-warmup", threads, threads, department_ids)
+                with publish_timings() as publishes:
+                    report[run] = request_run(run, requests, threads, department_ids)
+            report[run]["publish_p50_ms"] = round(percentile(publishes, 50), 3)
+            report[run]["publish_p99_ms"] = round(percentile(publishes, 99), 3)
+    for run in ("unpooled", "pooled", "outbox"):
+        added = report[run]["p99_ms"] - report["no_publish"]["p99_ms"]
+        report[run]["added_p99_ms"] = round(added, 3)
+    report["pooled"]["pool_limit"] = pool_limit
+    pending = OutboxEvent.objects.count()
+    started = time.perf_counter()
+    while outbox.relay():
+        pass
+    elapsed = time.perf_counter() - started
+    report["outbox"]["relayed"] = pending
+    report["outbox"]["relay_events_per_sec"] = round(pending / elapsed, 1)
+    return report
@@ -0,0 +1,76 @@
+"""
+Change-feed syncs against full re-downloads, for ``bench_changes``.
+"""
+
+import json
+import random
+import time
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from pristine.bench import quiet_loggers, scratch_database
+
+from .. import changes, synthetic
+from ..models import Employee
+from .harness import EMPLOYEES_URL
+
+
+def _timed_get(client, path, params):
+    """GET ``path``; return the response body, elapsed ms and SQL queries run."""
+    connection = connections["default"]
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(path, params)
+        if response.streaming:
+            body = b"".join(response.streaming_content)
+        else:
+            body = response.content
+        elapsed = (time.perf_counter() - started) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {path} returned {response.status_code}")
+    return body, elapsed, len(queries)
+
+
+def change_feed(employees=20_000, departments=50, churn=(10, 100, 1000), seed=0):
+    """
+    Generate a directory of ``employees`` into a scratch database, then for
+    each ``n`` in ``churn`` rename ``n`` random employees and sync with
+    ``/api/changes/`` from the cursor taken before, following ``more``.
+        Reports, per churn level, the requests, bytes, SQL queries and time
+        the sync took, next to one full ``?stream=true`` download.
+    """
+    client = APIClient(SERVER_NAME="localhost")
+    rng = random.Random(seed)
+    with (
+        scratch_database(),
+        quiet_loggers("hr.signals"),
+    ):
+        dataset = synthetic.generate(employees, departments, seed=seed)
+        body, elapsed, queries = _timed_get(client, EMPLOYEES_URL, {"stream": "true"})
+        full = {"bytes": len(body), "ms": round(elapsed, 1), "queries": queries}
+        report = {"dataset": dataset, "full_download": full}
+        ids = list(Employee.objects.values_list("pk", flat=True))
+        for count in churn:
+            cursor = changes.head()
+            for employee in Employee.objects.filter(pk__in=rng.sample(ids, count)):
+                employee.name += "'"
+                employee.save(update_fields=["name"])
+            run = {"requests": 0, "bytes": 0, "ms": 0.0, "queries": 0, "changed": 0}
+            more = True
+            while more:
+                body, elapsed, queries = _timed_get(
+                    client, "/api/changes/", {"since": cursor}
+                )
+                data = json.loads(body)
+                cursor, more = data["cursor"], data["more"]
+                run["requests"] += 1
+                run["bytes"] += len(body)
+                run["ms"] += elapsed
+                run["queries"] += queries
+                run["changed"] += len(data["employees"])
+            run["ms"] = round(run["ms"], 1)
+            run["bytes_vs_full"] = round(run["bytes"] / full["bytes"], 4)
+            report[f"churn_{count}"] = run
+    return report
@@ -0,0 +1,151 @@
+"""
+Shared pieces of the HR load tests.
+
+The threaded ``POST /api/employees/`` and WSGI load loops and a seeded
+employee directory, for the modules of ``hr.bench``; the project-wide helpers
+are in ``pristine.bench``.
+"""
+
+import threading
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from pristine.bench import percentile
+
+from ..models import Department, Employee, Membership
+
+EMPLOYEES_URL = "/api/employees/"
+
+
+def _post_employees(run, indexes, department_ids, latencies, errors):
+    client = APIClient(SERVER_NAME="localhost", raise_request_exception=False)
+    try:
+        for index in indexes:
+            payload = {
+                "name": f"Load {run} {index}",
+                "email": f"load-{run}-{index}@example.com",
+                "department_ids": department_ids,
+            }
+            started = time.perf_counter()
+            response = client.post(EMPLOYEES_URL, payload, format="json")
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code == 201:
+                latencies.append(elapsed)
+            else:
+                errors.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+def request_run(run, requests, threads, department_ids):
+    """
+    POST ``requests`` employees in ``department_ids`` from ``threads``
+    threads; report the created count, failures and p50/p99 latency.
+    """
+    latencies, errors = [], []
+    workers = [
+        threading.Thread(
+            target=_post_employees,
+            args=(run, range(n, requests, threads), department_ids, latencies, errors),
+        )
+        for n in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def seed_directory(employees, departments):
+    """Bulk-insert ``employees`` employees, each in two of ``departments``."""
+    department_ids = [
+        department.pk
+        for department in Department.objects.bulk_create(
+            Department(name=f"Bench {n}") for n in range(departments)
+        )
+    ]
+    employee_ids = [
+        employee.pk
+        for employee in Employee.objects.bulk_create(
+            Employee(name=f"Bench {n}", email=f"bench-{n}@example.com")
+            for n in range(employees)
+        )
+    ]
+    Membership.objects.bulk_create(
+        Membership(employee_id=pk, department_id=department_ids[(n + k) % departments])
+        for n, pk in enumerate(employee_ids)
+        for k in range(min(2, departments))
+    )
+    return employee_ids, department_ids
+
+
+def summary(latencies, errors, elapsed):
+    """Report the requests, failures, throughput and latency percentiles of a run."""
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def _wsgi_client(handler, targets, latencies, errors, queries=None):
+    factory = RequestFactory(SERVER_NAME="localhost")
+    executed = []
+
+    def count(execute, *args):
+        executed.append(1)
+        return execute(*args)
+
+    try:
+        with connections["default"].execute_wrapper(count):
+            for path, query in targets:
+                environ = factory.get(f"{path}?{query}").environ
+                executed.clear()
+                started = time.perf_counter()
+                response = handler(environ, lambda status, headers: None)
+                b"".join(response)
+                response.close()
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors.append(response.status_code)
+                if queries is not None:
+                    queries.append(len(executed))
+    finally:
+        connections.close_all()
+
+
+def wsgi_run(targets, threads, queries=None):
+    """
+    Serve ``targets`` through ``WSGIHandler`` from ``threads`` threads,
+    appending the number of SQL queries each request ran to ``queries``.
+    """
+    handler = WSGIHandler()
+    latencies, errors = [], []
+    workers = [
+        threading.Thread(
+            target=_wsgi_client,
+            args=(handler, targets[n::threads], latencies, errors, queries),
+        )
+        for n in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return summary(latencies, errors, time.perf_counter() - started)
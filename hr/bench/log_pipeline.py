@@ -0,0 +1,147 @@
+"""
+Latency the hr log pipeline adds to API requests, for ``bench_logging``.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+
+from pristine import logs
+from pristine.bench import percentile, quiet_loggers
+
+from ..models import Department
+from .harness import request_run
+
+HR_LOGGERS = ("hr.signals", "hr.tasks")
+
+
+# How the hr loggers are set up in each logging_overhead run: the level, and
+# whether records go through the queue and the debug sampling filter
+LOG_RUNS = {
+    "silent": (logging.CRITICAL, False, False),
+    "sync": (logging.INFO, False, False),
+    "queue": (logging.INFO, True, False),
+    "queue_sampled_debug": (logging.DEBUG, True, True),
+}
+
+
+@contextmanager
+def hr_log_pipeline(run, directory):
+    """
+    Point the hr loggers at the ``LOG_RUNS[run]`` setup, writing to a console
+    stream on ``os.devnull`` and a JSON file log in ``directory``.
+        Yields the queue handler, or None for the direct runs. Handlers are
+        flushed, closed and the previous ones restored on exit.
+    """
+    level, queued, sampled = LOG_RUNS[run]
+    loggers = [logging.getLogger(name) for name in HR_LOGGERS]
+    previous = [(logger.handlers, logger.level) for logger in loggers]
+    # pylint: disable-next=consider-using-with
+    console = logging.StreamHandler(open(os.devnull, "w", encoding="utf-8"))
+    console.setFormatter(
+        logging.Formatter(settings.LOGGING["formatters"]["celery"]["format"])
+    )
+    file = RotatingFileHandler(
+        os.path.join(directory, f"{run}.log"),
+        maxBytes=1024 * 1024,
+        backupCount=50,
+        encoding="utf-8",
+    )
+    file.setLevel(logging.INFO)
+    file.setFormatter(logs.JsonFormatter())
+    handlers = [console, file]
+    queue_handler = None
+    if queued:
+        queue_handler = logs.QueueHandler()
+        if sampled:
+            queue_handler.addFilter(
+                logs.SampleFilter(getattr(settings, "HR_LOG_DEBUG_SAMPLE", 100))
+            )
+        queue_handler.listen(handlers)
+        handlers = [queue_handler]
+    for logger in loggers:
+        logger.handlers = handlers
+        logger.setLevel(level)
+    try:
+        yield queue_handler
+    finally:
+        for logger, (old_handlers, old_level) in zip(loggers, previous):
+            logger.handlers = old_handlers
+            logger.setLevel(old_level)
+        if queue_handler is not None:
+            queue_handler.close()
+        console.stream.close()
+        console.close()
+        file.close()
+
+
+def _log_lines(directory, run):
+    return sum(
+        sum(1 for _ in path.open(encoding="utf-8"))
+        for path in Path(directory).glob(f"{run}.log*")
+    )
+
+
+def _log_calls(count, threads):
+    """Log ``count`` records to hr.signals from ``threads`` threads; time each call."""
+    logger = logging.getLogger("hr.signals")
+    durations = []
+
+    def target(indexes):
+        timings = []
+        for index in indexes:
+            started = time.perf_counter()
+            logger.info("Employee %s (%s) was %s.", f"Bench {index}", index, "updated")
+            logger.debug("Enqueued m2m event for Employee %s", index)
+            timings.append((time.perf_counter() - started) * 1e6)
+        durations.extend(timings)
+
+    workers = [
+        threading.Thread(target=target, args=(range(n, count, threads),))
+        for n in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return {
+        "call_p50_us": round(percentile(durations, 50), 2),
+        "call_p99_us": round(percentile(durations, 99), 2),
+    }
+
+
+def logging_overhead(requests=200, threads=8, records=5000, departments=3):
+    """
+    Compare the hr log pipelines of ``LOG_RUNS``: logging off, handlers
+    called on the request thread (the previous setup), the queue, and the
+    queue with sampled debug lines (the configured setup).
+        Each run POSTs ``requests`` employees from ``threads`` request
+        threads, then logs ``records`` INFO and DEBUG pairs from the same
+        threads. Reports request p50/p99, the p99 each run adds over
+        ``silent``, the time one logging call holds its thread, the lines
+        written to the file log and the records the queue dropped.
+    """
+    department_ids = [
+        Department.objects.create(name=f"Load {n}").pk for n in range(departments)
+    ]
+    report = {}
+    with tempfile.TemporaryDirectory() as directory, quiet_loggers("django.request"):
+        for run in LOG_RUNS:
+            with hr_log_pipeline(run, directory) as queue_handler:
+                request_run(f"{run}-warmup", threads, threads, department_ids)
+                report[run] = request_run(run, requests, threads, department_ids)
+                report[run].update(_log_calls(records, threads))
+            # Closing the queue handler wrote out what it still held
+            report[run]["lines_written"] = _log_lines(directory, run)
+            report[run]["dropped"] = queue_handler.dropped if queue_handler else 0
+    for run in LOG_RUNS:
+        added = report[run]["p99_ms"] - report["silent"]["p99_ms"]
+        report[run]["added_p99_ms"] = round(added, 3)
+    return report
@@ -0,0 +1,54 @@
+"""
+Employee search lookups on a growing table, for ``bench_search``.
+"""
+
+import statistics
+import time
+
+from ..models import Employee
+from ..search import search_employees
+
+# An email prefix (LOWER(email) index) and a name substring (trigram index)
+TERMS = {"email": "person0000999", "name": "0000999"}
+
+
+def _grow_to(total):
+    start = Employee.objects.count()
+    Employee.objects.bulk_create(
+        (
+            Employee(name=f"Person {i:07d}", email=f"person{i:07d}@example.com")
+            for i in range(start, total)
+        ),
+        batch_size=2000,
+    )
+
+
+def _median_lookup_ms(term, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(search_employees(Employee.objects.all(), term)[:10])
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def search_lookups(sizes=(2_000, 40_000, 400_000), repeat=25):
+    """
+    Grow the employee table to each ``n`` in ``sizes`` and time the email and
+    name lookups in ``TERMS``.
+        Reports the median of ``repeat`` lookups per size and how many times
+        slower it is than at the smallest size; a full scan would grow with
+        the table.
+    """
+    report = {}
+    for size in sorted(sizes):
+        _grow_to(size)
+        run = {}
+        for kind, term in TERMS.items():
+            ms = _median_lookup_ms(term, repeat)
+            run[f"{kind}_ms"] = round(ms, 3)
+            if report:
+                first = next(iter(report.values()))
+                run[f"{kind}_vs_smallest"] = round(ms / first[f"{kind}_ms"], 2)
+        report[size] = run
+    return report
@@ -0,0 +1,46 @@
+"""
+The employee list serializer against its fast path, for ``bench_read_serializers``.
+"""
+
+import timeit
+from functools import partial
+
+from ..models import Employee
+from ..views import EmployeeViewSet
+from .harness import seed_directory
+
+
+def _stream_json(view, queryset):
+    return "".join(view.stream_rows(queryset))
+
+
+def read_serializers(sizes=(1_000, 10_000, 100_000), departments=20, repeat=3):
+    """
+    Stream the first ``n`` employees of a seeded directory as JSON, for each
+    ``n`` in ``sizes``, through ``EmployeeSerializer`` and through the
+    ``EmployeeListReader`` fast path, as ``?stream=true`` does; report the best
+    of ``repeat`` runs of each (queries included), the speed-up, and whether
+    the two produced the same bytes.
+    """
+    seed_directory(max(sizes), departments)
+    serializer_view = EmployeeViewSet(list_reader=None, request=None, format_kwarg=None)
+    reader_view = EmployeeViewSet(request=None, format_kwarg=None)
+    employees = Employee.objects.order_by("pk")
+    report = {}
+    for size in sizes:
+        runs = {
+            "serializer": (
+                serializer_view,
+                employees.prefetch_related("departments")[:size],
+            ),
+            "reader": (reader_view, reader_view.list_reader.values(employees)[:size]),
+        }
+        row, output = {}, {}
+        for name, (view, queryset) in runs.items():
+            output[name] = _stream_json(view, queryset)
+            timer = timeit.Timer(partial(_stream_json, view, queryset))
+            row[f"{name}_ms"] = round(min(timer.repeat(repeat, 1)) * 1000, 1)
+        row["speedup"] = round(row["serializer_ms"] / row["reader_ms"], 2)
+        row["identical"] = output["serializer"] == output["reader"]
+        report[str(size)] = row
+    return report
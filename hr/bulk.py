@@ -0,0 +1,90 @@
+"""
+Bulk upsert of employees and their department memberships.
+
+Rows are written with ``bulk_create(update_conflicts=True)`` keyed on the unique
+email and memberships are diffed against the through table, so importing N
+employees costs O(N / chunk size) queries instead of several queries per row.
+"""
+
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+
+from django.db import transaction
+
+from . import changes
+from .chunks import CHUNK_SIZE, chunks
+from .models import Employee, Membership
+from .signals import notify_m2m_changes
+
+logger = logging.getLogger("hr.signals")
+
+
+def _email_to_pk(emails: Sequence[str]) -> dict[str, int]:
+    result: dict[str, int] = {}
+    for chunk in chunks(emails):
+        result.update(
+            Employee.objects.filter(email__in=chunk).values_list("email", "pk")
+        )
+    return result
+
+
+def upsert_employees(rows: Sequence[dict]) -> dict[str, int]:
+    """
+    Create or update employees by email and replace their department memberships.
+
+    :param rows: validated ``{"name", "email", "department_ids"}`` dicts
+    :return: counts of created/updated employees and added/removed memberships
+    """
+    emails = [row["email"] for row in rows]
+
+    with transaction.atomic():
+        existing = _email_to_pk(emails)
+        Employee.objects.bulk_create(
+            [Employee(name=row["name"], email=row["email"]) for row in rows],
+            batch_size=CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=["email"],
+            update_fields=["name"],
+        )
+        pks = _email_to_pk(emails) if len(existing) < len(emails) else existing
+        # bulk_create sends no post_save
+        changes.record(changes.EMPLOYEE, pks.values())
+
+        current: dict[int, dict[int, int]] = defaultdict(dict)
+        for chunk in chunks(list(existing.values())):
+            for row_id, employee_id, department_id in Membership.objects.filter(
+                employee_id__in=chunk
+            ).values_list("pk", "employee_id", "department_id"):
+                current[employee_id][department_id] = row_id
+
+        to_insert = []
+        to_delete = []
+        events = []
+        for row in rows:
+            employee_id = pks[row["email"]]
+            wanted = set(row["department_ids"])
+            have = current.get(employee_id, {})
+            if added := sorted(wanted - have.keys()):
+                to_insert.extend(
+                    Membership(employee_id=employee_id, department_id=pk)
+                    for pk in added
+                )
+                events.append((employee_id, "post_add", added))
+            if removed := sorted(have.keys() - wanted):
+                to_delete.extend(have[pk] for pk in removed)
+                events.append((employee_id, "post_remove", removed))
+
+        for chunk in chunks(to_delete):
+            Membership.objects.filter(pk__in=chunk).delete()
+        Membership.objects.bulk_create(to_insert, batch_size=CHUNK_SIZE)
+        notify_m2m_changes(events)
+
+    result = {
+        "created": len(emails) - len(existing),
+        "updated": len(existing),
+        "memberships_added": len(to_insert),
+        "memberships_removed": len(to_delete),
+    }
+    logger.info("Bulk employee upsert: %s", result)
+    return result
@@ -0,0 +1,175 @@
+"""
+Versioned read-through cache for HR API responses.
+
+Cached payloads are keyed by request path plus the current value of one or more
+*version* keys. Signal receivers bump a version to invalidate every payload that
+depends on it; the version timestamps double as ETag and Last-Modified values.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+DEPARTMENTS_VERSION = "hr:version:departments"
+
+
+def employee_version(employee_id: int) -> str:
+    """Return the version key for an employee's department memberships."""
+    return f"hr:version:employee:{employee_id}"
+
+
+def departments_key(view, **kwargs) -> str:  # pylint: disable=unused-argument
+    """Version key for payloads built from Department rows."""
+    return DEPARTMENTS_VERSION
+
+
+def employee_key(view, pk=None, **kwargs) -> str:  # pylint: disable=unused-argument
+    """Version key for payloads built from one employee's memberships."""
+    return employee_version(pk)
+
+
+def get_cache():
+    """Return the cache backend used for HR API payloads."""
+    return caches[getattr(settings, "HR_API_CACHE_ALIAS", "default")]
+
+
+def cache_timeout() -> int:
+    """Return how long a cached payload may live, in seconds."""
+    return getattr(settings, "HR_API_CACHE_TIMEOUT", 60 * 60)
+
+
+def get_versions(keys: list[str]) -> dict[str, int]:
+    """Return the current versions for ``keys``, initialising missing ones."""
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key, time.time_ns())
+    return versions
+
+
+async def aget_versions(keys: list[str]) -> dict[str, int]:
+    """Async ``get_versions``."""
+    cache = get_cache()
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), None)
+            versions[key] = await cache.aget(key, time.time_ns())
+    return versions
+
+
+def bump(*keys: str) -> None:
+    """
+    Invalidate every payload depending on ``keys``.
+        The bump is repeated on commit so a reader cannot re-cache data it read
+        before the surrounding transaction became visible.
+    """
+    if not keys:
+        return
+
+    def _bump():
+        now = time.time_ns()
+        get_cache().set_many({key: now for key in keys}, None)
+
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _not_modified(request, etag: str, last_modified: int) -> bool:
+    """Return True if the request's validators match the current payload."""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        return "*" in (tags := parse_etags(if_none_match)) or etag in tags
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return since is not None and last_modified <= since
+
+
+def _validators(versions: dict[str, int], keys: list[str], url: str):
+    """Return the payload digest, ETag and Last-Modified for ``versions``."""
+    fingerprint = ":".join(str(versions[key]) for key in keys)
+    digest = hashlib.sha1(f"{fingerprint}:{url}".encode()).hexdigest()
+    return digest, quote_etag(digest), max(versions.values()) // 1_000_000_000
+
+
+def _set_validators(response, etag: str, last_modified: int):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def cached_response(*version_keys):
+    """
+    Cache a viewset handler's successful response data.
+        ``version_keys`` are callables ``(view, **kwargs) -> str`` naming the
+        versions the payload depends on. Responses carry ETag/Last-Modified and
+        matching conditional requests are answered with 304 Not Modified.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            keys = [key(self, **kwargs) for key in version_keys]
+            digest, etag, last_modified = _validators(
+                get_versions(keys), keys, request.build_absolute_uri()
+            )
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                cache = get_cache()
+                data_key = f"hr:response:{digest}"
+                data = cache.get(data_key)
+                if data is None:
+                    response = func(self, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK or response.streaming:
+                        return response
+                    cache.set(data_key, response.data, cache_timeout())
+                else:
+                    response = Response(data)
+            return _set_validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
+
+
+def acached_response(*version_keys, response_class):
+    """
+    Async ``cached_response`` for the views in ``hr.async_views``.
+        Versions and validators work as in the sync views; cache hits and 304s
+        are built with ``response_class(data=None, status=200)``.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, request, *args, **kwargs):
+            keys = [key(self, **kwargs) for key in version_keys]
+            digest, etag, last_modified = _validators(
+                await aget_versions(keys), keys, request.build_absolute_uri()
+            )
+            if _not_modified(request, etag, last_modified):
+                response = response_class(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                cache = get_cache()
+                data_key = f"hr:response:{digest}"
+                data = await cache.aget(data_key)
+                if data is None:
+                    response = await func(self, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK or response.streaming:
+                        return response
+                    await cache.aset(data_key, response.data, cache_timeout())
+                else:
+                    response = response_class(data)
+            return _set_validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,161 @@
+"""
+Change feed for employees and departments.
+
+The receivers in ``hr.signals`` (saves, deletes, m2m changes) and the bulk
+writes ``record`` which employees and departments changed, in the changing
+transaction. ``feed(since)`` reads the entries after a cursor in position
+order, collapses them to one per object and returns the current state of
+each, or its id when it is gone. Syncing costs one indexed range read plus
+the changed rows, however large the directory is. Employee payloads match
+``/api/employees/``; a renamed or deleted department changes them too, and
+shows up as a department change only.
+
+Entry ids are taken at insert but become visible at commit, so a long
+transaction can commit an entry behind a newer one a reader already read
+past. The cursor is therefore a ``position`` that ``feed`` and ``head`` give
+to committed entries first, one reader at a time and above every position
+handed out before: an entry reaches every cursor, however long its
+transaction ran.
+
+``compact`` deletes entries superseded by a newer one for the same object.
+It does not change what any cursor reads next, and it keeps the log no
+larger than the number of distinct objects that changed. ``hr.synthetic``
+logs the rows it inserts and deletes with ``record_all``.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, F, Max, OuterRef
+
+from .chunks import CHUNK_SIZE, chunks
+from .models import Change, Department, Employee
+from .serializers import DepartmentListReader, EmployeeListReader
+
+EMPLOYEE = "employee"
+DEPARTMENT = "department"
+
+# Log entries read per feed request by default, and at most
+FEED_LIMIT = 1000
+MAX_FEED_LIMIT = 5000
+# Postgres advisory lock serializing ``_assign_positions``
+POSITION_LOCK = 0x6872_6368
+
+_models = {EMPLOYEE: Employee, DEPARTMENT: Department}
+_readers = {EMPLOYEE: EmployeeListReader(), DEPARTMENT: DepartmentListReader()}
+
+
+def changes_enabled() -> bool:
+    """Return True when employee and department changes are logged."""
+    return getattr(settings, "HR_CHANGE_FEED", False)
+
+
+def record(kind, object_ids) -> int:
+    """Log that the ``kind`` objects with ``object_ids`` changed."""
+    if not changes_enabled():
+        return 0
+    rows = [Change(kind=kind, object_id=pk) for pk in sorted(set(object_ids))]
+    Change.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+    return len(rows)
+
+
+def record_all(kind, queryset) -> int:
+    """
+    Log every ``kind`` object in ``queryset``, with one ``INSERT ... SELECT``
+    instead of reading the ids into Python.
+    """
+    if not changes_enabled():
+        return 0
+    sql, params = queryset.values_list("pk").query.sql_with_params()
+    table = connection.ops.quote_name(Change._meta.db_table)
+    pk = connection.ops.quote_name("pk")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (kind, object_id) "
+            f"SELECT %s, ids.{pk} FROM ({sql}) ids ORDER BY ids.{pk}",
+            [kind, *params],
+        )
+        return cursor.rowcount
+
+
+def _assign_positions():
+    """
+    Give the committed entries without a position the next positions.
+        Runs one reader at a time (a Postgres advisory lock; SQLite's
+        ``IMMEDIATE`` transactions already are) and only numbers entries
+        from the oldest unpositioned id on, so every new position is above
+        the ones handed out before.
+    """
+    unpositioned = Change.objects.filter(position=None)
+    if not unpositioned.exists():
+        return
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [POSITION_LOCK])
+        first = unpositioned.order_by("pk").values_list("pk", flat=True).first()
+        if first is None:
+            return
+        top = Change.objects.aggregate(top=Max("position"))["top"] or 0
+        unpositioned.filter(pk__gte=first).update(position=F("pk") + (top + 1 - first))
+
+
+def head() -> int:
+    """Return the cursor of the newest entry, 0 for an empty log."""
+    _assign_positions()
+    return Change.objects.aggregate(top=Max("position"))["top"] or 0
+
+
+def _current(kind, ids):
+    """Return the payloads of the ``kind`` objects with ``ids`` that still exist."""
+    model, reader = _models[kind], _readers[kind]
+    found = []
+    for chunk in chunks(sorted(ids)):
+        rows = list(reader.values(model.objects.filter(pk__in=chunk).order_by("pk")))
+        found.extend(reader.represent(rows))
+    return found
+
+
+def feed(since=0, limit=FEED_LIMIT) -> dict:
+    """
+    Return the compacted changes after cursor ``since``.
+        ``cursor`` is the cursor to pass next; ``more`` is True when the
+        batch was full and the next call may return more right away. A
+        ``limit`` of 0 returns the current head as ``cursor`` and no
+        changes: read it before a full download, then sync from it.
+    """
+    if limit:
+        _assign_positions()
+        rows = list(
+            Change.objects.filter(position__gt=since)
+            .order_by("position")
+            .values_list("position", "kind", "object_id")[:limit]
+        )
+        cursor = rows[-1][0] if rows else since
+    else:
+        rows = []
+        cursor = max(since, head())
+    changed = defaultdict(set)
+    for _, kind, object_id in rows:
+        changed[kind].add(object_id)
+    payload = {"cursor": cursor, "more": bool(limit) and len(rows) == limit}
+    for kind in _models:
+        ids = changed[kind]
+        found = _current(kind, ids) if ids else []
+        payload[f"{kind}s"] = found
+        payload[f"deleted_{kind}s"] = sorted(ids - {row["id"] for row in found})
+    return payload
+
+
+def compact() -> int:
+    """Delete the entries superseded by a newer one; return how many."""
+    _assign_positions()
+    # Entries still uncommitted get a position later; they supersede nothing
+    newer = Change.objects.filter(
+        kind=OuterRef("kind"),
+        object_id=OuterRef("object_id"),
+        position__gt=OuterRef("position"),
+    )
+    deleted, _ = Change.objects.filter(Exists(newer)).delete()
+    return deleted
@@ -0,0 +1,15 @@
+"""
+Chunking for queries that filter on long ``IN (...)`` lists.
+"""
+
+from collections.abc import Iterator, Sequence
+
+# Keeps ``IN (...)`` lists below SQLite's default host-parameter limit.
+CHUNK_SIZE = 500
+
+
+def chunks(items: Sequence, size: int = CHUNK_SIZE) -> Iterator[Sequence]:
+    """Yield consecutive slices of ``items`` of at most ``size`` items each."""
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
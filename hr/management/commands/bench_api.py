@@ -0,0 +1,43 @@
+"""
+Management command comparing the sync and async HR read endpoints under load.
+"""
+
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import api
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Load-test the HR read endpoints under WSGI and ASGI."""
+
+    help = (
+        "Replay a mix of employee and department reads with concurrent clients "
+        "against a seeded scratch database: the sync viewsets under WSGI and "
+        "ASGI, and the async views under ASGI. Reports throughput and p50/p99."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument("--departments", type=int, default=10)
+        parser.add_argument(
+            "--local",
+            action="store_true",
+            help="Use the memory:// broker and a local-memory cache instead of Redis.",
+        )
+
+    def handle(self, *args, **options):
+        services = bench.local_services() if options["local"] else nullcontext()
+        with services, bench.scratch_database():
+            report = api.api_concurrency(
+                options["requests"],
+                options["concurrency"],
+                options["employees"],
+                options["departments"],
+            )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
@@ -0,0 +1,47 @@
+"""
+Management command comparing change-feed syncs with full re-downloads.
+"""
+
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import feed
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Measure what syncing through /api/changes/ costs at several churn levels."""
+
+    help = (
+        "Generate a synthetic directory into a scratch database, rename N "
+        "employees and sync them through /api/changes/, for each --churn N; "
+        "report requests, bytes, SQL queries and time next to one full "
+        "?stream=true download of /api/employees/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=20_000)
+        parser.add_argument("--departments", type=int, default=50)
+        parser.add_argument(
+            "--churn",
+            type=int,
+            action="append",
+            help="Employees changed between syncs (repeatable, default: 10, 100, 1000).",
+        )
+        parser.add_argument(
+            "--local",
+            action="store_true",
+            help="Use the memory:// broker and a local-memory cache instead of Redis.",
+        )
+
+    def handle(self, *args, **options):
+        services = bench.local_services() if options["local"] else nullcontext()
+        with services:
+            report = feed.change_feed(
+                options["employees"],
+                options["departments"],
+                options["churn"] or (10, 100, 1000),
+            )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
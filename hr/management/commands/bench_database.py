@@ -0,0 +1,40 @@
+"""
+Management command comparing the database profile with Django's defaults.
+"""
+
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import database
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Measure concurrent write throughput with and without the database profile."""
+
+    help = (
+        "POST employees from concurrent writer threads while reader threads "
+        "list them, against a scratch database, with Django's default "
+        "connection settings and with the configured DATABASE_PROFILE; report "
+        "writes/s, failed requests and the profile's write gain."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument(
+            "--local",
+            action="store_true",
+            help="Use the memory:// broker and a local-memory cache instead of Redis.",
+        )
+
+    def handle(self, *args, **options):
+        services = bench.local_services() if options["local"] else nullcontext()
+        with services:
+            report = database.database_concurrency(
+                options["requests"], options["writers"], options["readers"]
+            )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
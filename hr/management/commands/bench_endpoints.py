@@ -0,0 +1,106 @@
+"""
+Management command load-testing every HR API endpoint.
+"""
+
+import json
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hr import synthetic
+from hr.bench import endpoints
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Report throughput, latency and SQL queries per HR API endpoint."""
+
+    help = (
+        "GET each endpoint in hr/urls.py from concurrent threads through "
+        "Django's WSGI handler and report requests/s, p50/p90/p99 latency and "
+        "SQL queries per request, as JSON. Runs against the current database "
+        "(see generate_hr_data), or a generated scratch one with --scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=sorted(endpoints.hr_endpoints()),
+            help="URL name to load-test (repeatable, default: all).",
+        )
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--scratch",
+            action="store_true",
+            help="Generate a synthetic dataset into a throwaway database first.",
+        )
+        parser.add_argument("--employees", type=int, default=10_000)
+        parser.add_argument("--departments", type=int, default=100)
+        parser.add_argument(
+            "--local",
+            action="store_true",
+            help="Use the memory:// broker and a local-memory cache instead of Redis.",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Also write the report to this JSON file.",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=Path(settings.BASE_DIR) / "benchmarks" / "hr_endpoints.json",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store this run as the new baseline.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative regression against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        services = bench.local_services() if options["local"] else nullcontext()
+        database = bench.scratch_database() if options["scratch"] else nullcontext()
+        with services, database:
+            if options["scratch"]:
+                synthetic.generate(options["employees"], options["departments"])
+            elif not synthetic.dataset()["employees"]:
+                raise CommandError(
+                    "No employees to load-test: run generate_hr_data, or pass --scratch"
+                )
+            report = endpoints.endpoint_load(
+                options["endpoint"], options["requests"], options["concurrency"]
+            )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+        if options["output"]:
+            bench.save_baseline(options["output"], report)
+
+        if options["save_baseline"]:
+            bench.save_baseline(options["baseline"], report)
+            self.stderr.write(f"Baseline written to {options['baseline']}")
+            return
+        baseline = bench.load_baseline(options["baseline"])
+        if baseline is None:
+            return
+        if baseline["dataset"] != report["dataset"]:
+            self.stderr.write(
+                f"Baseline dataset {baseline['dataset']} differs from this one."
+            )
+        found = bench.regressions(
+            report["endpoints"],
+            baseline["endpoints"],
+            endpoints.ENDPOINT_METRICS,
+            options["tolerance"],
+        )
+        if found:
+            raise CommandError("Regressions against baseline:\n" + "\n".join(found))
+        self.stderr.write("No regressions against baseline.")
@@ -0,0 +1,44 @@
+"""
+Management command measuring the latency task publishing adds to API requests.
+"""
+
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import enqueue
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Load-test POST /api/employees/ with each way of enqueuing its m2m task."""
+
+    help = (
+        "POST employees from concurrent request threads against a scratch "
+        "database and report the p99 latency publishing their m2m task adds, "
+        "connecting per publish, through the shared producer pool and through "
+        "the outbox table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--pool-limit",
+            type=int,
+            help="Connections in the pooled run (default: CELERY_BROKER_POOL_LIMIT).",
+        )
+        parser.add_argument(
+            "--local",
+            action="store_true",
+            help="Use the memory:// broker and a local-memory cache instead of Redis.",
+        )
+
+    def handle(self, *args, **options):
+        services = bench.local_services() if options["local"] else nullcontext()
+        with services, bench.scratch_database():
+            report = enqueue.enqueue_latency(
+                options["requests"], options["threads"], options["pool_limit"]
+            )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
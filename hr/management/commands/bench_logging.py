@@ -0,0 +1,45 @@
+"""
+Management command measuring the latency the hr log pipeline adds to API requests.
+"""
+
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import log_pipeline
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Load-test POST /api/employees/ with each hr logging setup."""
+
+    help = (
+        "POST employees from concurrent request threads against a scratch "
+        "database with hr logging off, written on the request thread, queued "
+        "to a background writer, and queued with sampled debug lines; report "
+        "the p99 latency each adds and the time one logging call takes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--records",
+            type=int,
+            default=5000,
+            help="INFO and DEBUG record pairs logged per run to time single calls.",
+        )
+        parser.add_argument(
+            "--local",
+            action="store_true",
+            help="Use the memory:// broker and a local-memory cache instead of Redis.",
+        )
+
+    def handle(self, *args, **options):
+        services = bench.local_services() if options["local"] else nullcontext()
+        with services, bench.scratch_database():
+            report = log_pipeline.logging_overhead(
+                options["requests"], options["threads"], options["records"]
+            )
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
@@ -0,0 +1,36 @@
+"""
+Management command comparing the employee list serializer with its fast path.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import serializers
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Time EmployeeSerializer against EmployeeListReader on large lists."""
+
+    help = (
+        "Stream 1k, 10k and 100k employees from a seeded scratch database "
+        "through EmployeeSerializer and the EmployeeListReader fast path, and "
+        "report the time of each, the speed-up and whether the JSON matches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            action="append",
+            dest="sizes",
+            help="Rows to serialize (repeatable; default: 1000, 10000, 100000).",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"] or (1_000, 10_000, 100_000)
+        with bench.scratch_database():
+            report = serializers.read_serializers(sizes, repeat=options["repeat"])
+        self.stdout.write(json.dumps(report, indent=2))
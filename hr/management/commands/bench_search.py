@@ -0,0 +1,36 @@
+"""
+Management command timing employee search as the table grows.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from hr.bench import search
+from pristine import bench
+
+
+class Command(BaseCommand):
+    """Time indexed email and name lookups at several table sizes."""
+
+    help = (
+        "Grow the employees of a scratch database to 2k, 40k and 400k rows and "
+        "report the median time of an indexed email prefix and name lookup at "
+        "each size, and how it compares with the smallest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            action="append",
+            dest="sizes",
+            help="Employees to search (repeatable; default: 2000, 40000, 400000).",
+        )
+        parser.add_argument("--repeat", type=int, default=25)
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"] or (2_000, 40_000, 400_000)
+        with bench.scratch_database():
+            report = search.search_lookups(sizes, repeat=options["repeat"])
+        self.stdout.write(json.dumps(report, indent=2))
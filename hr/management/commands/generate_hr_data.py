@@ -0,0 +1,60 @@
+"""
+Management command generating a synthetic HR dataset for load testing.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hr import synthetic
+
+
+class Command(BaseCommand):
+    """Bulk-insert synthetic departments, employees and skewed memberships."""
+
+    help = (
+        "Insert synthetic departments and employees with a skewed membership "
+        "distribution (Zipf over departments) using bulk inserts, then rebuild "
+        "the membership index. Signals are not sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=10_000)
+        parser.add_argument("--departments", type=int, default=100)
+        parser.add_argument(
+            "--memberships",
+            type=int,
+            default=2,
+            help="Average departments per employee.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of department sizes (0: uniform).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=synthetic.BATCH_SIZE)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every employee, department and membership first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["departments"] < 1 or options["memberships"] < 1:
+            raise CommandError("--departments and --memberships must be at least 1")
+        report = {}
+        if options["clear"]:
+            report["cleared"] = synthetic.clear()
+        report.update(
+            synthetic.generate(
+                options["employees"],
+                options["departments"],
+                options["memberships"],
+                options["skew"],
+                options["seed"],
+                options["batch_size"],
+            )
+        )
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,38 @@
+"""
+Management command rebuilding or verifying the department membership index.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hr import membership
+
+
+class Command(BaseCommand):
+    """Rebuild the membership index from the through table, or check it."""
+
+    help = (
+        "Compare the denormalized department membership index with the "
+        "Employee/Department through table and report departments that are "
+        "missing or stale; with --rebuild, rewrite the index first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Rewrite every index row from the through table, then verify.",
+        )
+
+    def handle(self, *args, **options):
+        report = {}
+        if options["rebuild"]:
+            report["rebuilt"] = membership.rebuild()
+        problems = membership.verify()
+        report["problems"] = {str(pk): problem for pk, problem in problems.items()}
+        self.stdout.write(json.dumps(report, indent=2))
+        if problems:
+            raise CommandError(
+                f"{len(problems)} department(s) out of sync; run with --rebuild"
+            )
@@ -0,0 +1,83 @@
+"""
+Management command publishing the m2m change events waiting in the outbox.
+"""
+
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+from kombu.exceptions import OperationalError as BrokerError
+
+from hr import outbox
+
+logger = logging.getLogger("hr.signals")
+
+# Longest wait between retries while the broker or database is failing
+MAX_BACKOFF = 30.0
+
+
+class Command(BaseCommand):
+    """Drain the outbox table to the broker, once or continuously."""
+
+    help = (
+        "Publish committed m2m change events from the outbox table as batch "
+        "tasks and delete them. Runs until interrupted unless --once is given; "
+        "broker and database errors are logged and retried with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain what is pending now, print the count and exit.",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Print the number of pending events and the oldest one's age.",
+        )
+        parser.add_argument("--limit", type=int, default=outbox.RELAY_LIMIT)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds to wait when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            self.stdout.write(json.dumps(outbox.backlog()))
+            return
+        limit = options["limit"]
+        if options["once"]:
+            total = 0
+            while relayed := outbox.relay(limit):
+                total += relayed
+            self.stdout.write(json.dumps({"relayed": total}))
+            return
+        try:
+            self.relay_forever(limit, options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def relay_forever(self, limit, interval):
+        """Relay until interrupted, backing off 1s, 2s, 4s... while it fails."""
+        failures = 0
+        while True:
+            try:
+                relayed = outbox.relay(limit)
+            except (BrokerError, OperationalError) as exc:
+                wait = min(2.0**failures, MAX_BACKOFF)
+                failures += 1
+                logger.error("Outbox relay failed, retrying in %.0fs: %s", wait, exc)
+                time.sleep(wait)
+                # Replace a connection the error left unusable
+                close_old_connections()
+                continue
+            failures = 0
+            if relayed < limit:
+                time.sleep(interval)
+                # Like a request boundary: drop connections past CONN_MAX_AGE
+                close_old_connections()
@@ -0,0 +1,214 @@
+"""
+Denormalized department membership index.
+
+``MembershipIndex`` keeps each department's member count and sorted member ids
+in one row, so membership, count and intersection queries ("employees in both
+A and B") read one row per department instead of the m2m through table.
+
+``process_m2m_signal`` keeps the index current with ``apply_changes``. An
+update re-reads the touched employee's memberships from the through table
+(one lookup on the (employee, department) index) rather than replaying the event's
+delta, so events may be retried, repeated or delivered out of order. The index
+trails commits by the task queue; a department without a row is not indexed
+yet, and reads for it fall back to the through table. Reads served from the
+index (the admin's department headcounts and the API's multi-department
+filter) see a change once its task ran, not when it commits. The
+``membership_index`` command rebuilds or verifies the whole index.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Membership, MembershipIndex
+
+
+def _set_member(row, employee_id, member):
+    """Add or remove ``employee_id`` in ``row``; return True if it changed."""
+    ids = row.member_ids
+    index = bisect_left(ids, employee_id)
+    present = index < len(ids) and ids[index] == employee_id
+    if present == member:
+        return False
+    if member:
+        ids.insert(index, employee_id)
+    else:
+        del ids[index]
+    row.member_count = len(ids)
+    return True
+
+
+def _index_department(department_id):
+    """
+    Create the index row of a department from the through table.
+        The row is created (or locked, if another task created it first)
+        before the memberships are read, so of two tasks indexing the same
+        department the second reads what the first committed. Must run in a
+        transaction.
+    """
+    row, _ = MembershipIndex.objects.select_for_update().get_or_create(
+        department_id=department_id
+    )
+    row.member_ids = list(
+        Membership.objects.filter(department_id=department_id)
+        .order_by("employee_id")
+        .values_list("employee_id", flat=True)
+    )
+    row.member_count = len(row.member_ids)
+    row.save(update_fields=["member_ids", "member_count"])
+
+
+def apply_changes(events):
+    """
+    Bring the index in line with the through table for a batch of
+    ``(employee_id, action, pk_list)`` m2m events.
+        Each event touches the rows of its listed departments; a clear (also
+        sent for deleted employees) lists the departments the employee was
+        in. The memberships are read once the rows are locked, so a task
+        waiting on a concurrent one sees at least what that one saw. The
+        first member added to an unindexed department indexes it from the
+        through table.
+    """
+    touched = defaultdict(set)
+    for employee_id, _, pk_list in events:
+        touched[employee_id].update(pk_list)
+    department_ids = set().union(*touched.values())
+    if not department_ids:
+        return
+
+    with transaction.atomic():
+        rows = list(
+            MembershipIndex.objects.select_for_update()
+            .filter(pk__in=department_ids)
+            .order_by("pk")
+        )
+        current = defaultdict(set)
+        for employee_id, department_id in Membership.objects.filter(
+            employee_id__in=touched, department_id__in=department_ids
+        ).values_list("employee_id", "department_id"):
+            current[employee_id].add(department_id)
+        for row in rows:
+            changed = False
+            for employee_id, pks in touched.items():
+                if row.pk in pks:
+                    member = row.pk in current[employee_id]
+                    changed |= _set_member(row, employee_id, member)
+            if changed:
+                row.save(update_fields=["member_ids", "member_count"])
+        for department_id in department_ids - {row.pk for row in rows}:
+            if any(department_id in current[pk] for pk in touched):
+                _index_department(department_id)
+
+
+def _all_members():
+    """Yield ``(department id, sorted member ids)`` from the through table."""
+    pairs = Membership.objects.order_by("department_id", "employee_id").values_list(
+        "department_id", "employee_id"
+    )
+    for department_id, group in groupby(pairs.iterator(), key=itemgetter(0)):
+        yield department_id, [employee_id for _, employee_id in group]
+
+
+def rebuild():
+    """Rewrite the whole index from the through table; return the row count."""
+    rows = [
+        MembershipIndex(department_id=pk, member_ids=ids, member_count=len(ids))
+        for pk, ids in _all_members()
+    ]
+    with transaction.atomic():
+        MembershipIndex.objects.all().delete()
+        MembershipIndex.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def verify():
+    """
+    Compare the index with the through table.
+        Returns ``{department id: problem}`` for departments whose row is
+        missing, stale or inconsistent; an empty dict means the index is exact.
+    """
+    expected = dict(_all_members())
+    problems = {}
+    for row in MembershipIndex.objects.iterator():
+        ids = expected.pop(row.pk, [])
+        if row.member_count != len(row.member_ids):
+            problems[row.pk] = "member_count does not match member_ids"
+        elif row.member_ids != ids:
+            problems[row.pk] = (
+                f"{len(row.member_ids)} indexed member(s), {len(ids)} actual"
+            )
+    for department_id, ids in expected.items():
+        problems[department_id] = f"not indexed, {len(ids)} actual member(s)"
+    return dict(sorted(problems.items()))
+
+
+def members(department_id):
+    """Return the sorted member ids of a department."""
+    row = MembershipIndex.objects.filter(pk=department_id).first()
+    if row is not None:
+        return row.member_ids
+    return list(
+        Membership.objects.filter(department_id=department_id)
+        .order_by("employee_id")
+        .values_list("employee_id", flat=True)
+    )
+
+
+def member_count(department_id):
+    """Return the number of members of a department."""
+    counts = MembershipIndex.objects.filter(pk=department_id).values_list(
+        "member_count", flat=True
+    )
+    for count in counts:
+        return count
+    return Membership.objects.filter(department_id=department_id).count()
+
+
+def member_count_expression():
+    """
+    Return a Department queryset expression for the number of members: the
+    index row's ``member_count``, or a count on the through table for
+    departments that are not indexed.
+    """
+    counts = (
+        Membership.objects.filter(department_id=OuterRef("pk"))
+        .order_by()
+        .values("department_id")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(
+        "membership_index__member_count",
+        Subquery(counts),
+        0,
+        output_field=models.IntegerField(),
+    )
+
+
+def is_member(department_id, employee_id):
+    """Return True if the employee belongs to the department."""
+    ids = members(department_id)
+    index = bisect_left(ids, employee_id)
+    return index < len(ids) and ids[index] == employee_id
+
+
+def common_members(department_ids):
+    """
+    Return the sorted ids of employees in every one of ``department_ids``,
+    or None if one of the departments is not indexed.
+    """
+    department_ids = set(department_ids)
+    rows = list(
+        MembershipIndex.objects.filter(pk__in=department_ids).order_by("member_count")
+    )
+    if not department_ids or len(rows) < len(department_ids):
+        return None
+    common = set(rows[0].member_ids)
+    for row in rows[1:]:
+        common.intersection_update(row.member_ids)
+    return sorted(common)
@@ -0,0 +1,86 @@
+"""
+Indexed name search for employees, chosen per database vendor:
+SQLite gets an FTS5 trigram table kept in sync by triggers, PostgreSQL a
+pg_trgm GIN index on UPPER(name) that serves ``name__icontains``.
+"""
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE hr_employee_name_fts USING fts5(
+        name, content='hr_employee', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER hr_employee_name_fts_ai AFTER INSERT ON hr_employee BEGIN
+        INSERT INTO hr_employee_name_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER hr_employee_name_fts_ad AFTER DELETE ON hr_employee BEGIN
+        INSERT INTO hr_employee_name_fts(hr_employee_name_fts, rowid, name)
+        VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER hr_employee_name_fts_au AFTER UPDATE OF name ON hr_employee BEGIN
+        INSERT INTO hr_employee_name_fts(hr_employee_name_fts, rowid, name)
+        VALUES ('delete', old.id, old.name);
+        INSERT INTO hr_employee_name_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    # Index rows that already exist
+    "INSERT INTO hr_employee_name_fts(hr_employee_name_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS hr_employee_name_fts_au",
+    "DROP TRIGGER IF EXISTS hr_employee_name_fts_ad",
+    "DROP TRIGGER IF EXISTS hr_employee_name_fts_ai",
+    "DROP TABLE IF EXISTS hr_employee_name_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS hr_employee_name_trgm "
+    "ON hr_employee USING gin (UPPER(name) gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = ["DROP INDEX IF EXISTS hr_employee_name_trgm"]
+
+
+def _supported(connection):
+    """FTS5's trigram tokenizer needs SQLite 3.34+ built with FTS5."""
+    if connection.vendor != "sqlite":
+        return True
+    if connection.Database.sqlite_version_info < (3, 34):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return "ENABLE_FTS5" in {row[0] for row in cursor.fetchall()}
+
+
+def _run(statements):
+    def run(apps, schema_editor):  # pylint: disable=unused-argument
+        connection = schema_editor.connection
+        if not _supported(connection):
+            return
+        for sql in statements.get(connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hr", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,54 @@
+"""
+Denormalized department membership index, built from the existing memberships.
+"""
+
+from itertools import groupby
+from operator import itemgetter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    Employee = apps.get_model("hr", "Employee")
+    MembershipIndex = apps.get_model("hr", "MembershipIndex")
+    pairs = Employee.departments.through.objects.order_by(
+        "department_id", "employee_id"
+    ).values_list("department_id", "employee_id")
+    rows = []
+    for department_id, group in groupby(pairs.iterator(), key=itemgetter(0)):
+        ids = [employee_id for _, employee_id in group]
+        rows.append(
+            MembershipIndex(
+                department_id=department_id, member_ids=ids, member_count=len(ids)
+            )
+        )
+    MembershipIndex.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hr", "0002_employee_name_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MembershipIndex",
+            fields=[
+                (
+                    "department",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="membership_index",
+                        serialize=False,
+                        to="hr.department",
+                    ),
+                ),
+                ("member_count", models.PositiveIntegerField(default=0)),
+                ("member_ids", models.JSONField(default=list)),
+            ],
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
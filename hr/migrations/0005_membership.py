@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:31
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the implicit ``Employee.departments`` through table into ``Membership``.
+
+    The model takes over the existing table and rows (state only), then the
+    schema changes run as ordinary operations on the populated table: the
+    (department, employee) and ``joined_at`` indexes are added, ``joined_at``
+    is filled in with the migration time for existing rows, and the
+    single-column foreign key indexes, prefixes of the two composite ones,
+    are dropped.
+    """
+
+    dependencies = [
+        ("hr", "0004_outboxevent"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="Membership",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "employee",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="hr.employee",
+                            ),
+                        ),
+                        (
+                            "department",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="hr.department",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "hr_employee_departments",
+                        "unique_together": {("employee", "department")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="employee",
+                    name="departments",
+                    field=models.ManyToManyField(
+                        related_name="employees",
+                        through="hr.Membership",
+                        to="hr.department",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="membership",
+            index=models.Index(
+                fields=["department", "employee"], name="hr_membership_dept_emp_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="membership",
+            name="joined_at",
+            field=models.DateTimeField(
+                db_default=django.db.models.functions.datetime.Now()
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="membership",
+            index=models.Index(fields=["joined_at"], name="hr_membership_joined_idx"),
+        ),
+        migrations.AlterField(
+            model_name="membership",
+            name="employee",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="hr.employee",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="membership",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="hr.department",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+"""
+Feed positions for change log entries, given once an entry is committed.
+
+Existing entries keep their id as their position, so cursors handed out
+before the migration stay valid.
+"""
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def keep_cursors(apps, schema_editor):
+    Change = apps.get_model("hr", "Change")
+    Change.objects.update(position=F("pk"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hr", "0006_change"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="change",
+            name="position",
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        migrations.RunPython(keep_cursors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:04
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hr", "0007_change_position"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email"),
+                name="hr_employee_email_lower_idx",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ Models module for the HR app, defining Department and Employee entities.
 """
 
 from django.db import models
+from django.db.models.functions import Lower, Now
 
 
 class Department(models.Model):
@@ -20,13 +21,109 @@ class Department(models.Model):
 class Employee(models.Model):
     """
     Represents an employee in the organization.
-    Employees have a name, a unique email (indexed for lookups), and can belong
-    to multiple departments.
+    Employees have a name, a unique email (indexed for lookups, and lowercased
+    for case-insensitive prefix search), and can belong to multiple departments.
     """
 
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True, db_index=True)
-    departments = models.ManyToManyField(Department, related_name="employees")
+    departments = models.ManyToManyField(
+        Department, related_name="employees", through="Membership"
+    )
+
+    class Meta:
+        indexes = [models.Index(Lower("email"), name="hr_employee_email_lower_idx")]
 
     def __str__(self):
         return self.name
+
+
+class Membership(models.Model):
+    """
+    Through model of ``Employee.departments``, on the table Django created
+    for the implicit one.
+        The unique (employee, department) index serves lookups by employee
+        and the (department, employee) index lookups by department; both
+        cover the join, so neither needs the rows themselves. ``joined_at`` is
+        set by the database, also for raw inserts, and indexed so recent
+        memberships can be read incrementally.
+    """
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, db_index=False)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, db_index=False)
+    joined_at = models.DateTimeField(db_default=Now())
+
+    class Meta:
+        db_table = "hr_employee_departments"
+        unique_together = [("employee", "department")]
+        indexes = [
+            models.Index(
+                fields=["department", "employee"], name="hr_membership_dept_emp_idx"
+            ),
+            models.Index(fields=["joined_at"], name="hr_membership_joined_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} in {self.department_id}"
+
+
+class MembershipIndex(models.Model):
+    """
+    Denormalized member list of one department, maintained by ``hr.membership``.
+        ``member_ids`` holds the member employee ids in ascending order and
+        ``member_count`` its length.
+    """
+
+    department = models.OneToOneField(
+        Department,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="membership_index",
+    )
+    member_count = models.PositiveIntegerField(default=0)
+    member_ids = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.department_id}: {self.member_count} member(s)"
+
+
+class OutboxEvent(models.Model):
+    """
+    An m2m change event waiting to be published, written by ``hr.outbox``.
+        Rows are inserted in the transaction that changed the memberships,
+        claimed by a relay (``claimed_at``) and deleted once published.
+        ``employee_id`` is not a foreign key: the event for a deleted employee
+        outlives it.
+    """
+
+    employee_id = models.BigIntegerField()
+    action = models.CharField(max_length=16)
+    pk_list = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.action} {self.employee_id}: {self.pk_list}"
+
+
+class Change(models.Model):
+    """
+    One entry of the employee/department change log, written by ``hr.changes``.
+        ``position`` is the feed cursor, given to the entry by the first feed
+        read after it commits. An entry only says that the object changed
+        (or was deleted); readers fetch its current state. ``object_id`` is
+        not a foreign key, so entries outlive deleted objects.
+    """
+
+    kind = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(db_default=Now())
+    position = models.BigIntegerField(null=True, unique=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "object_id"], name="hr_change_object_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.pk}: {self.kind} {self.object_id}"
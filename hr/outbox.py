@@ -0,0 +1,111 @@
+"""
+Transactional outbox for Employee ↔ Department m2m change events.
+
+With ``HR_M2M_SIGNAL_OUTBOX`` on, change events are inserted into
+``OutboxEvent`` by the transaction that changed the memberships instead of
+being published from the request. They reach the relay only if, and once, that
+transaction commits, so workers never see an event before its data and a
+rollback leaves nothing behind. ``relay`` (run by the ``relay_outbox``
+command) claims pending events in a short transaction, then coalesces them per
+employee, publishes them as ``process_m2m_signal_batch`` tasks and deletes
+them, so no database lock is held while talking to the broker.
+
+Delivery is at least once: events whose publish failed are released, and a
+relay that stops between publishing and deleting leaves claims that expire
+after ``CLAIM_TIMEOUT``; those events are published again, which the
+membership index absorbs (see ``hr.membership``).
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .batching import M2MChangeBuffer
+from .models import OutboxEvent
+from .tasks import process_m2m_signal_batch
+
+logger = logging.getLogger("hr.signals")
+
+# Events read per relay transaction; each batch task still carries at most
+# HR_M2M_SIGNAL_BATCH_SIZE of them
+RELAY_LIMIT = 5000
+# Claimed events not deleted by then are taken again by the next relay
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def outbox_enabled() -> bool:
+    """Return True when m2m change events go through the outbox table."""
+    return getattr(settings, "HR_M2M_SIGNAL_OUTBOX", False)
+
+
+def write(events) -> int:
+    """Insert ``(employee_id, action, pk_list)`` events into the outbox."""
+    rows = [
+        OutboxEvent(employee_id=employee_id, action=action, pk_list=list(pk_list))
+        for employee_id, action, pk_list in events
+    ]
+    OutboxEvent.objects.bulk_create(rows, batch_size=500)
+    logger.debug("Wrote %s m2m event(s) to the outbox", len(rows))
+    return len(rows)
+
+
+def _claim(limit):
+    """Mark up to ``limit`` of the oldest unclaimed events as claimed; return them."""
+    now = timezone.now()
+    claimable = Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT)
+    with transaction.atomic():
+        rows = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(claimable)
+            .order_by("pk")[:limit]
+        )
+        OutboxEvent.objects.filter(pk__in=[row.pk for row in rows]).update(
+            claimed_at=now
+        )
+    for row in rows:
+        row.claimed_at = now
+    return rows
+
+
+def relay(limit: int = RELAY_LIMIT) -> int:
+    """
+    Publish and delete up to ``limit`` of the oldest committed events.
+        Returns the number of events taken from the outbox. The events are
+        claimed and committed before publishing, so concurrent relays skip
+        them; if publishing fails they are released and the error re-raised.
+    """
+    rows = _claim(limit)
+    if not rows:
+        return 0
+    claimed = OutboxEvent.objects.filter(
+        pk__in=[row.pk for row in rows], claimed_at=rows[0].claimed_at
+    )
+    buffer = M2MChangeBuffer()
+    for row in rows:
+        buffer.add(row.employee_id, row.action, row.pk_list)
+    batches = 0
+    try:
+        for chunk in buffer.chunks():
+            process_m2m_signal_batch.delay(chunk)
+            batches += 1
+    except Exception:
+        claimed.update(claimed_at=None)
+        raise
+    # Rows whose claim expired and was taken over are left to that relay
+    claimed.delete()
+    logger.debug("Relayed %s outbox event(s) in %s batch task(s)", len(rows), batches)
+    return len(rows)
+
+
+def backlog() -> dict:
+    """Return the number of pending events and the age of the oldest, in seconds."""
+    pending = OutboxEvent.objects.count()
+    oldest = OutboxEvent.objects.order_by("pk").values_list("created_at", flat=True)
+    age = 0.0
+    for created_at in oldest[:1]:
+        age = round((timezone.now() - created_at).total_seconds(), 3)
+    return {"pending": pending, "oldest_age_s": age}
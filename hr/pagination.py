@@ -0,0 +1,149 @@
+"""
+Pagination and streaming helpers for the HR list endpoints.
+"""
+
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the indexed primary key.
+        Each page is a ``WHERE id > <cursor> ORDER BY id LIMIT n`` query, so the
+        cost of a page does not grow with its position in the table.
+    """
+
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async ``paginate_queryset``: the page is fetched with ``async for``.
+            Cursors, links and page state are the same as the sync variant's, so
+            the async and sync endpoints can follow each other's links.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            # The ordering is the ascending primary key
+            lookup = "lt" if reverse else "gt"
+            queryset = queryset.filter(**{f"id__{lookup}": current_position})
+
+        window = queryset[offset : offset + self.page_size + 1]
+        results = [obj async for obj in window]
+        self.page = results[: self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        has_moved = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_moved, following is not None
+            self.next_position, self.previous_position = current_position, following
+        else:
+            self.has_next, self.has_previous = following is not None, has_moved
+            self.next_position, self.previous_position = following, current_position
+        return self.page
+
+
+class StreamingListMixin:
+    """
+    Adds ``?stream=true`` to a viewset's list endpoint.
+        Rows are read with ``.iterator(chunk_size=...)``, serialized one chunk
+        at a time and written through a ``StreamingHttpResponse`` as a JSON
+        array, so peak memory is bounded by the chunk size, not the table size.
+    """
+
+    stream_chunk_size = 1000
+    stream_query_param = "stream"
+    # Optional read fast path (see ``hr.serializers.EmployeeListReader``):
+    # lists are read as ``.values()`` rows and rendered without serializers
+    list_reader = None
+
+    def list_queryset(self):
+        """Return the filtered list queryset, narrowed for ``list_reader``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.list_reader is not None:
+            queryset = self.list_reader.values(queryset)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """Stream the full list when requested, otherwise paginate as usual."""
+        if request.query_params.get(self.stream_query_param, "").lower() in (
+            "1",
+            "true",
+            "yes",
+        ):
+            return self.streaming_response(self.list_queryset().order_by("pk"))
+        if self.list_reader is None:
+            return super().list(request, *args, **kwargs)
+        return self.paginated_response(self.list_queryset())
+
+    def paginated_response(self, queryset):
+        """Return one page of ``queryset``, or all of it without a paginator."""
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.serialize_chunk(queryset))
+        return self.get_paginated_response(self.serialize_chunk(page))
+
+    def streaming_response(self, queryset):
+        """Return a StreamingHttpResponse writing ``queryset`` as a JSON array."""
+        response = StreamingHttpResponse(
+            self.stream_rows(queryset), content_type="application/json"
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def serialize_chunk(self, rows):
+        """Serialize one chunk of list rows to a list of dicts."""
+        if self.list_reader is not None:
+            return self.list_reader.represent(rows)
+        return self.get_serializer(rows, many=True).data
+
+    def stream_rows(self, queryset):
+        """Yield the JSON array encoding of ``queryset`` chunk by chunk."""
+        encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        separator = "["
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            body = ",".join(
+                encoder.encode(item) for item in self.serialize_chunk(chunk)
+            )
+            yield separator + body
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+
+async def astream_rows(queryset, serialize_chunk, chunk_size):
+    """
+    Async ``StreamingListMixin.stream_rows``: rows come from ``aiterator()``.
+        ``serialize_chunk`` turns a list of instances into a list of dicts;
+        prefetches are done per chunk, so it must not query the database.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    separator, chunk = "[", []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield separator + ",".join(map(encoder.encode, serialize_chunk(chunk)))
+            separator, chunk = ",", []
+    if chunk:
+        yield separator + ",".join(map(encoder.encode, serialize_chunk(chunk)))
+        separator = ","
+    yield "[]" if separator == "[" else "]"
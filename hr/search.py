@@ -0,0 +1,72 @@
+"""
+Indexed employee search shared by the admin and the ``?search=`` API parameter.
+
+Email matching is a case-insensitive prefix range on the ``LOWER(email)``
+index. Name matching uses the per-vendor index created in
+``0002_employee_name_search``: an FTS5 trigram table on SQLite and a pg_trgm
+GIN index on PostgreSQL. Other backends, and terms too short for trigrams,
+fall back to a plain ``icontains`` scan.
+"""
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+FTS_TABLE = "hr_employee_name_fts"
+MIN_TRIGRAM_LENGTH = 3
+
+_fts_available: dict[str, bool] = {}
+
+
+def email_prefix_q(term: str) -> Q:
+    """
+    Match emails starting with ``term``, in any case, as a range scan on the
+    ``LOWER(email)`` index.
+    """
+    term = term.lower()
+    email = Lower("email")
+    return Q(GreaterThanOrEqual(email, term), LessThan(email, term + "\U0010ffff"))
+
+
+def _has_fts(alias: str) -> bool:
+    if alias not in _fts_available:
+        connection = connections[alias]
+        _fts_available[alias] = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available[alias]
+
+
+def _fts_query(tokens: list[str]) -> str:
+    return " ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+
+
+def name_q(term: str, alias: str = "default") -> Q:
+    """Match employee names containing every whitespace-separated token."""
+    tokens = term.split()
+    trigram_tokens = [t for t in tokens if len(t) >= MIN_TRIGRAM_LENGTH]
+    if not trigram_tokens:
+        return Q(name__istartswith=term)
+    q = Q()
+    if _has_fts(alias):
+        sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        q = Q(pk__in=RawSQL(sql, [_fts_query(trigram_tokens)]))
+        # Short tokens only narrow the rows the trigram index already found
+        tokens = [t for t in tokens if len(t) < MIN_TRIGRAM_LENGTH]
+    # icontains is served by the UPPER(name) trigram index on PostgreSQL
+    for token in tokens:
+        q &= Q(name__icontains=token)
+    return q
+
+
+def search_employees(queryset: QuerySet, term: str) -> QuerySet:
+    """Filter ``queryset`` to employees whose email or name matches ``term``."""
+    term = term.strip()
+    if not term:
+        return queryset
+    if "@" in term:
+        return queryset.filter(email_prefix_q(term))
+    return queryset.filter(email_prefix_q(term) | name_q(term, queryset.db))
@@ -2,6 +2,8 @@
 Serializers module for the HR app, defining Department and Employee serializers.
 """
 
+from collections import defaultdict
+
 from rest_framework import serializers
 
 from .models import Department, Employee
@@ -49,4 +51,119 @@ class EmployeeSerializer(serializers.ModelSerializer):
             Returns:
                 A string message.
         """
-        return f"{obj.name} is associated with {obj.departments.count()} department(s)."
+        # len() over .all() reuses the prefetched departments instead of a COUNT query
+        return (
+            f"{obj.name} is associated with {len(obj.departments.all())} department(s)."
+        )
+
+
+class DepartmentListReader:
+    """
+    Read-only fast path for ``DepartmentSerializer(many=True).data``.
+        ``.values()`` rows already are the serialized departments.
+    """
+
+    fields = ("id", "name")
+
+    def values(self, queryset):
+        """Narrow ``queryset`` to the dict rows ``represent`` expects."""
+        return queryset.values(*self.fields)
+
+    def represent(self, rows):
+        """Return the list payload for a page of ``values`` rows."""
+        return list(rows)
+
+
+class EmployeeListReader:
+    """
+    Read-only fast path for ``EmployeeSerializer(many=True).data``.
+        Employees are read with ``.values()`` and their departments with one
+        query over the same join ``prefetch_related("departments")`` runs, so
+        they come back in the same order; each department's dict is built once
+        and shared by every employee of the page that belongs to it. The JSON
+        is the serializer's, byte for byte, at a fraction of the CPU cost of
+        instantiating a serializer and model per row.
+    """
+
+    fields = ("id", "name", "email")
+
+    def values(self, queryset):
+        """Narrow ``queryset`` to the dict rows ``represent`` expects."""
+        return queryset.prefetch_related(None).values(*self.fields)
+
+    def represent(self, rows):
+        """Return the list payload for a page of ``values`` rows."""
+        if not rows:
+            return []
+        departments = {}
+        memberships = defaultdict(list)
+        pairs = Department.objects.filter(
+            employees__in=[row["id"] for row in rows]
+        ).values_list("employees", "id", "name")
+        for employee_id, pk, name in pairs:
+            if (department := departments.get(pk)) is None:
+                department = departments[pk] = {"id": pk, "name": name}
+            memberships[employee_id].append(department)
+        payload = []
+        for row in rows:
+            joined = memberships.get(row["id"], [])
+            payload.append(
+                {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "email": row["email"],
+                    "departments": joined,
+                    "message": f"{row['name']} is associated with "
+                    f"{len(joined)} department(s).",
+                }
+            )
+        return payload
+
+
+class EmployeeBulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a bulk payload in one pass.
+        Department ids for all rows are checked with a single query and
+        duplicate emails inside the payload are rejected. Errors are reported
+        as a list aligned with the submitted rows.
+    """
+
+    def run_validation(self, data=serializers.empty):
+        """Run per-row field validation, then the cross-row checks below."""
+        attrs = super().run_validation(data)
+        department_ids = {pk for row in attrs for pk in row["department_ids"]}
+        known = set(
+            Department.objects.filter(pk__in=department_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        seen: set[str] = set()
+        errors: list[dict] = []
+        for row in attrs:
+            row_errors = {}
+            if missing := sorted(set(row["department_ids"]) - known):
+                row_errors["department_ids"] = [
+                    f'Invalid pk "{pk}" - object does not exist.' for pk in missing
+                ]
+            if row["email"] in seen:
+                row_errors["email"] = ["Duplicate email in payload."]
+            seen.add(row["email"])
+            errors.append(row_errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class EmployeeBulkSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """
+    Validates one row of a bulk employee upsert without touching the database.
+        Rows are matched to existing employees by email; ``department_ids``
+        replaces the employee's department memberships.
+    """
+
+    name = serializers.CharField(max_length=100)
+    email = serializers.EmailField(max_length=254)
+    department_ids = serializers.ListField(child=serializers.IntegerField(min_value=1))
+
+    class Meta:
+        list_serializer_class = EmployeeBulkListSerializer
@@ -4,10 +4,12 @@ Signals module for the HR app: handles post_save and m2m_changed signals.
 
 import logging
 
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import Employee
+from . import batching, changes, outbox
+from .cache import DEPARTMENTS_VERSION, bump, employee_version
+from .models import Department, Employee, Membership
 from .tasks import process_m2m_signal
 
 logger = logging.getLogger("hr.signals")
@@ -18,20 +20,147 @@ def log_employee_save(instance, created, **kwargs):
     """Log employee creation or update events."""
     action = "created" if created else "updated"
     logger.info("Employee %s (%s) was %s.", instance.name, instance.id, action)
+    changes.record(changes.EMPLOYEE, [instance.id])
+    if not created:
+        bump(employee_version(instance.id))
 
 
-@receiver(m2m_changed, sender=Employee.departments.through)
-def enqueue_m2m_change_task(instance, action, pk_set, **kwargs):
-    """Enqueue Celery task for employee department changes."""
-    # Only after the change has been applied
-    if action in ("post_add", "post_remove", "post_clear"):
-        pk_list = list(pk_set) if pk_set is not None else []
+@receiver(pre_delete, sender=Employee)
+def remember_deleted_memberships(instance, **kwargs):
+    """Capture the departments of an employee about to be deleted."""
+    instance._hr_cleared_department_ids = list(  # pylint: disable=protected-access
+        Membership.objects.filter(employee_id=instance.pk).values_list(
+            "department_id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=Employee)
+def invalidate_deleted_employee(instance, **kwargs):
+    """
+    Drop cached payloads for a deleted employee.
+        Its memberships are deleted by cascade, without m2m_changed, so a
+        clear event for the departments captured on pre_delete takes it out
+        of the membership index (and logs the deletion for the change feed).
+    """
+    department_ids = instance.__dict__.pop("_hr_cleared_department_ids", [])
+    notify_m2m_changes([(instance.id, "post_clear", department_ids)])
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_departments(instance, **kwargs):
+    """Drop every cached payload that embeds Department rows, and log the change."""
+    bump(DEPARTMENTS_VERSION)
+    changes.record(changes.DEPARTMENT, [instance.id])
+
+
+def invalidate_m2m_change(instance, action, pk_set, reverse):
+    """
+    Drop cached department lists of the employees touched by an m2m change.
+        Runs on the post_* actions; a reverse clear uses the employee ids
+        captured on pre_clear.
+    """
+    if not reverse:
+        bump(employee_version(instance.id))
+    elif action == "post_clear":
+        cleared = instance.__dict__.get("_hr_cleared_employee_ids", [])
+        bump(*(employee_version(pk) for pk in cleared))
+    else:
+        bump(*(employee_version(pk) for pk in pk_set or ()))
+
+
+def m2m_events(instance, action, pk_set, reverse):
+    """
+    Yield an m2m change as ``(employee_id, action, pk_list)`` events.
+        Changes made from the Department side (``dept.employees.add(...)``)
+        are fanned out into one event per affected employee. A clear lists
+        the departments captured on pre_clear.
+    """
+    if not reverse and action == "post_clear":
+        yield instance.id, action, instance.__dict__.get(
+            "_hr_cleared_department_ids", []
+        )
+        return
+    if not reverse:
+        yield instance.id, action, list(pk_set) if pk_set is not None else []
+        return
+    if action == "post_clear":
+        employee_ids = instance.__dict__.get("_hr_cleared_employee_ids", [])
+        action = "post_remove"
+    else:
+        employee_ids = pk_set or []
+    for employee_id in employee_ids:
+        yield employee_id, action, [instance.id]
 
-        process_m2m_signal.delay(instance.id, action, pk_list)
+
+def buffer_m2m_change(instance, action, pk_set, reverse):
+    """Record an m2m change in the transaction buffer, keyed by Employee PK."""
+    for event in m2m_events(instance, action, pk_set, reverse):
+        batching.record(*event)
+
+
+def _forget_cleared(instance):
+    """Drop the ids captured on pre_clear once the change is dispatched."""
+    instance.__dict__.pop("_hr_cleared_employee_ids", None)
+    instance.__dict__.pop("_hr_cleared_department_ids", None)
+
+
+@receiver(m2m_changed, sender=Membership)
+def enqueue_m2m_change_task(instance, action, pk_set, reverse=False, **kwargs):
+    """Enqueue Celery task for employee department changes."""
+    # post_clear carries no pk_set; remember what is about to be removed
+    if reverse and action == "pre_clear":
+        instance._hr_cleared_employee_ids = list(  # pylint: disable=protected-access
+            instance.employees.values_list("pk", flat=True)
+        )
+    elif action == "pre_clear":
+        instance._hr_cleared_department_ids = list(  # pylint: disable=protected-access
+            instance.departments.values_list("pk", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    invalidate_m2m_change(instance, action, pk_set, reverse)
+    changes.record(
+        changes.EMPLOYEE,
+        (pk for pk, _, _ in m2m_events(instance, action, pk_set, reverse)),
+    )
+    if outbox.outbox_enabled():
+        # Committed, or rolled back, with the change itself
+        outbox.write(m2m_events(instance, action, pk_set, reverse))
+        _forget_cleared(instance)
+        return
+    if batching.batching_enabled():
+        buffer_m2m_change(instance, action, pk_set, reverse)
+        _forget_cleared(instance)
+        return
+    # Only after the change has been applied; one task per affected employee
+    for employee_id, event_action, pk_list in m2m_events(
+        instance, action, pk_set, reverse
+    ):
+        process_m2m_signal.delay(employee_id, event_action, pk_list)
         logger.debug(
-            "Enqueued Celery task for Employee %s (%s) action=%s pks=%s",
-            instance.name,
-            instance.id,
-            action,
+            "Enqueued Celery task for Employee %s action=%s pks=%s",
+            employee_id,
+            event_action,
             pk_list,
         )
+    _forget_cleared(instance)
+
+
+def notify_m2m_changes(events):
+    """
+    Dispatch ``(employee_id, action, pk_list)`` events for through-table writes
+    that bypass ``m2m_changed`` (e.g. bulk inserts/deletes on the through model).
+    """
+    events = list(events)
+    bump(*{employee_version(employee_id) for employee_id, _, _ in events})
+    changes.record(changes.EMPLOYEE, (employee_id for employee_id, _, _ in events))
+    if outbox.outbox_enabled():
+        outbox.write(events)
+        return
+    for employee_id, action, pk_list in events:
+        if batching.batching_enabled():
+            batching.record(employee_id, action, pk_list)
+        else:
+            process_m2m_signal.delay(employee_id, action, list(pk_list))
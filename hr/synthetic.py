@@ -0,0 +1,194 @@
+"""
+Synthetic HR datasets for load testing.
+
+``generate`` bulk-inserts departments, employees and memberships straight into
+their tables, without model signals, then rebuilds the membership index, logs
+the new rows for the change feed and bumps the departments cache version once.
+Department sizes are skewed: the k-th most popular department draws members
+in proportion to ``1 / k**skew``, so a few departments are very large and most
+are small. Popularity is shuffled over department ids, and a ``seed``
+reproduces a dataset exactly.
+"""
+
+import random
+import time
+from bisect import bisect
+from itertools import accumulate
+
+from django.db import connection, transaction
+
+from . import changes, membership
+from .cache import DEPARTMENTS_VERSION, bump
+from .models import Department, Employee, Membership, MembershipIndex, OutboxEvent
+
+# Rows per INSERT statement, and employees generated at a time
+BATCH_SIZE = 5000
+# Host parameters per statement: SQLite's limit since 3.32 (Django assumes
+# the older 999), well below PostgreSQL's 65535
+MAX_QUERY_PARAMS = 32766
+
+
+def _memberships(rng, department_ids, cum_weights, mean):
+    """
+    Pick 1 to ``2 * mean - 1`` distinct departments, popular ones more often.
+
+    Sampled by weight without replacement: each pick draws from the
+    departments not picked yet.
+    """
+    wanted = min(rng.randint(1, 2 * mean - 1), len(department_ids))
+    total = cum_weights[-1]
+    # (index, weight) of the picked departments, by index
+    picked = []
+    while len(picked) < wanted:
+        point = rng.random() * (total - sum(weight for _, weight in picked))
+        # Skip over the picked departments' stretches of the weight line
+        for index, weight in picked:
+            if point >= cum_weights[index] - weight:
+                point += weight
+        index = min(bisect(cum_weights, point), len(cum_weights) - 1)
+        if all(index != other for other, _ in picked):
+            weight = cum_weights[index] - (cum_weights[index - 1] if index else 0)
+            picked = sorted(picked + [(index, weight)])
+    return {department_ids[index] for index, _ in picked}
+
+
+def max_query_params():
+    """Return how many host parameters one statement may carry."""
+    if connection.vendor == "sqlite" and connection.Database.sqlite_version_info < (
+        3,
+        32,
+    ):
+        return connection.features.max_query_params
+    return MAX_QUERY_PARAMS
+
+
+def _insert(model, columns, rows, batch_size):
+    """
+    Insert ``rows`` (tuples of ``columns``) with multi-row ``INSERT``
+    statements, skipping the model instances ``bulk_create`` would build.
+        Statements hold at most ``batch_size`` rows and ``max_query_params()``
+        values.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    batch_size = max(1, min(batch_size, max_query_params() // len(columns)))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start : start + batch_size]
+            values = ", ".join([placeholders] * len(chunk))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values}",
+                [value for row in chunk for value in row],
+            )
+
+
+def generate(
+    employees,
+    departments,
+    memberships=2,
+    skew=1.1,
+    seed=0,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Insert ``departments`` departments and ``employees`` employees with
+    ``memberships`` departments each on average, in one transaction.
+        Names and emails carry the seed, so datasets with different seeds can
+        be loaded side by side. Returns the row counts, the largest
+        department and the elapsed time. Raises ``ValueError`` unless there
+        is at least one department and one membership per employee.
+    """
+    if departments < 1 or memberships < 1:
+        raise ValueError(
+            f"departments and memberships must be at least 1, "
+            f"got {departments} and {memberships}"
+        )
+    started = time.perf_counter()
+    # The employees of a batch are read back with ``email IN (...)``
+    batch_size = min(batch_size, max_query_params())
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / rank**skew for rank in range(1, departments + 1)))
+    inserted = 0
+    with transaction.atomic():
+        department_ids = [
+            department.pk
+            for department in Department.objects.bulk_create(
+                (Department(name=f"Synthetic {seed}-{n}") for n in range(departments)),
+                batch_size=batch_size,
+            )
+        ]
+        rng.shuffle(department_ids)
+        for start in range(0, employees, batch_size):
+            stop = min(start + batch_size, employees)
+            emails = [f"synthetic-{seed}-{n}@example.com" for n in range(start, stop)]
+            _insert(
+                Employee,
+                ("name", "email"),
+                [
+                    (f"Synthetic {seed}-{n}", email)
+                    for n, email in enumerate(emails, start)
+                ],
+                batch_size,
+            )
+            employee_ids = Employee.objects.filter(email__in=emails).values_list(
+                "pk", flat=True
+            )
+            rows = [
+                (employee_id, department_id)
+                for employee_id in employee_ids.order_by("pk")
+                for department_id in _memberships(
+                    rng, department_ids, cum_weights, memberships
+                )
+            ]
+            _insert(Membership, ("employee_id", "department_id"), rows, batch_size)
+            inserted += len(rows)
+        membership.rebuild()
+        changes.record_all(
+            changes.EMPLOYEE,
+            Employee.objects.filter(email__startswith=f"synthetic-{seed}-"),
+        )
+        changes.record_all(
+            changes.DEPARTMENT,
+            Department.objects.filter(name__startswith=f"Synthetic {seed}-"),
+        )
+    bump(DEPARTMENTS_VERSION)
+    largest = (
+        MembershipIndex.objects.filter(department_id__in=department_ids)
+        .order_by("-member_count")
+        .values_list("member_count", flat=True)
+        .first()
+    )
+    return {
+        "employees": employees,
+        "departments": departments,
+        "memberships": inserted,
+        "largest_department": largest or 0,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def clear():
+    """
+    Delete every HR row with one ``DELETE`` per table, without signals.
+        The deletions are logged for the change feed first. Cached payloads
+        of deleted employees expire with the cache timeout; their ids are
+        not reused. Returns the number of deleted employees.
+    """
+    count = Employee.objects.count()
+    with transaction.atomic(), connection.cursor() as cursor:
+        changes.record_all(changes.EMPLOYEE, Employee.objects.all())
+        changes.record_all(changes.DEPARTMENT, Department.objects.all())
+        for model in (OutboxEvent, MembershipIndex, Membership, Employee, Department):
+            table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(f"DELETE FROM {table}")
+    bump(DEPARTMENTS_VERSION)
+    return count
+
+
+def dataset():
+    """Return the current number of employees, departments and memberships."""
+    return {
+        "employees": Employee.objects.count(),
+        "departments": Department.objects.count(),
+        "memberships": Membership.objects.count(),
+    }
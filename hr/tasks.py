@@ -6,10 +6,35 @@ import logging
 
 from celery import shared_task
 
+from . import membership
+
 logger = logging.getLogger("hr.tasks")
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=5, acks_late=True)
+def handle_m2m_change(instance_id: int, action: str, pk_list: list[int]) -> None:
+    """
+    Apply a single Employee ↔ Department change event to the membership index.
+
+    :param instance_id: The Employee PK
+    :param action: one of 'post_add', 'post_remove', 'post_clear'
+    :param pk_list: list of Department PKs added/removed
+    """
+    logger.info(
+        "Processing signal task: [m2m][%s] Employee ID %s: Dept IDs %s",
+        action,
+        instance_id,
+        pk_list,
+    )
+    membership.apply_changes([(instance_id, action, pk_list)])
+
+
+@shared_task(
+    bind=True,
+    max_retries=3,
+    default_retry_delay=5,
+    acks_late=True,
+    serializer="compact",
+)
 def process_m2m_signal(self, instance_id: int, action: str, pk_list: list[int]) -> None:
     """
     Process a message sent from the m2m_changed signal.
@@ -19,13 +44,38 @@ def process_m2m_signal(self, instance_id: int, action: str, pk_list: list[int])
     :param pk_list: list of Department PKs added/removed
     """
     try:
-        logger.info(
-            "Processing signal task: [m2m][%s] Employee ID %s: Dept IDs %s",
-            action,
-            instance_id,
-            pk_list,
-        )
+        handle_m2m_change(instance_id, action, pk_list)
     except Exception as exc:
         logger.error("Failed to process signal task: %s", exc)
         # retry on failure
         raise self.retry(exc=exc) from exc
+
+
+@shared_task(
+    bind=True,
+    max_retries=3,
+    default_retry_delay=5,
+    acks_late=True,
+    serializer="compact",
+)
+def process_m2m_signal_batch(self, events: list[list]) -> None:
+    """
+    Process a coalesced batch of m2m_changed events in a single pass.
+
+    :param events: list of ``[instance_id, action, pk_list]`` triples, already
+        merged per Employee by ``hr.batching.M2MChangeBuffer``
+    """
+    try:
+        logger.info("Processing signal batch task: %s m2m event(s)", len(events))
+        for instance_id, action, pk_list in events:
+            logger.info(
+                "Processing signal task: [m2m][%s] Employee ID %s: Dept IDs %s",
+                action,
+                instance_id,
+                pk_list,
+            )
+        # One pass over the index for the whole batch
+        membership.apply_changes(events)
+    except Exception as exc:
+        logger.error("Failed to process signal batch task: %s", exc)
+        raise self.retry(exc=exc) from exc
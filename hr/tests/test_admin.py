@@ -7,11 +7,20 @@ Test suite for Department and Employee admin customizations.
 # pylint: disable=invalid-name
 
 from django.contrib.admin.sites import AdminSite
-from django.test import RequestFactory, TestCase
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
 from django.utils.html import escape
 
-from hr.admin import DepartmentAdmin, EmployeeAdmin, EmployeeInline
-from hr.models import Department, Employee
+from hr.admin import (
+    DepartmentAdmin,
+    DepartmentInline,
+    DepartmentListFilter,
+    EmployeeAdmin,
+    EmployeeCountFilter,
+    EmployeeInline,
+)
+from hr.models import Department, Employee, Membership, MembershipIndex, OutboxEvent
 
 
 class MockRequest:
@@ -54,13 +63,23 @@ class DepartmentAdminTests(AdminMixin, TestCase):
         self.assertEqual(self.admin.search_fields, ("name",))
 
     def test_list_filter(self):
-        """Ensure list_filter includes 'employees'."""
-        self.assertEqual(self.admin.list_filter, ("employees",))
+        """Ensure list_filter uses the headcount filter instead of every employee."""
+        self.assertEqual(self.admin.list_filter, (EmployeeCountFilter,))
 
     def test_inlines(self):
         """Ensure EmployeeInline is present in inlines."""
         self.assertIn(EmployeeInline, self.admin.inlines)
 
+    @override_settings(HR_ADMIN_INLINE_MAX_ROWS=1, HR_ADMIN_LARGE_TABLE_THRESHOLD=1)
+    def test_inline_is_capped_and_size_aware(self):
+        """Ensure the inline renders a capped number of rows with autocomplete."""
+        request = self.factory.get("/admin/hr/department/")
+        request.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        inline = EmployeeInline(Department, self.site)
+        formset = inline.get_formset(request, self.dep)(instance=self.dep)
+        self.assertEqual(len(formset.forms), 1)
+        self.assertEqual(inline.get_autocomplete_fields(request), ("employee",))
+
     def test_readonly_fields(self):
         """Ensure readonly_fields include employee_count and view_employees_link."""
         self.assertIn("employee_count", self.admin.readonly_fields)
@@ -71,6 +90,43 @@ class DepartmentAdminTests(AdminMixin, TestCase):
         count = self.admin.employee_count(self.dep)
         self.assertEqual(count, 2)
 
+    def test_employee_count_is_annotated(self):
+        """Ensure the changelist queryset carries counts without extra queries."""
+        Department.objects.create(name="Empty")
+        request = self.factory.get("/admin/hr/department/")
+        qs = self.admin.get_queryset(request).order_by("name")
+        with self.assertNumQueries(1):
+            counts = [self.admin.employee_count(dep) for dep in qs]
+            links = [self.admin.view_employees_link(dep) for dep in qs]
+        self.assertEqual(counts, [0, 2])
+        self.assertIn("View 2 Employees", links[1])
+
+    def test_employee_count_reads_the_index(self):
+        """Ensure indexed departments are counted from their index row."""
+        MembershipIndex.objects.create(
+            department=self.dep, member_ids=[self.emp1.pk], member_count=1
+        )
+        request = self.factory.get("/admin/hr/department/")
+        dep = self.admin.get_queryset(request).get(pk=self.dep.pk)
+        self.assertEqual(self.admin.employee_count(dep), 1)
+        self.assertEqual(self.admin.employee_count(self.dep), 1)
+
+    def test_employee_count_is_sortable(self):
+        """Ensure the employee_count column sorts on the annotation."""
+        self.assertEqual(self.admin.employee_count.admin_order_field, "_employee_count")
+
+    def test_headcount_filter(self):
+        """Ensure the headcount filter narrows departments by bucket."""
+        Department.objects.create(name="Empty")
+        request = self.factory.get("/admin/hr/department/")
+        qs = self.admin.get_queryset(request)
+        for value, expected in (("0", ["Empty"]), ("1-10", ["Engineering"])):
+            flt = EmployeeCountFilter(
+                request, {"headcount": [value]}, Department, self.admin
+            )
+            names = [dep.name for dep in flt.queryset(request, qs)]
+            self.assertEqual(names, expected)
+
     def test_view_employees_link(self):
         """Ensure view_employees_link returns correct HTML link."""
         html = self.admin.view_employees_link(self.dep)
@@ -100,12 +156,76 @@ class EmployeeAdminTests(AdminMixin, TestCase):
         self.assertEqual(self.admin.search_fields, ("name", "email"))
 
     def test_list_filter(self):
-        """Ensure list_filter includes departments."""
-        self.assertEqual(self.admin.list_filter, ("departments",))
+        """Ensure list_filter uses the capped department filter."""
+        self.assertEqual(self.admin.list_filter, (DepartmentListFilter,))
+
+    def test_department_filter_caps_choices(self):
+        """Ensure the department filter lists a capped set plus the selection."""
+        extra = Department.objects.create(name="ZZZ")
+        request = self.factory.get("/admin/hr/employee/")
+        original = DepartmentListFilter.max_choices
+        DepartmentListFilter.max_choices = 1
+        try:
+            flt = DepartmentListFilter(
+                request,
+                {"departments__id__exact": [str(extra.pk)]},
+                Employee,
+                self.admin,
+            )
+            lookups = flt.lookups(request, self.admin)
+        finally:
+            DepartmentListFilter.max_choices = original
+        self.assertEqual(lookups, [(str(self.dep.pk), "HR"), (str(extra.pk), "ZZZ")])
+        self.assertEqual(list(flt.queryset(request, Employee.objects.all())), [])
 
-    def test_filter_horizontal(self):
-        """Ensure filter_horizontal includes departments."""
-        self.assertEqual(self.admin.filter_horizontal, ("departments",))
+    def test_inlines(self):
+        """Ensure memberships are edited through DepartmentInline."""
+        self.assertEqual(self.admin.inlines, [DepartmentInline])
+        self.assertEqual(self.admin.filter_horizontal, ())
+
+    def test_widgets_switch_to_autocomplete_for_large_tables(self):
+        """Ensure departments use autocomplete once past the size threshold."""
+        request = self.factory.get("/admin/hr/employee/add/")
+        inline = DepartmentInline(Employee, self.site)
+        field = Membership._meta.get_field("department")
+        self.assertEqual(inline.get_autocomplete_fields(request), ())
+        with override_settings(HR_ADMIN_LARGE_TABLE_THRESHOLD=0):
+            self.assertEqual(inline.get_autocomplete_fields(request), ("department",))
+            form_field = inline.formfield_for_foreignkey(field, request)
+        self.assertIsInstance(form_field.widget, AutocompleteSelect)
+
+    @override_settings(HR_M2M_SIGNAL_OUTBOX=True)
+    def test_inline_changes_write_events(self):
+        """Ensure memberships saved through the inline publish m2m events."""
+        added = Department.objects.create(name="Sales")
+        row = Membership.objects.get(employee=self.emp)
+        user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(user)
+        url = f"/admin/hr/employee/{self.emp.pk}/change/"
+        self.assertContains(self.client.get(url), "Joined at")
+        OutboxEvent.objects.all().delete()
+        prefix = "membership_set"
+        response = self.client.post(
+            url,
+            {
+                "name": self.emp.name,
+                "email": self.emp.email,
+                f"{prefix}-TOTAL_FORMS": "2",
+                f"{prefix}-INITIAL_FORMS": "1",
+                f"{prefix}-0-id": str(row.pk),
+                f"{prefix}-0-employee": str(self.emp.pk),
+                f"{prefix}-0-department": str(self.dep.pk),
+                f"{prefix}-0-DELETE": "on",
+                f"{prefix}-1-employee": str(self.emp.pk),
+                f"{prefix}-1-department": str(added.pk),
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(self.emp.departments.all()), [added])
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list("action", "pk_list")),
+            [("post_add", [added.pk]), ("post_remove", [self.dep.pk])],
+        )
 
     def test_department_list(self):
         """Ensure department_list returns comma-separated department names."""
@@ -0,0 +1,247 @@
+"""
+Test suite for the async (ASGI) variants of the HR API read paths.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import base64
+import json
+import subprocess
+import sys
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.middleware.csrf import CSRF_SECRET_LENGTH
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from rest_framework import authentication, permissions, status
+
+from hr.async_views import AsyncAPIView
+from hr.models import Department, Employee
+from hr.views import EmployeeViewSet
+
+
+class AsyncViewsMatchSyncTests(TestCase):
+    """Every async endpoint returns the bytes its sync viewset returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = Department.objects.create(name="HR")
+        cls.finance = Department.objects.create(name="Finance")
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"Emp{i}", email=f"emp{i}@example.com") for i in range(7)
+        )
+        cls.hr.employees.add(*cls.employees[:5])
+        cls.finance.employees.add(*cls.employees[3:])
+
+    async def assert_same(self, name, query="", **kwargs):
+        sync = await self.async_client.get(reverse(name, kwargs=kwargs) + query)
+        asynchronous = await self.async_client.get(
+            reverse(f"async-{name}", kwargs=kwargs) + query
+        )
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(asynchronous["Content-Type"], "application/json")
+        # Pagination links differ only by the /async/ path prefix
+        self.assertEqual(
+            asynchronous.content.replace(b"/api/async/", b"/api/"), sync.content
+        )
+        return asynchronous
+
+    async def test_lists(self):
+        await self.assert_same("employee-list")
+        await self.assert_same("employee-list", "?page_size=2")
+        await self.assert_same("employee-list", f"?departments__id__exact={self.hr.pk}")
+        await self.assert_same("employee-list", "?search=emp3")
+        await self.assert_same("department-list")
+
+    async def test_details_and_actions(self):
+        pk = self.employees[4].pk
+        await self.assert_same("employee-detail", pk=pk)
+        await self.assert_same("employee-departments", pk=pk)
+        await self.assert_same("department-detail", pk=self.hr.pk)
+        await self.assert_same("department-employees", "?page_size=3", pk=self.hr.pk)
+
+    async def test_missing_rows(self):
+        response = await self.assert_same("employee-detail", pk=999)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        await self.assert_same("department-employees", pk=999)
+
+    async def test_cursor_walk(self):
+        ids = []
+        url = reverse("async-employee-list") + "?page_size=3"
+        while url:
+            response = await self.async_client.get(url)
+            data = json.loads(response.content)
+            ids.extend(row["id"] for row in data["results"])
+            url = data["next"]
+        self.assertEqual(ids, [employee.pk for employee in self.employees])
+        # And back again through the previous links
+        response = await self.async_client.get(data["previous"])
+        self.assertEqual(len(json.loads(response.content)["results"]), 3)
+
+    async def test_stream(self):
+        sync = await self.async_client.get(reverse("employee-list") + "?stream=true")
+        response = await self.async_client.get(
+            reverse("async-employee-list") + "?stream=true"
+        )
+        self.assertTrue(response.streaming)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # The sync viewset's stream reads the database as it is consumed
+        expected = await sync_to_async(b"".join)(sync.streaming_content)
+        self.assertEqual(b"".join(chunks), expected)
+        self.assertEqual(len(json.loads(b"".join(chunks))), 7)
+
+    async def test_cached_payloads_and_conditional_requests(self):
+        url = reverse("async-department-list")
+        first = await self.async_client.get(url)
+        response = await self.async_client.get(
+            url, headers={"if-none-match": first["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        await Department.objects.acreate(name="Legal")
+        # The save bumped the departments version
+        response = await self.async_client.get(
+            url, headers={"if-none-match": first["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)["results"]), 3)
+
+
+class AsyncCreateTests(TestCase):
+    """POST creates employees like the sync viewset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+
+    async def test_create(self):
+        payload = {
+            "name": "Bob",
+            "email": "bob@example.com",
+            "department_ids": [self.dep.pk],
+        }
+        response = await self.async_client.post(
+            reverse("async-employee-list"), payload, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = json.loads(response.content)
+        self.assertEqual(data["departments"], [{"id": self.dep.pk, "name": "HR"}])
+        bob = await Employee.objects.aget(email="bob@example.com")
+        self.assertEqual([d.pk async for d in bob.departments.all()], [self.dep.pk])
+
+    async def test_create_needs_a_csrf_token(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        url = reverse("async-employee-list")
+        payload = {"name": "Cat", "email": "cat@example.com", "department_ids": []}
+        response = await client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        client.cookies["csrftoken"] = token = get_random_string(CSRF_SECRET_LENGTH)
+        response = await client.post(
+            url,
+            payload,
+            content_type="application/json",
+            headers={"x-csrftoken": token},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def test_validation_errors_match(self):
+        payload = {"name": "NoDeps", "email": "not-an-email"}
+        sync = await self.async_client.post(
+            reverse("employee-list"), payload, content_type="application/json"
+        )
+        response = await self.async_client.post(
+            reverse("async-employee-list"), payload, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content, sync.content)
+
+
+@mock.patch.object(
+    AsyncAPIView, "permission_classes", [permissions.IsAuthenticatedOrReadOnly]
+)
+@mock.patch.object(
+    EmployeeViewSet, "permission_classes", [permissions.IsAuthenticatedOrReadOnly]
+)
+class AsyncPermissionTests(TestCase):
+    """The async views apply the viewsets' authentication and permissions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ann", password="secret")
+
+    async def post(self, name, **kwargs):
+        payload = {"name": "Dan", "email": "dan@example.com", "department_ids": []}
+        return await self.async_client.post(
+            reverse(name), payload, content_type="application/json", **kwargs
+        )
+
+    async def test_anonymous_writes_are_refused_like_the_viewset(self):
+        sync = await self.post("employee-list")
+        response = await self.post("async-employee-list")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.content, sync.content)
+        response = await self.async_client.get(reverse("async-employee-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_bad_credentials(self):
+        credentials = base64.b64encode(b"ann:wrong").decode()
+        headers = {"authorization": f"Basic {credentials}"}
+        sync = await self.post("employee-list", headers=headers)
+        response = await self.post("async-employee-list", headers=headers)
+        # Session authentication comes first and sends no WWW-Authenticate
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.content, sync.content)
+        basic = [authentication.BasicAuthentication]
+        with (
+            mock.patch.object(AsyncAPIView, "authentication_classes", basic),
+            mock.patch.object(EmployeeViewSet, "authentication_classes", basic),
+        ):
+            sync = await self.post("employee-list", headers=headers)
+            response = await self.post("async-employee-list", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], sync["WWW-Authenticate"])
+        self.assertEqual(response.content, sync.content)
+
+    async def test_authenticated_writes(self):
+        credentials = base64.b64encode(b"ann:secret").decode()
+        response = await self.post(
+            "async-employee-list", headers={"authorization": f"Basic {credentials}"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def test_object_permissions(self):
+        employee = await Employee.objects.acreate(name="Eve", email="eve@example.com")
+        url = reverse("async-employee-detail", kwargs={"pk": employee.pk})
+        with mock.patch.object(
+            permissions.IsAuthenticatedOrReadOnly,
+            "has_object_permission",
+            return_value=False,
+        ):
+            response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ApiLoadTestTests(SimpleTestCase):
+    """``bench_api`` serves the same read mix through every handler."""
+
+    def test_load_test_reports_every_run(self):
+        command = [sys.executable, "manage.py", "bench_api", "--local"]
+        command += ["--requests", "40", "--concurrency", "4", "--employees", "30"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        self.assertEqual(set(report), {"wsgi_sync", "asgi_sync", "asgi_async"})
+        for run in report.values():
+            self.assertEqual(run["requests"], 40)
+            self.assertEqual(run["errors"], 0)
+            self.assertGreater(run["requests_per_sec"], 0)
+            self.assertGreaterEqual(run["p99_ms"], run["p50_ms"])
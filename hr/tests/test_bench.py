@@ -0,0 +1,148 @@
+"""
+Test suite for the HR endpoint and enqueue load tests and the change-feed and
+search benchmarks.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from hr.bench import endpoints, enqueue
+from pristine import bench
+from pristine.celery import app
+
+
+class TrackedMetricsTests(SimpleTestCase):
+    """The endpoint load test compares its own metrics with the baseline."""
+
+    def test_tracked_metrics(self):
+        baseline = {
+            "employee-list": {"requests_per_sec": 100.0, "queries_per_request": 2}
+        }
+        current = {
+            "employee-list": {"requests_per_sec": 90.0, "queries_per_request": 3}
+        }
+        found = bench.regressions(current, baseline, endpoints.ENDPOINT_METRICS)
+        self.assertEqual(found, ["employee-list.queries_per_request: 2 -> 3 (+50%)"])
+
+
+class BrokerPoolTests(SimpleTestCase):
+    """The enqueue load test switches the app's pool size and restores it."""
+
+    def test_pool_is_rebuilt_and_restored(self):
+        limit = app.conf.broker_pool_limit
+        with enqueue.broker_pool(0):
+            self.assertEqual(app.pool.limit, 0)
+            self.assertEqual(app.producer_pool.limit, 0)
+        self.assertEqual(app.pool.limit, limit)
+        self.assertEqual(app.producer_pool.limit, limit)
+
+    def test_kept_connections_are_dropped(self):
+        with enqueue.broker_pool(2):
+            kept = app.pool.acquire()
+            kept.release()
+            # The pool hands back the connection it keeps
+            with app.pool.acquire() as connection:
+                self.assertIs(connection, kept)
+        with app.pool.acquire() as connection:
+            self.assertIsNot(connection, kept)
+
+    def test_publish_overrides_are_removed(self):
+        with enqueue.publishing_disabled():
+            with enqueue.publish_timings() as publishes:
+                self.assertIsNone(app.send_task("demo.add"))
+            self.assertEqual(len(publishes), 1)
+            self.assertIsNone(app.send_task("demo.add"))
+        self.assertNotIn("send_task", vars(app))
+
+
+class EndpointLoadTests(SimpleTestCase):
+    """``bench_endpoints`` covers every GET route in hr/urls.py."""
+
+    def test_routes(self):
+        routes = endpoints.hr_endpoints()
+        self.assertEqual(routes["employee-list"], [])
+        self.assertEqual(routes["department-employees"], ["pk"])
+        self.assertEqual(routes["async-employee-detail"], ["pk"])
+        # POST-only actions are not load-tested
+        self.assertNotIn("employee-bulk", routes)
+
+    def run_command(self, *args):
+        command = [sys.executable, "manage.py", "bench_endpoints", "--local"]
+        command += ["--scratch", "--employees", "40", "--departments", "4"]
+        return subprocess.run(
+            command + ["--requests", "8", "--concurrency", "2", *args],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        )
+
+    def test_report_and_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = str(Path(tmp) / "baseline.json")
+            self.run_command("--baseline", baseline, "--save-baseline")
+            report = json.loads(Path(baseline).read_text())
+            result = self.run_command("--baseline", baseline, "--tolerance", "1000")
+        self.assertEqual(report["dataset"]["employees"], 40)
+        self.assertEqual(report["dataset"]["departments"], 4)
+        self.assertEqual(set(report["endpoints"]), set(endpoints.hr_endpoints()))
+        for endpoint in report["endpoints"].values():
+            self.assertEqual(endpoint["requests"], 8)
+            self.assertEqual(endpoint["errors"], 0)
+            self.assertGreaterEqual(endpoint["p99_ms"], endpoint["p50_ms"])
+        self.assertEqual(report["endpoints"]["employee-detail"]["max_queries"], 2)
+        self.assertEqual(json.loads(result.stdout)["dataset"], report["dataset"])
+        self.assertIn("No regressions against baseline.", result.stderr)
+
+
+class ChangeFeedBenchTests(SimpleTestCase):
+    """``bench_changes`` syncs every churn level through the feed."""
+
+    def test_report(self):
+        command = [sys.executable, "manage.py", "bench_changes", "--local"]
+        command += ["--employees", "60", "--departments", "4"]
+        command += ["--churn", "5", "--churn", "20"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        self.assertEqual(report["dataset"]["employees"], 60)
+        for churn in (5, 20):
+            run = report[f"churn_{churn}"]
+            self.assertEqual(run["changed"], churn)
+            self.assertEqual(run["requests"], 1)
+            self.assertLess(run["bytes"], report["full_download"]["bytes"])
+
+
+class SearchBenchTests(SimpleTestCase):
+    """``bench_search`` times both lookups at every size."""
+
+    def test_report(self):
+        command = [sys.executable, "manage.py", "bench_search"]
+        command += ["--size", "50", "--size", "200", "--repeat", "3"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        self.assertEqual(list(report), ["50", "200"])
+        self.assertGreater(report["50"]["email_ms"], 0)
+        self.assertIn("name_vs_smallest", report["200"])
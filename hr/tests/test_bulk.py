@@ -0,0 +1,125 @@
+"""
+Test suite for the bulk employee upsert endpoint.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from hr.models import Department, Employee
+from hr.tasks import process_m2m_signal_batch
+
+
+class EmployeeBulkUpsertTests(APITestCase):
+    """POST /api/employees/bulk/ creates, updates and re-links employees."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep1 = Department.objects.create(name="HR")
+        cls.dep2 = Department.objects.create(name="Finance")
+        cls.alice = Employee.objects.create(name="Alice", email="alice@example.com")
+        # Written through the model so no m2m buffer is left open for the class
+        Employee.departments.through.objects.create(
+            employee=cls.alice, department=cls.dep1
+        )
+        cls.url = reverse("employee-bulk")
+
+    def test_creates_and_updates_by_email(self):
+        payload = [
+            {
+                "name": "Alice B",
+                "email": "alice@example.com",
+                "department_ids": [self.dep2.pk],
+            },
+            {
+                "name": "Bob",
+                "email": "bob@example.com",
+                "department_ids": [self.dep1.pk, self.dep2.pk],
+            },
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "created": 1,
+                "updated": 1,
+                "memberships_added": 3,
+                "memberships_removed": 1,
+            },
+        )
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.name, "Alice B")
+        self.assertEqual(list(self.alice.departments.all()), [self.dep2])
+        bob = Employee.objects.get(email="bob@example.com")
+        self.assertCountEqual(bob.departments.all(), [self.dep1, self.dep2])
+
+    @override_settings(HR_M2M_SIGNAL_OUTBOX=True)
+    def test_query_count_is_independent_of_row_count(self):
+        def payload(count):
+            return [
+                {
+                    "name": f"E{i}",
+                    "email": f"e{i}@example.com",
+                    "department_ids": [self.dep1.pk],
+                }
+                for i in range(count)
+            ]
+
+        self.client.post(self.url, payload(5), format="json")
+        # dept lookup, savepoint, 2x email lookup, upsert, change log insert,
+        # memberships, insert, change log insert, outbox insert, release
+        with self.assertNumQueries(11):
+            self.client.post(self.url, payload(10), format="json")
+        with self.assertNumQueries(11):
+            self.client.post(self.url, payload(200), format="json")
+        self.assertEqual(Employee.objects.count(), 201)
+
+    @override_settings(HR_M2M_SIGNAL_OUTBOX=False)
+    def test_membership_changes_are_published_in_batches(self):
+        payload = [
+            {
+                "name": "Alice",
+                "email": "alice@example.com",
+                "department_ids": [self.dep2.pk],
+            }
+        ]
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, payload, format="json")
+        delay.assert_called_once_with(
+            [
+                [self.alice.pk, "post_add", [self.dep2.pk]],
+                [self.alice.pk, "post_remove", [self.dep1.pk]],
+            ]
+        )
+
+    def test_unknown_department_is_rejected(self):
+        payload = [
+            {
+                "name": "Bob",
+                "email": "bob@example.com",
+                "department_ids": [self.dep1.pk],
+            },
+            {"name": "Carl", "email": "carl@example.com", "department_ids": [999]},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("department_ids", response.data[1])
+        self.assertFalse(Employee.objects.filter(email="bob@example.com").exists())
+
+    def test_duplicate_and_invalid_emails_are_rejected(self):
+        payload = [
+            {"name": "Bob", "email": "bob@example.com", "department_ids": []},
+            {"name": "Bob2", "email": "bob@example.com", "department_ids": []},
+            {"name": "X", "email": "invalid", "department_ids": []},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", response.data[2])
@@ -0,0 +1,95 @@
+"""
+Test suite for the versioned API response cache and its signal-driven invalidation.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from hr.models import Department, Employee
+
+
+class DepartmentCacheTests(APITestCase):
+    """Department list/detail payloads are cached and invalidated on save."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+        cls.list_url = reverse("department-list")
+        cls.detail_url = reverse("department-detail", args=[cls.dep.pk])
+
+    def test_second_request_skips_database(self):
+        first = self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertIn("Last-Modified", second)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_returns_not_modified(self):
+        last_modified = self.client.get(self.list_url)["Last-Modified"]
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_invalidates_list_and_detail(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.client.get(self.list_url)
+        self.dep.name = "People"
+        self.dep.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "People")
+        names = [d["name"] for d in self.client.get(self.list_url).data["results"]]
+        self.assertEqual(names, ["People"])
+
+    def test_missing_department_is_not_cached(self):
+        url = reverse("department-detail", args=[999])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        Department.objects.create(pk=999, name="Late")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+
+class EmployeeDepartmentsCacheTests(APITestCase):
+    """The employee departments action is invalidated by m2m changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep1 = Department.objects.create(name="HR")
+        cls.dep2 = Department.objects.create(name="Finance")
+        cls.employee = Employee.objects.create(name="Alice", email="alice@example.com")
+        cls.employee.departments.add(cls.dep1)
+        cls.url = reverse("employee-departments", args=[cls.employee.pk])
+
+    def names(self):
+        return {d["name"] for d in self.client.get(self.url).data}
+
+    def test_second_request_skips_database(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_forward_add_invalidates(self):
+        self.assertEqual(self.names(), {"HR"})
+        self.employee.departments.add(self.dep2)
+        self.assertEqual(self.names(), {"HR", "Finance"})
+
+    def test_reverse_changes_invalidate(self):
+        self.assertEqual(self.names(), {"HR"})
+        self.dep2.employees.add(self.employee)
+        self.assertEqual(self.names(), {"HR", "Finance"})
+        self.dep1.employees.clear()
+        self.assertEqual(self.names(), {"Finance"})
+
+    def test_department_rename_invalidates(self):
+        self.assertEqual(self.names(), {"HR"})
+        self.dep1.name = "People"
+        self.dep1.save()
+        self.assertEqual(self.names(), {"People"})
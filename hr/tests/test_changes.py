@@ -0,0 +1,170 @@
+"""
+Test suite for the employee/department change log and the /api/changes/ feed.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from hr import changes
+from hr.models import Change, Department, Employee
+
+
+class ChangeFeedTests(APITestCase):
+    """Saves, deletes and m2m changes reach the feed, compacted per object."""
+
+    url = reverse("change-feed")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = Department.objects.create(name="Sales")
+        cls.ops = Department.objects.create(name="Ops")
+        cls.alice = Employee.objects.create(name="Alice", email="alice@example.com")
+        cls.bob = Employee.objects.create(name="Bob", email="bob@example.com")
+        cls.alice.departments.add(cls.sales)
+
+    def setUp(self):
+        self.cursor = changes.head()
+
+    def sync(self, **params):
+        response = self.client.get(self.url, {"since": self.cursor, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_changes_are_compacted_per_object(self):
+        self.alice.name = "Alice B"
+        self.alice.save()
+        self.alice.departments.add(self.ops)
+        self.sales.employees.remove(self.alice)
+        self.ops.name = "Operations"
+        self.ops.save()
+        bob_id = self.bob.pk
+        self.bob.delete()
+        Department.objects.create(name="Legal").delete()
+        data = self.sync()
+        (alice,) = data["employees"]
+        self.assertEqual(alice["name"], "Alice B")
+        self.assertEqual(
+            alice["departments"], [{"id": self.ops.pk, "name": "Operations"}]
+        )
+        self.assertEqual(data["deleted_employees"], [bob_id])
+        self.assertEqual(
+            data["departments"], [{"id": self.ops.pk, "name": "Operations"}]
+        )
+        self.assertEqual(len(data["deleted_departments"]), 1)
+        self.assertEqual(data["cursor"], changes.head())
+        self.assertFalse(data["more"])
+        # Caught up
+        self.cursor = data["cursor"]
+        self.assertEqual(self.sync()["employees"], [])
+
+    def test_employees_match_the_list_endpoint(self):
+        self.alice.save()
+        listed = self.client.get(reverse("employee-list")).json()["results"]
+        self.assertEqual(self.sync()["employees"], [listed[0]])
+
+    def test_bulk_upsert_is_logged(self):
+        rows = [
+            {"name": "Alice C", "email": "alice@example.com", "department_ids": []},
+            {"name": "Carol", "email": "carol@example.com", "department_ids": []},
+        ]
+        response = self.client.post(reverse("employee-bulk"), rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = self.sync()
+        self.assertEqual(
+            [(row["name"], row["departments"]) for row in data["employees"]],
+            [("Alice C", []), ("Carol", [])],
+        )
+
+    def test_batches(self):
+        employees = Employee.objects.bulk_create(
+            Employee(name=f"E{n}", email=f"e{n}@example.com") for n in range(5)
+        )
+        changes.record(changes.EMPLOYEE, [e.pk for e in employees])
+        seen = []
+        while True:
+            data = self.sync(limit=2)
+            seen += [row["name"] for row in data["employees"]]
+            self.cursor = data["cursor"]
+            if not data["more"]:
+                break
+        self.assertEqual(seen, [f"E{n}" for n in range(5)])
+
+    def test_queries_do_not_grow_with_churn(self):
+        for count in (3, 60):
+            employees = Employee.objects.bulk_create(
+                Employee(name=f"E{count}-{n}", email=f"e{count}-{n}@example.com")
+                for n in range(count)
+            )
+            changes.record(changes.EMPLOYEE, [e.pk for e in employees])
+            # positions (check, savepoint, oldest, top, update, release), log
+            # entries, employees, their departments
+            with self.assertNumQueries(9):
+                data = self.sync()
+            self.assertEqual(len(data["employees"]), count)
+            self.cursor = data["cursor"]
+
+    def test_head(self):
+        self.bob.save()
+        data = self.sync(since=0, limit=0)
+        self.assertEqual(data["cursor"], changes.head())
+        self.assertEqual(data["employees"], [])
+        self.assertFalse(data["more"])
+
+    def test_invalid_parameters(self):
+        for params in ({"since": "abc"}, {"limit": "-1"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.json())
+
+    def test_late_commits_are_not_skipped(self):
+        self.bob.save()
+        late = Change.objects.order_by("pk").last().pk
+        # A long transaction took a smaller id but commits after this one
+        Change.objects.filter(pk=late).delete()
+        self.alice.save()
+        data = self.sync()
+        self.assertEqual([row["name"] for row in data["employees"]], ["Alice"])
+        self.cursor = data["cursor"]
+        Change.objects.create(pk=late, kind=changes.EMPLOYEE, object_id=self.bob.pk)
+        data = self.sync()
+        self.assertEqual([row["name"] for row in data["employees"]], ["Bob"])
+        self.assertGreater(data["cursor"], self.cursor)
+
+    @override_settings(HR_CHANGE_FEED=False)
+    def test_disabled(self):
+        self.bob.save()
+        self.assertEqual(changes.head(), self.cursor)
+
+
+class CompactTests(APITestCase):
+    """Compaction keeps the newest entry per object."""
+
+    def test_compact(self):
+        employee = Employee.objects.create(name="Dan", email="dan@example.com")
+        department = Department.objects.create(name="Legal")
+        employee.departments.add(department)
+        employee.save()
+        before = changes.feed()
+        self.assertEqual(changes.compact(), 2)
+        after = changes.feed()
+        self.assertEqual(Change.objects.count(), 2)
+        self.assertEqual(after, before)
+        self.assertEqual(changes.compact(), 0)
+
+    def test_command(self):
+        employee = Employee.objects.create(name="Eve", email="eve@example.com")
+        employee.save()
+        out = StringIO()
+        call_command("compact_changes", stdout=out)
+        self.assertEqual(
+            json.loads(out.getvalue()),
+            {"compacted": 1, "entries": 1, "head": changes.head()},
+        )
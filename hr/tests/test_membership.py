@@ -0,0 +1,266 @@
+"""
+Test suite for the denormalized department membership index.
+"""
+
+# pylint: disable=missing-function-docstring,protected-access
+
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from hr import membership
+from hr.models import Department, Employee, MembershipIndex
+from hr.tasks import process_m2m_signal, process_m2m_signal_batch
+from pristine.celery import app
+
+
+class MembershipMixin:
+    """Three departments; employees 0-5 in A, 3-8 in B, none in C."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b, cls.c = Department.objects.bulk_create(
+            Department(name=name) for name in ("A", "B", "C")
+        )
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"Emp{i}", email=f"emp{i}@example.com") for i in range(10)
+        )
+        cls.ids = [employee.pk for employee in cls.employees]
+        through = Employee.departments.through
+        through.objects.bulk_create(
+            [through(employee_id=pk, department_id=cls.a.pk) for pk in cls.ids[:6]]
+            + [through(employee_id=pk, department_id=cls.b.pk) for pk in cls.ids[3:9]]
+        )
+
+    def indexed(self, department):
+        return MembershipIndex.objects.get(pk=department.pk).member_ids
+
+
+class ApplyChangesTests(MembershipMixin, TestCase):
+    """Events bring the touched rows in line with the through table."""
+
+    def setUp(self):
+        membership.rebuild()
+
+    def test_add_and_remove(self):
+        employee = self.employees[9]
+        employee.departments.add(self.a)
+        membership.apply_changes([(employee.pk, "post_add", [self.a.pk])])
+        self.assertEqual(self.indexed(self.a), self.ids[:6] + [employee.pk])
+        employee.departments.remove(self.a)
+        membership.apply_changes([(employee.pk, "post_remove", [self.a.pk])])
+        self.assertEqual(self.indexed(self.a), self.ids[:6])
+        self.assertEqual(membership.verify(), {})
+
+    def test_stale_and_repeated_events_are_harmless(self):
+        employee = self.employees[0]
+        employee.departments.remove(self.a)
+        # The add that preceded the remove arrives last, twice
+        membership.apply_changes([(employee.pk, "post_remove", [self.a.pk])])
+        membership.apply_changes([(employee.pk, "post_add", [self.a.pk])] * 2)
+        self.assertEqual(self.indexed(self.a), self.ids[1:6])
+        self.assertEqual(MembershipIndex.objects.get(pk=self.a.pk).member_count, 5)
+
+    def test_clear_and_delete(self):
+        first, fourth = self.employees[0], self.employees[3]
+        fourth.departments.clear()
+        first.delete()
+        membership.apply_changes(
+            [
+                (fourth.pk, "post_clear", [self.a.pk, self.b.pk]),
+                (self.ids[0], "post_clear", [self.a.pk]),
+            ]
+        )
+        self.assertEqual(
+            self.indexed(self.a), [self.ids[1], self.ids[2], *self.ids[4:6]]
+        )
+        self.assertEqual(self.indexed(self.b), self.ids[4:9])
+        self.assertEqual(membership.verify(), {})
+
+    def test_clear_touches_only_the_listed_departments(self):
+        self.employees[9].departments.add(self.c)
+        membership.apply_changes([(self.ids[9], "post_add", [self.c.pk])])
+        self.employees[0].departments.clear()
+        with CaptureQueriesContext(connection) as queries:
+            membership.apply_changes([(self.ids[0], "post_clear", [self.a.pk])])
+        self.assertEqual(self.indexed(self.a), self.ids[1:6])
+        locked = next(q["sql"] for q in queries if "hr_membershipindex" in q["sql"])
+        self.assertIn(f"IN ({self.a.pk})", locked)
+        self.assertNotIn("member_count", locked.split("WHERE")[-1])
+
+    def test_memberships_are_read_under_the_lock(self):
+        employee = self.employees[9]
+        employee.departments.add(self.a)
+        with CaptureQueriesContext(connection) as queries:
+            membership.apply_changes([(employee.pk, "post_add", [self.a.pk])])
+        sql = [query["sql"] for query in queries]
+        locked = next(n for n, q in enumerate(sql) if "hr_membershipindex" in q)
+        read = next(n for n, q in enumerate(sql) if "hr_employee_departments" in q)
+        self.assertLess(locked, read)
+
+    @override_settings(HR_M2M_SIGNAL_OUTBOX=False)
+    def test_signals_list_the_cleared_departments(self):
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employees[4].departments.clear()
+            self.employees[5].delete()
+        self.assertEqual(self.indexed(self.a), self.ids[:4])
+        self.assertEqual(self.indexed(self.b), [self.ids[3], *self.ids[6:9]])
+        self.assertEqual(membership.verify(), {})
+
+    def test_first_member_indexes_the_department(self):
+        self.assertFalse(MembershipIndex.objects.filter(pk=self.c.pk).exists())
+        self.employees[0].departments.add(self.c)
+        membership.apply_changes([(self.ids[0], "post_add", [self.c.pk])])
+        self.assertEqual(self.indexed(self.c), [self.ids[0]])
+
+    def test_indexing_rereads_an_existing_row(self):
+        # Another task created the row first, from an older through table
+        MembershipIndex.objects.create(pk=self.c.pk, member_ids=[], member_count=0)
+        self.employees[0].departments.add(self.c)
+        with transaction.atomic():
+            membership._index_department(self.c.pk)
+        self.assertEqual(self.indexed(self.c), [self.ids[0]])
+
+    def test_tasks_update_the_index(self):
+        employee = self.employees[9]
+        employee.departments.add(self.a, self.c)
+        process_m2m_signal.apply((employee.pk, "post_add", [self.a.pk]))
+        process_m2m_signal_batch.apply(([[employee.pk, "post_add", [self.c.pk]]],))
+        self.assertEqual(self.indexed(self.a)[-1], employee.pk)
+        self.assertEqual(self.indexed(self.c), [employee.pk])
+
+
+class ReadTests(MembershipMixin, TestCase):
+    """Reads come from the index, or the through table for unindexed rows."""
+
+    def test_reads_without_the_through_table(self):
+        membership.rebuild()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(membership.members(self.a.pk), self.ids[:6])
+            self.assertEqual(membership.member_count(self.b.pk), 6)
+            self.assertTrue(membership.is_member(self.b.pk, self.ids[8]))
+            self.assertFalse(membership.is_member(self.a.pk, self.ids[8]))
+            common = membership.common_members([self.a.pk, self.b.pk])
+        self.assertEqual(common, self.ids[3:6])
+        for query in queries:
+            self.assertNotIn("hr_employee_departments", query["sql"])
+
+    def test_member_count_expression(self):
+        membership.rebuild()
+        MembershipIndex.objects.filter(pk=self.b.pk).delete()
+        counts = Department.objects.annotate(
+            count=membership.member_count_expression()
+        ).order_by("name")
+        self.assertEqual([dep.count for dep in counts], [6, 6, 0])
+
+    def test_unindexed_departments_fall_back(self):
+        self.assertEqual(membership.members(self.a.pk), self.ids[:6])
+        self.assertEqual(membership.member_count(self.b.pk), 6)
+        self.assertEqual(membership.member_count(self.c.pk), 0)
+        self.assertIsNone(membership.common_members([self.a.pk, self.b.pk]))
+
+
+class ApiTests(MembershipMixin, APITestCase):
+    """The employee filters and department members read committed memberships."""
+
+    def list_ids(self, query, name="employee-list"):
+        response = self.client.get(reverse(name) + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_filters(self):
+        query = f"?departments__id__exact={self.b.pk}"
+        self.assertEqual(self.list_ids(query), self.ids[3:9])
+        query = f"?departments__all={self.a.pk},{self.b.pk}"
+        self.assertEqual(self.list_ids(query), self.ids[3:6])
+        query = f"?departments__all={self.a.pk}&departments__id__exact={self.c.pk}"
+        self.assertEqual(self.list_ids(query), [])
+
+    def test_intersection_reads_the_index(self):
+        membership.rebuild()
+        query = f"?departments__all={self.a.pk},{self.b.pk}"
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.list_ids(query), self.ids[3:6])
+        # Only the departments prefetch reads the through table
+        joined = '"hr_employee_departments"."department_id" ='
+        self.assertFalse([q for q in queries if joined in q["sql"]])
+        # Committed, but the index has not caught up yet
+        self.employees[9].departments.add(self.a, self.b)
+        self.assertEqual(self.list_ids(query), self.ids[3:6])
+        membership.apply_changes([(self.ids[9], "post_add", [self.a.pk, self.b.pk])])
+        self.assertEqual(self.list_ids(query), [*self.ids[3:6], self.ids[9]])
+        self.assertEqual(
+            self.list_ids(query, name="async-employee-list"),
+            [*self.ids[3:6], self.ids[9]],
+        )
+
+    def test_large_intersections_join(self):
+        membership.rebuild()
+        with patch("hr.views.MAX_INDEXED_MEMBERS", 2):
+            self.assertEqual(
+                self.list_ids(f"?departments__all={self.a.pk},{self.b.pk}"),
+                self.ids[3:6],
+            )
+
+    def test_single_department_reads_do_not_wait_for_the_index(self):
+        membership.rebuild()
+        self.employees[9].departments.add(self.a)
+        query = f"?departments__id__exact={self.a.pk}"
+        self.assertEqual(self.list_ids(query), [*self.ids[:6], self.ids[9]])
+        for name in ("department-employees", "async-department-employees"):
+            with self.subTest(name=name):
+                url = reverse(name, args=[self.a.pk])
+                ids = [row["id"] for row in self.client.get(url).json()["results"]]
+                self.assertEqual(ids, [*self.ids[:6], self.ids[9]])
+
+    def test_invalid_filter(self):
+        response = self.client.get(reverse("employee-list") + "?departments__all=1,x")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            reverse("async-employee-list") + "?departments__all=1,x"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_department_employees(self):
+        membership.rebuild()
+        url = reverse("department-employees", args=[self.b.pk])
+        self.assertEqual(
+            [row["id"] for row in self.client.get(url).data["results"]], self.ids[3:9]
+        )
+
+
+class CommandTests(MembershipMixin, TestCase):
+    """``membership_index`` verifies and rebuilds the index."""
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("membership_index", *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_verify_reports_drift(self):
+        with self.assertRaisesMessage(CommandError, "2 department(s) out of sync"):
+            self.run_command()
+        membership.rebuild()
+        row = MembershipIndex.objects.get(pk=self.a.pk)
+        row.member_ids = row.member_ids[1:]
+        row.save()
+        self.assertEqual(
+            membership.verify(),
+            {self.a.pk: "member_count does not match member_ids"},
+        )
+
+    def test_rebuild(self):
+        report = self.run_command("--rebuild")
+        self.assertEqual(report, {"rebuilt": 2, "problems": {}})
+        self.assertEqual(self.indexed(self.b), self.ids[3:9])
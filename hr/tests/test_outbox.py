@@ -0,0 +1,191 @@
+"""
+Test suite for the m2m change outbox and its relay.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from kombu.exceptions import OperationalError as BrokerError
+
+from hr import membership, outbox
+from hr.models import Department, Employee, MembershipIndex, OutboxEvent
+from hr.tasks import process_m2m_signal_batch
+from pristine.celery import app
+
+
+def pending():
+    return list(
+        OutboxEvent.objects.order_by("pk").values_list(
+            "employee_id", "action", "pk_list"
+        )
+    )
+
+
+@override_settings(HR_M2M_SIGNAL_OUTBOX=True, HR_M2M_SIGNAL_BATCH_SIZE=2)
+class OutboxWriteTests(TestCase):
+    """m2m changes are written to the outbox, not published."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep1 = Department.objects.create(name="HR")
+        cls.dep2 = Department.objects.create(name="Finance")
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(3)
+        )
+
+    def test_changes_are_written_not_published(self):
+        emp = self.employees[0]
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                emp.departments.add(self.dep1, self.dep2)
+                emp.departments.remove(self.dep2)
+        delay.assert_not_called()
+        self.assertEqual(
+            pending(),
+            [
+                (emp.pk, "post_add", sorted([self.dep1.pk, self.dep2.pk])),
+                (emp.pk, "post_remove", [self.dep2.pk]),
+            ],
+        )
+
+    def test_rolled_back_changes_leave_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.employees[0].departments.add(self.dep1)
+                raise RuntimeError
+        self.assertEqual(pending(), [])
+
+    def test_reverse_changes_and_deletes(self):
+        self.dep1.employees.add(*self.employees[:2])
+        OutboxEvent.objects.all().delete()
+        self.dep1.employees.clear()
+        deleted = self.employees[2].pk
+        self.employees[2].delete()
+        self.assertCountEqual(
+            pending(),
+            [
+                (self.employees[0].pk, "post_remove", [self.dep1.pk]),
+                (self.employees[1].pk, "post_remove", [self.dep1.pk]),
+                (deleted, "post_clear", []),
+            ],
+        )
+
+
+@override_settings(HR_M2M_SIGNAL_OUTBOX=True, HR_M2M_SIGNAL_BATCH_SIZE=2)
+class RelayTests(TestCase):
+    """The relay publishes coalesced batches and deletes what it sent."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(3)
+        )
+
+    def test_relay_publishes_batches(self):
+        for emp in self.employees:
+            emp.departments.add(self.dep)
+        self.employees[0].departments.remove(self.dep)
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            self.assertEqual(outbox.relay(), 4)
+            self.assertEqual(outbox.relay(), 0)
+        events = [event for call in delay.call_args_list for event in call.args[0]]
+        # The first employee's add and remove cancel out
+        self.assertEqual(
+            events, [[emp.pk, "post_add", [self.dep.pk]] for emp in self.employees[1:]]
+        )
+        self.assertEqual(pending(), [])
+
+    def test_relay_respects_limit(self):
+        for emp in self.employees:
+            emp.departments.add(self.dep)
+        with mock.patch.object(process_m2m_signal_batch, "delay"):
+            self.assertEqual(outbox.relay(limit=2), 2)
+        self.assertEqual(pending(), [(self.employees[2].pk, "post_add", [self.dep.pk])])
+
+    def test_failed_publish_keeps_the_events(self):
+        self.employees[0].departments.add(self.dep)
+        with mock.patch.object(
+            process_m2m_signal_batch, "delay", side_effect=ConnectionError
+        ):
+            with self.assertRaises(ConnectionError):
+                outbox.relay()
+        self.assertEqual(len(pending()), 1)
+        # Released for the next relay
+        self.assertFalse(OutboxEvent.objects.filter(claimed_at__isnull=False))
+        with mock.patch.object(process_m2m_signal_batch, "delay"):
+            self.assertEqual(outbox.relay(), 1)
+
+    def test_publish_runs_after_the_claim_commits(self):
+        self.employees[0].departments.add(self.dep)
+        # The test case's own transactions
+        depth = len(connection.atomic_blocks)
+
+        def publish(chunk):
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            self.assertTrue(OutboxEvent.objects.get().claimed_at)
+
+        with mock.patch.object(process_m2m_signal_batch, "delay", publish):
+            self.assertEqual(outbox.relay(), 1)
+        self.assertEqual(pending(), [])
+
+    def test_claimed_events_are_skipped_until_the_claim_expires(self):
+        self.employees[0].departments.add(self.dep)
+        self.employees[1].departments.add(self.dep)
+        first, second = OutboxEvent.objects.order_by("pk")
+        second.claimed_at = timezone.now()
+        second.save()
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            self.assertEqual(outbox.relay(), 1)
+            delay.assert_called_once_with(
+                [[first.employee_id, "post_add", [self.dep.pk]]]
+            )
+            OutboxEvent.objects.update(claimed_at=timezone.now() - outbox.CLAIM_TIMEOUT)
+            self.assertEqual(outbox.relay(), 1)
+        self.assertEqual(pending(), [])
+
+    def test_relayed_events_update_the_index(self):
+        membership.rebuild()
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+        self.dep.employees.add(*self.employees)
+        self.assertFalse(MembershipIndex.objects.filter(pk=self.dep.pk).exists())
+        outbox.relay()
+        self.assertEqual(
+            membership.members(self.dep.pk), [emp.pk for emp in self.employees]
+        )
+        self.assertEqual(membership.verify(), {})
+
+    def test_command_retries_broker_errors(self):
+        self.employees[0].departments.add(self.dep)
+        # One broker error, one batch, then interrupted while idle
+        publish = mock.Mock(side_effect=[BrokerError("down"), None])
+        with mock.patch.object(process_m2m_signal_batch, "delay", publish):
+            with mock.patch(
+                "time.sleep", side_effect=[None, KeyboardInterrupt]
+            ) as sleep:
+                with self.assertLogs("hr.signals", "ERROR") as logs:
+                    call_command("relay_outbox", "--interval", "0.1")
+        self.assertEqual(publish.call_count, 2)
+        self.assertEqual(sleep.call_args_list, [mock.call(1.0), mock.call(0.1)])
+        self.assertIn("retrying in 1s: down", logs.output[0])
+        self.assertEqual(pending(), [])
+
+    def test_command(self):
+        self.dep.employees.add(*self.employees)
+        out = StringIO()
+        call_command("relay_outbox", "--status", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["pending"], 3)
+        out = StringIO()
+        with mock.patch.object(process_m2m_signal_batch, "delay"):
+            call_command("relay_outbox", "--once", "--limit", "2", stdout=out)
+        self.assertEqual(json.loads(out.getvalue()), {"relayed": 3})
+        self.assertEqual(outbox.backlog(), {"pending": 0, "oldest_age_s": 0.0})
@@ -0,0 +1,85 @@
+"""
+Test suite for cursor pagination and streaming list responses.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from hr.models import Department, Employee
+from hr.views import EmployeeViewSet
+
+
+class CursorPaginationTests(APITestCase):
+    """Walk the employee list page by page using the returned cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"Emp{i}", email=f"emp{i}@example.com") for i in range(7)
+        )
+        cls.list_url = reverse("employee-list")
+
+    def test_pages_follow_primary_key_order(self):
+        ids = []
+        url = f"{self.list_url}?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            ids.extend(e["id"] for e in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(ids, [emp.pk for emp in self.employees])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f"{self.list_url}?page_size=100000")
+        self.assertEqual(len(response.data["results"]), 7)
+        self.assertIsNone(response.data["next"])
+
+    def test_department_list_is_paginated(self):
+        response = self.client.get(reverse("department-list"))
+        self.assertEqual(response.data["results"], [{"id": self.dep.pk, "name": "HR"}])
+
+
+class StreamingListTests(APITestCase):
+    """The ``?stream=true`` mode returns the full list as a streamed JSON array."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"Emp{i}", email=f"emp{i}@example.com") for i in range(5)
+        )
+        cls.dep.employees.add(*cls.employees[:2])
+        cls.list_url = reverse("employee-list")
+
+    @staticmethod
+    def read(response):
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_stream_matches_paginated_rows(self):
+        paged = self.client.get(f"{self.list_url}?page_size=1000").json()["results"]
+        original = EmployeeViewSet.stream_chunk_size
+        EmployeeViewSet.stream_chunk_size = 2
+        try:
+            response = self.client.get(f"{self.list_url}?stream=true")
+        finally:
+            EmployeeViewSet.stream_chunk_size = original
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(self.read(response), paged)
+
+    def test_stream_applies_department_filter(self):
+        url = f"{self.list_url}?stream=1&departments__id__exact={self.dep.pk}"
+        rows = self.read(self.client.get(url))
+        self.assertEqual([r["id"] for r in rows], [e.pk for e in self.employees[:2]])
+
+    def test_stream_empty_list(self):
+        Employee.objects.all().delete()
+        self.assertEqual(self.read(self.client.get(f"{self.list_url}?stream=true")), [])
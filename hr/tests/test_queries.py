@@ -0,0 +1,154 @@
+"""
+Query-count regression tests for the Employee and Department API endpoints,
+and query-plan tests for the membership table's indexes.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from hr.models import Department, Employee, Membership
+
+
+class QueryCountMixin:
+    """Create departments and a configurable number of employees."""
+
+    @classmethod
+    def create_employees(cls, count, departments):
+        employees = Employee.objects.bulk_create(
+            Employee(name=f"Emp{i}", email=f"emp{i}@example.com") for i in range(count)
+        )
+        through = Employee.departments.through
+        through.objects.bulk_create(
+            through(employee_id=emp.pk, department_id=dep.pk)
+            for emp in employees
+            for dep in departments
+        )
+        return employees
+
+
+class EmployeeQueryCountTests(QueryCountMixin, APITestCase):
+    """The employee endpoints run a fixed number of queries regardless of size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.departments = [Department.objects.create(name=f"Dept{i}") for i in range(3)]
+
+    def assert_list_queries(self, rows, num):
+        self.create_employees(rows, self.departments)
+        with self.assertNumQueries(num):
+            response = self.client.get(reverse("employee-list"))
+        self.assertEqual(len(response.data["results"]), rows)
+        self.assertEqual(
+            response.data["results"][0]["message"],
+            "Emp0 is associated with 3 department(s).",
+        )
+
+    def test_list_one_employee(self):
+        # employees + prefetched departments
+        self.assert_list_queries(1, 2)
+
+    def test_list_many_employees(self):
+        self.assert_list_queries(50, 2)
+
+    def test_retrieve_employee(self):
+        (emp,) = self.create_employees(1, self.departments)
+        with self.assertNumQueries(2):
+            self.client.get(reverse("employee-detail", args=[emp.pk]))
+
+    def test_department_employees_action(self):
+        self.create_employees(25, self.departments)
+        url = reverse("department-employees", args=[self.departments[0].pk])
+        # department lookup + employees + prefetched departments
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 25)
+
+
+@skipUnless(connection.vendor == "sqlite", "reads SQLite's EXPLAIN QUERY PLAN")
+class MembershipIndexPlanTests(QueryCountMixin, TestCase):
+    """Membership lookups in either direction are served by covering indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.departments = [Department.objects.create(name=f"Dept{i}") for i in range(3)]
+        cls.employees = cls.create_employees(5, cls.departments)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Membership._meta.db_table
+            )
+        cls.indexes = {
+            tuple(info["columns"]): name
+            for name, info in constraints.items()
+            if info["index"]
+        }
+
+    def assert_plan(self, queryset, expected):
+        plan = queryset.explain()
+        self.assertIn(expected, plan)
+        self.assertNotIn(f"SCAN {Membership._meta.db_table}\n", plan + "\n")
+
+    def test_indexes(self):
+        # The foreign keys' own indexes would only repeat a composite's prefix
+        self.assertEqual(
+            set(self.indexes),
+            {
+                ("employee_id", "department_id"),
+                ("department_id", "employee_id"),
+                ("joined_at",),
+            },
+        )
+
+    def test_employees_of_a_department(self):
+        # The list filter, the admin list_filter and unindexed departments
+        self.assert_plan(
+            Employee.objects.filter(departments__id=self.departments[0].pk),
+            "USING COVERING INDEX hr_membership_dept_emp_idx (department_id=?)",
+        )
+        self.assert_plan(
+            Membership.objects.filter(department_id=self.departments[0].pk)
+            .order_by("employee_id")
+            .values_list("employee_id", flat=True),
+            "USING COVERING INDEX hr_membership_dept_emp_idx (department_id=?)",
+        )
+
+    def test_departments_of_an_employee(self):
+        unique = self.indexes["employee_id", "department_id"]
+        self.assert_plan(
+            Department.objects.filter(employees__id=self.employees[0].pk),
+            f"USING COVERING INDEX {unique} (employee_id=?)",
+        )
+        self.assert_plan(
+            Membership.objects.filter(
+                employee_id__in=[e.pk for e in self.employees]
+            ).values_list("pk", "employee_id", "department_id"),
+            f"USING COVERING INDEX {unique} (employee_id=?)",
+        )
+
+    def test_index_rebuild_reads_in_order(self):
+        plan = (
+            Membership.objects.order_by("department_id", "employee_id")
+            .values_list("department_id", "employee_id")
+            .explain()
+        )
+        self.assertIn("USING COVERING INDEX hr_membership_dept_emp_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_joined_since(self):
+        self.assert_plan(
+            Membership.objects.filter(joined_at__gte=timezone.now()),
+            "USING INDEX hr_membership_joined_idx (joined_at>?)",
+        )
+
+    def test_joined_at_is_set_by_the_database(self):
+        before = timezone.now().replace(microsecond=0)
+        employee = Employee.objects.create(name="New", email="new@example.com")
+        employee.departments.add(self.departments[0])
+        joined_at = Membership.objects.get(employee=employee).joined_at
+        self.assertGreaterEqual(joined_at, before)
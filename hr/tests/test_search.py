@@ -0,0 +1,116 @@
+"""
+Test suite for the indexed employee search used by the admin and the API.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from unittest import skipUnless
+
+from django.contrib.admin.sites import AdminSite
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from hr.admin import EmployeeAdmin
+from hr.models import Employee
+from hr.search import FTS_TABLE, _has_fts, search_employees
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+class EmployeeSearchTests(TestCase):
+    """Search matches email prefixes and name substrings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.bulk_create(
+            [
+                Employee(name="Alice Johnson", email="alice@example.com"),
+                Employee(name="Bob Alison", email="bob@example.com"),
+                Employee(name="Carl Smith", email="carl@corp.example.com"),
+                Employee(name="Dana White", email="Dana.White@Example.com"),
+            ]
+        )
+
+    def search(self, term):
+        return names(search_employees(Employee.objects.all(), term))
+
+    def test_email_prefix(self):
+        self.assertEqual(self.search("carl@"), ["Carl Smith"])
+        self.assertEqual(self.search("Bob@Ex"), ["Bob Alison"])
+        # Stored in mixed case
+        self.assertEqual(self.search("dana.white@"), ["Dana White"])
+        self.assertEqual(self.search("DANA.WHITE@EXAMPLE"), ["Dana White"])
+
+    def test_name_substring_is_case_insensitive(self):
+        self.assertEqual(self.search("ALI"), ["Alice Johnson", "Bob Alison"])
+        self.assertEqual(self.search("john"), ["Alice Johnson"])
+
+    def test_multiple_tokens_must_all_match(self):
+        self.assertEqual(self.search("alis bo"), ["Bob Alison"])
+
+    def test_short_term_falls_back_to_prefix(self):
+        self.assertEqual(self.search("ca"), ["Carl Smith"])
+
+    def test_blank_term_returns_everything(self):
+        self.assertEqual(len(self.search("  ")), 4)
+
+    def test_index_follows_updates_and_deletes(self):
+        carl = Employee.objects.get(name="Carl Smith")
+        carl.name = "Carla Stone"
+        carl.save()
+        self.assertEqual(self.search("smith"), [])
+        self.assertEqual(self.search("stone"), ["Carla Stone"])
+        carl.delete()
+        self.assertEqual(self.search("stone"), [])
+
+    def test_admin_uses_indexed_search(self):
+        admin = EmployeeAdmin(Employee, AdminSite())
+        request = RequestFactory().get("/admin/hr/employee/")
+        qs, may_have_duplicates = admin.get_search_results(
+            request, Employee.objects.all(), "johnson"
+        )
+        self.assertEqual(names(qs), ["Alice Johnson"])
+        self.assertFalse(may_have_duplicates)
+
+
+class EmployeeSearchAPITests(APITestCase):
+    """GET /api/employees/?search= uses the same search path."""
+
+    def test_search_parameter(self):
+        Employee.objects.create(name="Alice Johnson", email="alice@example.com")
+        Employee.objects.create(name="Bob", email="bob@example.com")
+        response = self.client.get(reverse("employee-list"), {"search": "johns"})
+        self.assertEqual(
+            [e["name"] for e in response.data["results"]], ["Alice Johnson"]
+        )
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 search path is SQLite-specific")
+class EmployeeSearchQueryPlanTests(TestCase):
+    """
+    Lookups read the indexes instead of scanning the employee table.
+        ``manage.py bench_search`` times them as the table grows.
+    """
+
+    def explain(self, term):
+        queryset = search_employees(Employee.objects.all(), term)
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return " | ".join(row[-1] for row in cursor.fetchall())
+
+    def test_email_prefix_uses_the_lower_email_index(self):
+        plan = self.explain("alice@")
+        self.assertIn("USING INDEX hr_employee_email_lower_idx", plan)
+        self.assertNotIn("SCAN hr_employee", plan)
+
+    def test_name_uses_the_trigram_table(self):
+        self.assertTrue(_has_fts("default"))
+        plan = self.explain("johnson")
+        self.assertIn("USING INDEX hr_employee_email_lower_idx", plan)
+        self.assertIn(f"SCAN {FTS_TABLE} VIRTUAL TABLE INDEX", plan)
+        self.assertNotIn("SCAN hr_employee", plan.replace(FTS_TABLE, ""))
@@ -0,0 +1,97 @@
+"""
+Test suite for the read-only list fast paths in ``hr.serializers``.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+
+from hr.models import Department, Employee
+from hr.serializers import (
+    DepartmentListReader,
+    DepartmentSerializer,
+    EmployeeListReader,
+    EmployeeSerializer,
+)
+
+
+class ListReaderTests(TestCase):
+    """Readers render the same JSON as the serializers they stand in for."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.departments = Department.objects.bulk_create(
+            Department(name=name) for name in ("Zeta", "Alpha", "Ünïcode", "Ops")
+        )
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f'Émp {i} "q"', email=f"emp{i}@example.com")
+            for i in range(12)
+        )
+        through = Employee.departments.through
+        through.objects.bulk_create(
+            through(employee_id=emp.pk, department_id=dep.pk)
+            for i, emp in enumerate(cls.employees)
+            # Every employee but the first belongs to up to three departments
+            for dep in (cls.departments * 2)[i % 4 : i % 4 + i % 4]
+        )
+
+    def assert_same_json(self, queryset, serializer_class, reader):
+        expected = serializer_class(queryset, many=True).data
+        payload = reader.represent(list(reader.values(queryset)))
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(payload), renderer.render(expected))
+
+    def test_employees(self):
+        queryset = Employee.objects.prefetch_related("departments").order_by("pk")
+        self.assert_same_json(queryset, EmployeeSerializer, EmployeeListReader())
+
+    def test_filtered_employees(self):
+        queryset = Employee.objects.prefetch_related("departments").filter(
+            departments=self.departments[1]
+        )
+        self.assert_same_json(queryset, EmployeeSerializer, EmployeeListReader())
+
+    def test_departments(self):
+        queryset = Department.objects.order_by("pk")
+        self.assert_same_json(queryset, DepartmentSerializer, DepartmentListReader())
+
+    def test_one_query_per_page(self):
+        reader = EmployeeListReader()
+        rows = list(reader.values(Employee.objects.all()))
+        with self.assertNumQueries(1):
+            payload = reader.represent(rows)
+        with self.assertNumQueries(0):
+            self.assertEqual(reader.represent([]), [])
+        # One dict per department, shared by its employees
+        shared = {id(dep) for row in payload for dep in row["departments"]}
+        self.assertEqual(len(shared), len(self.departments))
+        self.assertEqual(
+            json.loads(JSONRenderer().render(payload))[0]["departments"], []
+        )
+
+
+class ReadSerializerBenchmarkTests(SimpleTestCase):
+    """``bench_read_serializers`` reports a speed-up with identical output."""
+
+    def test_benchmark(self):
+        command = [sys.executable, "manage.py", "bench_read_serializers"]
+        command += ["--size", "50", "--size", "200", "--repeat", "1"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        self.assertEqual(list(report), ["50", "200"])
+        for row in report.values():
+            self.assertTrue(row["identical"])
+            self.assertGreater(row["speedup"], 0)
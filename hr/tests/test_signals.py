@@ -0,0 +1,204 @@
+"""
+Test suite for the m2m_changed coalescing buffer and batch task.
+"""
+
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from hr import membership
+from hr.batching import M2MChangeBuffer
+from hr.models import Department, Employee
+from hr.tasks import process_m2m_signal, process_m2m_signal_batch
+
+
+class M2MChangeBufferTests(TestCase):
+    """Test merging and chunking of buffered m2m events."""
+
+    def test_add_then_remove_cancels_out(self):
+        buffer = M2MChangeBuffer()
+        buffer.add(1, "post_add", [10, 11])
+        buffer.add(1, "post_remove", [10])
+        self.assertEqual(buffer.events(), [[1, "post_add", [11]]])
+
+    def test_remove_then_add_keeps_the_add(self):
+        buffer = M2MChangeBuffer()
+        # remove() also reports departments the employee was not in
+        buffer.add(1, "post_remove", [10, 11])
+        buffer.add(1, "post_add", [10])
+        self.assertEqual(
+            buffer.events(), [[1, "post_add", [10]], [1, "post_remove", [11]]]
+        )
+
+    def test_clear_drops_earlier_changes(self):
+        buffer = M2MChangeBuffer()
+        buffer.add(1, "post_add", [10])
+        buffer.add(1, "post_clear", [13])
+        buffer.add(1, "post_remove", [12])
+        buffer.add(1, "post_add", [11])
+        # The clear still lists the department added before it
+        self.assertEqual(
+            buffer.events(), [[1, "post_clear", [10, 13]], [1, "post_add", [11]]]
+        )
+
+    def test_chunks_respect_size(self):
+        buffer = M2MChangeBuffer(size=2)
+        for employee_id in range(5):
+            buffer.add(employee_id, "post_add", [1])
+        self.assertEqual([len(c) for c in buffer.chunks()], [2, 2, 1])
+
+
+@override_settings(
+    HR_M2M_SIGNAL_OUTBOX=False,
+    HR_M2M_SIGNAL_BATCHING=True,
+    HR_M2M_SIGNAL_BATCH_SIZE=2,
+)
+class M2MBatchingSignalTests(TestCase):
+    """Test that m2m changes are published as batches on commit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep1 = Department.objects.create(name="HR")
+        cls.dep2 = Department.objects.create(name="Finance")
+        cls.employees = [
+            Employee.objects.create(name=f"E{i}", email=f"e{i}@example.com")
+            for i in range(3)
+        ]
+
+    def test_changes_are_coalesced_until_commit(self):
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for emp in self.employees:
+                        emp.departments.add(self.dep1, self.dep2)
+                        emp.departments.remove(self.dep2)
+                    delay.assert_not_called()
+        self.assertEqual(delay.call_count, 2)
+        events = [event for call in delay.call_args_list for event in call.args[0]]
+        self.assertEqual(
+            events, [[emp.pk, "post_add", [self.dep1.pk]] for emp in self.employees]
+        )
+
+    def test_reverse_changes_fan_out_per_employee(self):
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dep1.employees.add(*self.employees)
+            added = [event for call in delay.call_args_list for event in call.args[0]]
+            delay.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dep1.employees.clear()
+            removed = [event for call in delay.call_args_list for event in call.args[0]]
+        self.assertCountEqual(
+            added, [[emp.pk, "post_add", [self.dep1.pk]] for emp in self.employees]
+        )
+        self.assertCountEqual(
+            removed, [[emp.pk, "post_remove", [self.dep1.pk]] for emp in self.employees]
+        )
+
+    def test_rolled_back_changes_are_not_published(self):
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        self.employees[0].departments.add(self.dep1)
+                        raise RuntimeError
+            with self.captureOnCommitCallbacks(execute=True):
+                self.employees[1].departments.add(self.dep2)
+        delay.assert_called_once_with(
+            [[self.employees[1].pk, "post_add", [self.dep2.pk]]]
+        )
+
+    def test_one_flush_is_registered_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for emp in self.employees:
+                    emp.departments.add(self.dep1)
+                    emp.departments.remove(self.dep2)
+        flush = M2MChangeBuffer.flush
+        flushes = [c for c in callbacks if getattr(c, "__func__", None) is flush]
+        self.assertEqual(len(flushes), 1)
+
+    def test_rolled_back_savepoint_changes_are_not_published(self):
+        with mock.patch.object(process_m2m_signal_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    self.employees[0].departments.add(self.dep1)
+                    with self.assertRaises(RuntimeError):
+                        with transaction.atomic():
+                            self.employees[1].departments.add(self.dep2)
+                            raise RuntimeError
+                    self.employees[2].departments.add(self.dep2)
+        events = [event for call in delay.call_args_list for event in call.args[0]]
+        self.assertCountEqual(
+            events,
+            [
+                [self.employees[0].pk, "post_add", [self.dep1.pk]],
+                [self.employees[2].pk, "post_add", [self.dep2.pk]],
+            ],
+        )
+
+    def test_batch_task_processes_all_events(self):
+        with self.assertLogs("hr.tasks", level="INFO") as logs:
+            process_m2m_signal_batch.apply(
+                args=([[1, "post_add", [2]], [3, "post_clear", []]],)
+            )
+        self.assertEqual(len(logs.records), 3)
+
+
+@override_settings(HR_M2M_SIGNAL_OUTBOX=False, HR_M2M_SIGNAL_BATCHING=False)
+class M2MUnbatchedSignalTests(TestCase):
+    """Without outbox or batching, each change is published as it happens."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+        cls.employees = [
+            Employee.objects.create(name=f"E{i}", email=f"e{i}@example.com")
+            for i in range(2)
+        ]
+
+    def test_reverse_changes_are_sent_per_employee(self):
+        with mock.patch.object(process_m2m_signal, "delay") as delay:
+            self.dep.employees.add(*self.employees)
+            self.dep.employees.clear()
+        self.assertCountEqual(
+            [call.args for call in delay.call_args_list],
+            [(emp.pk, "post_add", [self.dep.pk]) for emp in self.employees]
+            + [(emp.pk, "post_remove", [self.dep.pk]) for emp in self.employees],
+        )
+
+    def test_index_stays_exact(self):
+        with mock.patch.object(
+            process_m2m_signal,
+            "delay",
+            side_effect=lambda *args: process_m2m_signal.apply(args),
+        ):
+            self.employees[0].departments.add(self.dep)
+            self.dep.employees.add(self.employees[1])
+            self.dep.employees.remove(self.employees[0])
+        self.assertEqual(membership.verify(), {})
+
+
+@override_settings(HR_M2M_SIGNAL_OUTBOX=False, HR_M2M_SIGNAL_BATCHING=True)
+class M2MBatchedSignalTests(TestCase):
+    """Buffered changes keep the index exact."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dep = Department.objects.create(name="HR")
+        cls.employee = Employee.objects.create(name="E", email="e@example.com")
+
+    def test_remove_of_a_non_member_then_add(self):
+        with mock.patch.object(
+            process_m2m_signal_batch,
+            "delay",
+            side_effect=lambda *args: process_m2m_signal_batch.apply(args),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.employee.departments.remove(self.dep)
+                self.employee.departments.add(self.dep)
+        self.assertEqual(membership.members(self.dep.pk), [self.employee.pk])
+        self.assertEqual(membership.verify(), {})
@@ -0,0 +1,142 @@
+"""
+Test suite for the synthetic dataset generator.
+"""
+
+# pylint: disable=missing-function-docstring,protected-access
+
+import json
+import random
+from collections import Counter
+from io import StringIO
+from itertools import accumulate
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from hr import changes, membership, synthetic
+from hr.models import Department, Employee, MembershipIndex, OutboxEvent
+
+Membership = Employee.departments.through
+
+
+class MembershipPickTests(SimpleTestCase):
+    """Employees get distinct departments, mostly popular ones."""
+
+    def test_skewed_distinct_picks(self):
+        rng = random.Random(0)
+        ids = list(range(100))
+        weights = [sum(1 / rank**1.5 for rank in range(1, n + 2)) for n in range(100)]
+        picks = [synthetic._memberships(rng, ids, weights, 3) for _ in range(2000)]
+        self.assertTrue(all(1 <= len(picked) <= 5 for picked in picks))
+        counts = Counter(pk for picked in picks for pk in picked)
+        self.assertGreater(counts[0], 10 * counts[50])
+        self.assertAlmostEqual(sum(map(len, picks)) / len(picks), 3, delta=0.2)
+
+    def test_every_pick_draws_from_the_remaining_departments(self):
+        # Drawing with replacement would take ~10**10 tries to reach the last one
+        rng = random.Random(0)
+        weights = list(accumulate(1 / rank**6 for rank in range(1, 51)))
+        picked = synthetic._memberships(rng, list(range(50)), weights, 50)
+        while len(picked) < 50:
+            picked = synthetic._memberships(rng, list(range(50)), weights, 50)
+        self.assertEqual(picked, set(range(50)))
+
+    def test_more_memberships_than_departments(self):
+        rng = random.Random(0)
+        picks = [synthetic._memberships(rng, [7, 8], [1.0, 1.5], 5) for _ in range(20)]
+        self.assertIn({7, 8}, picks)
+
+
+class GenerateTests(TestCase):
+    """Bulk inserts produce a consistent, indexed dataset without signals."""
+
+    def test_generate(self):
+        report = synthetic.generate(300, 12, memberships=2, skew=1.2, batch_size=64)
+        self.assertEqual(Employee.objects.count(), 300)
+        self.assertEqual(Department.objects.count(), 12)
+        self.assertEqual(Membership.objects.count(), report["memberships"])
+        self.assertEqual(report["employees"], 300)
+        per_employee = Counter(Membership.objects.values_list("employee_id", flat=True))
+        self.assertEqual(len(per_employee), 300)
+        self.assertLessEqual(max(per_employee.values()), 3)
+        self.assertEqual(
+            report["largest_department"],
+            max(
+                Counter(
+                    Membership.objects.values_list("department_id", flat=True)
+                ).values()
+            ),
+        )
+        self.assertEqual(membership.verify(), {})
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_seeds_load_side_by_side_and_reproduce(self):
+        first = synthetic.generate(50, 5, seed=1)
+        second = synthetic.generate(50, 5, seed=2)
+        self.assertEqual(synthetic.dataset()["employees"], 100)
+        self.assertTrue(Employee.objects.filter(email="synthetic-2-49@example.com"))
+        synthetic.clear()
+        self.assertEqual(
+            synthetic.generate(50, 5, seed=1)["memberships"], first["memberships"]
+        )
+        self.assertNotEqual(first, second)
+
+    def test_statements_stay_under_the_parameter_limit(self):
+        with mock.patch.object(synthetic, "max_query_params", return_value=10):
+            with CaptureQueriesContext(connection) as queries:
+                synthetic.generate(40, 3, batch_size=1000)
+        table = Employee._meta.db_table
+        inserts = [q for q in queries if q["sql"].startswith(f'INSERT INTO "{table}"')]
+        # 5 rows of (name, email) per statement
+        self.assertEqual(len(inserts), 8)
+        self.assertEqual(synthetic.dataset()["employees"], 40)
+
+    def test_clear(self):
+        synthetic.generate(20, 3)
+        self.assertEqual(synthetic.clear(), 20)
+        self.assertEqual(
+            synthetic.dataset(), {"employees": 0, "departments": 0, "memberships": 0}
+        )
+        self.assertFalse(MembershipIndex.objects.exists())
+
+    def test_rejects_fewer_than_one_membership(self):
+        # randint(1, 2 * mean - 1) has no values to pick from below 1
+        for memberships in (0, -2):
+            with self.assertRaisesMessage(ValueError, "must be at least 1"):
+                synthetic.generate(10, 3, memberships=memberships)
+        self.assertEqual(synthetic.dataset()["employees"], 0)
+
+    def test_inserts_and_deletes_reach_the_change_feed(self):
+        cursor = changes.head()
+        synthetic.generate(20, 3)
+        employee_ids = sorted(Employee.objects.values_list("pk", flat=True))
+        data = changes.feed(cursor)
+        self.assertEqual([row["id"] for row in data["employees"]], employee_ids)
+        self.assertEqual(len(data["departments"]), 3)
+        synthetic.clear()
+        data = changes.feed(data["cursor"])
+        self.assertEqual(data["deleted_employees"], employee_ids)
+        self.assertEqual(len(data["deleted_departments"]), 3)
+
+
+class GenerateCommandTests(TestCase):
+    """``generate_hr_data`` prints what it inserted."""
+
+    def test_command(self):
+        synthetic.generate(5, 1, seed=9)
+        out = StringIO()
+        call_command(
+            "generate_hr_data", employees=30, departments=4, clear=True, stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["cleared"], 5)
+        self.assertEqual(report["employees"], 30)
+        self.assertEqual(synthetic.dataset()["employees"], 30)
+
+    def test_rejects_empty_departments(self):
+        with self.assertRaises(CommandError):
+            call_command("generate_hr_data", departments=0, stdout=StringIO())
@@ -27,8 +27,8 @@ class DepartmentAPITestCase(APITestCase):
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Expect two departments
-        self.assertEqual(len(response.data), 2)
-        names = {d["name"] for d in response.data}
+        self.assertEqual(len(response.data["results"]), 2)
+        names = {d["name"] for d in response.data["results"]}
         self.assertSetEqual(names, {"HR", "Finance"})
 
     def test_retrieve_department(self):
@@ -95,8 +95,8 @@ class DepartmentAPITestCase(APITestCase):
         url = reverse("department-employees", args=[self.dept1.pk])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # Response should be a list of employees in this department
-        data = response.data
+        # Response should be a page of employees in this department
+        data = response.data["results"]
         self.assertIsInstance(data, list)
         # The new employee should be present
         ids = {e["id"] for e in data}
@@ -121,8 +121,8 @@ class EmployeeAPITestCase(APITestCase):
         """Ensure listing employees returns correct data and structure."""
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        emp = response.data[0]
+        self.assertEqual(len(response.data["results"]), 1)
+        emp = response.data["results"][0]
         self.assertEqual(emp["id"], self.employee.pk)
         self.assertEqual(emp["name"], "Alice")
         self.assertEqual(emp["email"], "alice@example.com")
@@ -252,5 +252,5 @@ class EmployeeAPITestCase(APITestCase):
         url = f"{self.list_url}" f"?departments__id__exact={self.dep2.pk}"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        ids = {e["id"] for e in response.data}
+        ids = {e["id"] for e in response.data["results"]}
         self.assertSetEqual(ids, {emp2.pk})
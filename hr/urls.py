@@ -1,13 +1,54 @@
 """
 Router configuration for Employee and Department APIs.
+
+The async (ASGI) variants of the read paths live under ``async/``; the
+employee/department change feed is ``changes/``.
 """
 
+from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import DepartmentViewSet, EmployeeViewSet
+from . import async_views
+from .views import ChangeFeedView, DepartmentViewSet, EmployeeViewSet
 
 router = DefaultRouter()
 router.register(r"employees", EmployeeViewSet, basename="employee")
 router.register(r"departments", DepartmentViewSet)
 
-urlpatterns = router.urls
+async_urlpatterns = [
+    path(
+        "employees/",
+        async_views.EmployeeListView.as_view(),
+        name="async-employee-list",
+    ),
+    path(
+        "employees/<int:pk>/",
+        async_views.EmployeeDetailView.as_view(),
+        name="async-employee-detail",
+    ),
+    path(
+        "employees/<int:pk>/departments/",
+        async_views.EmployeeDepartmentsView.as_view(),
+        name="async-employee-departments",
+    ),
+    path(
+        "departments/",
+        async_views.DepartmentListView.as_view(),
+        name="async-department-list",
+    ),
+    path(
+        "departments/<int:pk>/",
+        async_views.DepartmentDetailView.as_view(),
+        name="async-department-detail",
+    ),
+    path(
+        "departments/<int:pk>/employees/",
+        async_views.DepartmentEmployeesView.as_view(),
+        name="async-department-employees",
+    ),
+]
+
+urlpatterns = [
+    path("async/", include(async_urlpatterns)),
+    path("changes/", ChangeFeedView.as_view(), name="change-feed"),
+] + router.urls
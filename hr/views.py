@@ -2,34 +2,106 @@
 """
 Django REST Framework viewsets for Employee and Department CRUD APIs.
 """
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from . import changes, membership
+from .bulk import upsert_employees
+from .cache import cached_response, departments_key, employee_key
 from .models import Department, Employee
-from .serializers import DepartmentSerializer, EmployeeSerializer
+from .pagination import IdCursorPagination, StreamingListMixin
+from .search import search_employees
+from .serializers import (
+    DepartmentListReader,
+    DepartmentSerializer,
+    EmployeeBulkSerializer,
+    EmployeeListReader,
+    EmployeeSerializer,
+)
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+def department_filter(params):
+    """
+    Return the department ids employees are filtered by: the one in
+    ``?departments__id__exact=`` and the comma-separated ``?departments__all=``.
+    """
+    values = [params.get("departments__id__exact", "")]
+    values += params.get("departments__all", "").split(",")
+    try:
+        return sorted({int(value) for value in values if value.strip()})
+    except ValueError as exc:
+        raise ValidationError({"departments": ["Expected department ids."]}) from exc
+
+
+# Largest intersection filtered by id list; SQLite before 3.32 allows 999
+# parameters per statement
+MAX_INDEXED_MEMBERS = 900
+
+
+def filter_departments(queryset, department_ids):
+    """
+    Narrow an Employee ``queryset`` to employees in every one of
+    ``department_ids``.
+        Several departments are intersected on their ``hr.membership`` index
+        rows, so the result trails commits by the m2m task queue. A single
+        department, an unindexed one or a large intersection is filtered
+        with one join on the (department, employee) index per department.
+    """
+    if len(department_ids) > 1:
+        common = membership.common_members(department_ids)
+        if common is not None and len(common) <= MAX_INDEXED_MEMBERS:
+            return queryset.filter(pk__in=common)
+    for department_id in department_ids:
+        queryset = queryset.filter(departments__id=department_id)
+    return queryset
+
+
+def _bounded_int(params, name, default, maximum=None):
+    """Return the non-negative integer ``?name=``, capped at ``maximum``."""
+    value = params.get(name, "")
+    if not value.strip():
+        return default
+    if not value.strip().isdigit():
+        raise ValidationError({name: ["Expected a non-negative integer."]})
+    value = int(value)
+    return value if maximum is None else min(value, maximum)
+
+
+class EmployeeViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """
     Provides CRUD for Employee along with department linkage,
     GET shows department details; POST/PUT accepts department IDs.
+    Lists filter by ``?departments__id__exact=<id>`` or, for employees in
+    every one of several departments, ``?departments__all=<id>,<id>``.
+    Lists are cursor-paginated by id; ``?stream=true`` streams the full list.
 
-    Plus an extra endpoint:
+    Plus extra endpoints:
       GET /api/employees/{pk}/departments/  → list departments of this employee
+      POST /api/employees/bulk/             → create/update many employees by email
     """
 
     serializer_class = EmployeeSerializer
+    pagination_class = IdCursorPagination
+    list_reader = EmployeeListReader()
+    bulk_max_records = 100_000
 
     def get_queryset(self):
         # Base queryset with prefetch for performance
         qs = Employee.objects.prefetch_related("departments").all()
-        # Optional filter by department ID (supports ?departments__id__exact=<id>)
-        if dept_id := self.request.query_params.get("departments__id__exact", None):
-            qs = qs.filter(departments__id=dept_id)
+        # Optional filters by department
+        # (supports ?departments__id__exact=<id> and ?departments__all=<id>,<id>)
+        if department_ids := department_filter(self.request.query_params):
+            qs = filter_departments(qs, department_ids)
+        # Optional indexed name/email search (supports ?search=<term>)
+        if term := self.request.query_params.get("search", None):
+            qs = search_employees(qs, term)
         return qs
 
     @action(detail=True, methods=["get"])
+    @cached_response(departments_key, employee_key)
     def departments(self, request, pk=None):
         """Return a list of departments this employee belongs to."""
         emp = self.get_object()
@@ -37,20 +109,60 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         serializer = DepartmentSerializer(qs, many=True, context={"request": request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Upsert a list of employees by email, replacing their departments."""
+        serializer = EmployeeBulkSerializer(
+            data=request.data, many=True, max_length=self.bulk_max_records
+        )
+        serializer.is_valid(raise_exception=True)
+        result = upsert_employees(serializer.validated_data)
+        return Response(result, status=status.HTTP_200_OK)
+
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """
     Provides CRUD for Department, plus an extra endpoint:
-      GET /api/departments/{pk}/employees/  → list employees in this dept
+      GET /api/departments/{pk}/employees/  → list employees in this dept (paginated)
+    Lists are cursor-paginated by id; ``?stream=true`` streams the full list.
+    List and detail payloads are served from the versioned cache in ``hr.cache``.
     """
 
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    pagination_class = IdCursorPagination
+    list_reader = DepartmentListReader()
+
+    @cached_response(departments_key)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response(departments_key)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=True, methods=["get"])
     def employees(self, request, pk=None):
         """Return a list of employees belonging to this department."""
         dept = self.get_object()
-        qs = dept.employees.all()
-        serializer = EmployeeSerializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        reader = EmployeeListReader()
+        page = self.paginate_queryset(reader.values(dept.employees.all()))
+        return self.get_paginated_response(reader.represent(page))
+
+
+class ChangeFeedView(APIView):
+    """
+    GET /api/changes/?since=<cursor>&limit=<n> → employees and departments
+    changed after ``since``, one entry per object in its current state, and
+    the ids of those deleted (see ``hr.changes``).
+        Pass the returned ``cursor`` as the next ``since``, right away while
+        ``more`` is true. ``?limit=0`` returns the current cursor only.
+    """
+
+    def get(self, request):
+        params = request.query_params
+        since = _bounded_int(params, "since", 0)
+        limit = _bounded_int(
+            params, "limit", changes.FEED_LIMIT, changes.MAX_FEED_LIMIT
+        )
+        return Response(changes.feed(since, limit))
@@ -0,0 +1,116 @@
+"""
+Helpers shared by the ``celery_demo`` and ``hr.bench`` benchmarks.
+
+Percentiles, quiet loggers, in-process services, scratch databases and
+stored baselines compared metric by metric.
+"""
+
+import json
+import logging
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import connections
+from django.test.utils import override_settings
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of ``values`` (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextmanager
+def quiet_loggers(*names, level=logging.WARNING):
+    """Raise the level of chatty per-task loggers while benchmarking."""
+    loggers = [logging.getLogger(name) for name in names]
+    previous = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(level)
+    try:
+        yield
+    finally:
+        for logger, old in zip(loggers, previous):
+            logger.setLevel(old)
+
+
+@contextmanager
+def local_services():
+    """Publish to the ``memory://`` broker and cache in process memory, no Redis."""
+    previous = os.environ.get("CELERY_BROKER_URL")
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    try:
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+            }
+        ):
+            yield
+    finally:
+        if previous is None:
+            os.environ.pop("CELERY_BROKER_URL", None)
+        else:
+            os.environ["CELERY_BROKER_URL"] = previous
+
+
+@contextmanager
+def scratch_database():
+    """Run against a freshly migrated throwaway database, as the test runner does."""
+    connection = connections["default"]
+    options = dict(connection.settings_dict["OPTIONS"])
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == "sqlite":
+            # Request threads need a shared file, not the default in-memory
+            # database, and transactions that queue for the write lock instead
+            # of failing when they upgrade from a read
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tmp, "db.sqlite3")
+            connection.settings_dict["OPTIONS"].update(
+                transaction_mode="IMMEDIATE", timeout=30
+            )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict["OPTIONS"] = options
+            connection.settings_dict["TEST"]["NAME"] = None
+
+
+def load_baseline(path: Path):
+    """Load a previously saved report, or None if there is none."""
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def save_baseline(path: Path, report):
+    """Write ``report`` as the new baseline."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+def regressions(report, baseline, tracked, tolerance=0.25):
+    """
+    Compare ``report`` with ``baseline`` and list ``tracked`` metrics
+    (``{metric: higher is better}``) that got worse by more than
+    ``tolerance`` (a fraction of the baseline value).
+    """
+    found = []
+    for scenario, metrics in report.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for metric, higher_is_better in tracked.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                found.append(f"{scenario}.{metric}: {old} -> {new} ({change:+.0%})")
+    return found
@@ -1,13 +1,117 @@
 """
 Celery application configuration for the Pristine Django project.
+
+Tasks are routed to one queue per workload class so a burst of one kind
+cannot starve the other. Run one worker per class with
+``celery -A pristine worker --workload <name>``: it consumes that class's
+queue with the class's concurrency and prefetch multiplier (explicit
+``-Q``, ``-c`` and ``--prefetch-multiplier`` options still win).
+
+Django request threads publish through the app's shared producer pool:
+``CELERY_BROKER_POOL_LIMIT`` connections are kept open between requests and
+health-checked before reuse (``BROKER_TRANSPORT_OPTIONS``).
+
+Results are kept only for tasks somebody reads, and only as long as
+``RESULT_POLICY`` says (see ``pristine.results``).
 """
 
 import os
 
-from celery import Celery
+from celery import Celery, bootsteps
+from click import Choice, Option
+from kombu import Exchange, Queue
+
+from .codec import NAME as COMPACT
+from .codec import register_compact
+from .metrics import instrument
+from .results import ResultPolicy
+from .results import install as install_result_policy
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pristine.settings")
 
+# Short interactive tasks are prefetched generously; long, bursty ones are
+# acked late and reserved one at a time so a backlog stays in the broker
+WORKLOADS = {
+    "interactive": {"concurrency": 8, "prefetch_multiplier": 16},
+    "bulk": {"concurrency": 2, "prefetch_multiplier": 1},
+}
+
+TASK_ROUTES = {
+    "celery_demo.tasks.batch_add": {"queue": "bulk"},
+    "celery_demo.tasks.*": {"queue": "interactive"},
+    "hr.tasks.*": {"queue": "bulk"},
+}
+
+# Nobody reads the m2m signal tasks' results, nor multiply's outside a
+# chain tail (see results.tail_only); the rest are fetched soon after they
+# finish, so an hour is plenty
+RESULT_POLICY = {
+    "hr.tasks.*": {"ignore_result": True},
+    "celery_demo.tasks.multiply": {"ignore_result": True, "result_ttl": 3600},
+    "celery_demo.tasks.*": {"result_ttl": 3600},
+}
+
+# redis-py pings a pooled connection that sat idle for longer than
+# health_check_interval before publishing on it, so a connection the broker
+# or a load balancer dropped is replaced instead of failing the request; the
+# timeouts bound how long an unreachable broker can hold a request thread
+BROKER_TRANSPORT_OPTIONS = {
+    "health_check_interval": 10,
+    "socket_keepalive": True,
+    "socket_connect_timeout": 2,
+    "socket_timeout": 5,
+    "retry_on_timeout": True,
+}
+
+register_compact()
+
 app = Celery("pristine")
 app.config_from_object("django.conf:settings", namespace="CELERY")
+app.conf.update(
+    # Tasks opt in to the compact codec with serializer="compact"; results
+    # stay JSON for any client, and compact ones stored earlier still load
+    accept_content=["json", COMPACT],
+    result_accept_content=["json", COMPACT],
+    result_serializer="json",
+    broker_transport_options=BROKER_TRANSPORT_OPTIONS,
+    task_annotations=[ResultPolicy(RESULT_POLICY)],
+    task_queues=[Queue(name, Exchange(name), routing_key=name) for name in WORKLOADS],
+    task_default_queue="interactive",
+    task_routes=TASK_ROUTES,
+)
 app.autodiscover_tasks()
+instrument()
+install_result_policy()
+
+
+class WorkloadProfile(bootsteps.Step):
+    """Apply a ``WORKLOADS`` profile to a worker started with ``--workload``."""
+
+    label = "workload profile"
+
+    def __init__(self, parent, workload=None, **options):
+        super().__init__(parent, **options)
+        if not workload:
+            return
+        profile = WORKLOADS[workload]
+        if not options.get("queues"):
+            parent.setup_queues([workload])
+        if not options.get("concurrency") and not options.get("autoscale"):
+            # The Pool step may already have copied the default
+            parent.concurrency = parent.min_concurrency = profile["concurrency"]
+        # The CLI fills an omitted --prefetch-multiplier from the config
+        if options.get("prefetch_multiplier") in (
+            None,
+            parent.app.conf.worker_prefetch_multiplier,
+        ):
+            parent.prefetch_multiplier = profile["prefetch_multiplier"]
+
+
+app.user_options["worker"].add(
+    Option(
+        ("--workload",),
+        type=Choice(sorted(WORKLOADS)),
+        help="Consume this workload's queue with its concurrency and prefetch.",
+    )
+)
+app.steps["worker"].add(WorkloadProfile)
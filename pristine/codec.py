@@ -0,0 +1,123 @@
+"""
+Compact task payload codec, registered with kombu as ``compact``.
+
+Messages are kombu JSON (so dates, UUIDs and decimals round-trip as with the
+default serializer) except that every list of at least
+``INT_ARRAY_MIN_LENGTH`` plain ints moves to a binary side table: the values
+are delta-encoded and packed with the narrowest fixed-width type that fits,
+so a sorted list of primary keys mostly costs one byte per id. Frames of
+``COMPRESS_THRESHOLD`` bytes or more are zlib-compressed.
+
+Select it per task with ``@shared_task(serializer="compact")``.
+"""
+
+import operator
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+from kombu.serialization import register
+from kombu.utils import json
+
+NAME = "compact"
+CONTENT_TYPE = "application/x-pristine-compact"
+
+INT_ARRAY_MIN_LENGTH = 8
+COMPRESS_THRESHOLD = 1024
+# Level 1 costs a few percent in size against level 6 but encodes ~4x faster
+COMPRESS_LEVEL = 1
+
+INT_ARRAY_KEY = "__ints__"
+# Signed fixed-width array typecodes, narrowest first
+TYPECODES = tuple(
+    (code, 1 << (array(code).itemsize * 8 - 1)) for code in ("b", "h", "i", "q")
+)
+
+_RAW, _ZLIB = b"\x00", b"\x01"
+_HEADER = struct.Struct(">I")
+
+
+def _pack(values):
+    """Delta-encode ``values``; return (typecode, bytes) or None if too wide."""
+    deltas = list(map(operator.sub, values[1:], values[:-1]))
+    low, high = min(deltas), max(deltas)
+    for code, limit in TYPECODES:
+        if -limit <= low and high < limit:
+            packed = array(code, deltas)
+            if sys.byteorder == "big":
+                packed.byteswap()
+            return code, packed.tobytes()
+    return None
+
+
+def _unpack(code, first, blob):
+    deltas = array(code)
+    deltas.frombytes(blob)
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return list(accumulate(deltas, initial=first))
+
+
+class _Encoder:
+    """Replaces long int lists by references into a side table of bytes."""
+
+    def __init__(self):
+        self.blob = bytearray()
+
+    def int_array(self, value):
+        if len(value) < INT_ARRAY_MIN_LENGTH:
+            return None
+        # Exact type check: bools are ints too but must stay bools
+        if set(map(type, value)) != {int}:
+            return None
+        packed = _pack(value)
+        if packed is None:
+            return None
+        code, data = packed
+        reference = [code, value[0], len(self.blob), len(data)]
+        self.blob += data
+        return {INT_ARRAY_KEY: reference}
+
+    def walk(self, value):
+        if isinstance(value, (list, tuple)):
+            reference = self.int_array(value)
+            if reference is not None:
+                return reference
+            return [self.walk(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.walk(item) for key, item in value.items()}
+        return value
+
+
+def dumps(obj) -> bytes:
+    """Encode ``obj`` as a compact frame."""
+    encoder = _Encoder()
+    document = json.dumps(encoder.walk(obj)).encode()
+    body = _HEADER.pack(len(document)) + document + encoder.blob
+    if len(body) >= COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(body, COMPRESS_LEVEL)
+    return _RAW + body
+
+
+def loads(data):
+    """Decode a frame produced by ``dumps``."""
+    data = bytes(data)
+    body = zlib.decompress(data[1:]) if data[:1] == _ZLIB else data[1:]
+    (length,) = _HEADER.unpack_from(body)
+    document = body[_HEADER.size : _HEADER.size + length]
+    blob = memoryview(body)[_HEADER.size + length :]
+
+    def object_hook(value):
+        if value.keys() == {INT_ARRAY_KEY}:
+            code, first, offset, size = value[INT_ARRAY_KEY]
+            return _unpack(code, first, blob[offset : offset + size])
+        return json.object_hook(value)
+
+    return json.loads(document, object_hook=object_hook)
+
+
+def register_compact():
+    """Make ``compact`` available to kombu producers and consumers."""
+    register(NAME, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
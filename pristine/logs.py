@@ -0,0 +1,170 @@
+"""
+Non-blocking log pipeline for the request path.
+
+``QueueHandler`` only puts records on a bounded in-memory queue; a
+``QueueListener`` thread takes them off and runs the slow handlers (the
+rotating file, the console), so a request thread never waits on file I/O or
+on another thread holding a handler lock. When the writer falls behind and
+the queue is full, records are dropped and counted rather than blocking the
+request.
+
+Python 3.12 lets ``dictConfig`` attach handlers to a queue handler by name;
+``configure`` (the ``LOGGING_CONFIG`` callable) does the same on 3.11, and
+starts the listeners. ``JsonFormatter`` writes one JSON object per line, and
+``SampleFilter`` keeps one in N high-volume debug records.
+"""
+
+import itertools
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import weakref
+from collections import defaultdict
+from datetime import datetime, timezone
+
+# Records a queue handler holds before it starts dropping them
+QUEUE_SIZE = 10_000
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", (), None))
+) | {"message", "asctime"}
+
+_listening = weakref.WeakSet()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, with their ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Keep one in every ``every`` records at or below ``level``.
+        Records are counted per logger and message template, so a rare debug
+        line is not starved by a frequent one; more severe records always
+        pass. Kept records carry ``sample_rate`` so readers can scale counts
+        back up.
+    """
+
+    def __init__(self, every=100, level="DEBUG"):
+        super().__init__()
+        self.every = every
+        if isinstance(level, str):
+            level = logging.getLevelNamesMapping()[level]
+        self.level = level
+        # Creating a count and advancing it never release the GIL
+        self.counters = defaultdict(itertools.count)
+
+    def filter(self, record):
+        if record.levelno > self.level or self.every <= 1:
+            return True
+        if next(self.counters[record.name, record.msg]) % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records for a background listener writing to other handlers.
+        ``listen`` starts the listener thread; forked children (Celery's
+        prefork pool) get a fresh queue and thread of their own. ``dropped``
+        counts the records discarded because the queue was full.
+    """
+
+    def __init__(self, maxsize=QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.maxsize = maxsize
+        self.listener = None
+        self.dropped = 0
+
+    def enqueue(self, record):
+        # Called under the handler lock, which also guards ``dropped``
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def listen(self, handlers):
+        """Start writing queued records to ``handlers`` from a background thread."""
+        self.stop()
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        _listening.add(self)
+
+    def stop(self):
+        """Write out the records still queued and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        _listening.discard(self)
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def _after_fork(self):
+        # The parent's listener thread does not exist here, and it may have
+        # held the queue's lock at the fork
+        handlers = self.listener.handlers
+        self.queue = queue.Queue(self.maxsize)
+        self.listener = None
+        self.listen(handlers)
+
+
+def _restart_listeners():
+    for handler in list(_listening):
+        handler._after_fork()  # pylint: disable=protected-access
+
+
+os.register_at_fork(after_in_child=_restart_listeners)
+
+
+class DictConfigurator(logging.config.DictConfigurator):
+    """
+    ``dictConfig`` where a ``QueueHandler`` lists, under ``handlers``, the
+    names of the handlers its listener writes to.
+    """
+
+    def configure_handler(self, config):
+        names = config.pop("handlers", None)
+        if names is None:
+            return super().configure_handler(config)
+        targets = [self.config["handlers"][name] for name in names]
+        if not all(isinstance(target, logging.Handler) for target in targets):
+            # dictConfig retries handlers whose targets come later in its order
+            config["handlers"] = names
+            raise ValueError(f"Unable to set handlers {list(names)}") from TypeError(
+                "target not configured yet"
+            )
+        handler = super().configure_handler(config)
+        handler.listen(targets)
+        return handler
+
+
+def configure(config):
+    """Apply a ``dictConfig`` dictionary, starting its queue listeners."""
+    DictConfigurator(config).configure()
@@ -0,0 +1,406 @@
+"""
+Per-task Celery metrics in the Prometheus text format.
+
+Signal handlers installed on the Celery app record queue wait, runtime and
+payload size histograms plus retry, failure and outcome counters per task
+name in a small in-process registry. Worker processes write snapshots of
+their registry to ``TASK_METRICS_DIR`` every ``FLUSH_INTERVAL`` from a
+background thread, so the ``/metrics/`` Django view and the worker's own
+HTTP endpoint (``TASK_METRICS_PORT``) can serve merged figures for every
+prefork child on the host. When several workers share a host, the first to
+bind the port serves them all.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_received,
+    task_retry,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger("pristine.metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FLUSH_INTERVAL = 1.0
+SENT_AT_HEADER = "sent_at"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "celery_task_queue_wait_seconds": (
+        "histogram",
+        "Time from publish (or ETA) until a worker started the task.",
+        SECONDS_BUCKETS,
+    ),
+    "celery_task_runtime_seconds": (
+        "histogram",
+        "Time spent executing the task body.",
+        SECONDS_BUCKETS,
+    ),
+    "celery_task_payload_bytes": (
+        "histogram",
+        "Serialized message body size as received by the worker.",
+        BYTES_BUCKETS,
+    ),
+    "celery_task_retries_total": ("counter", "Retries requested by tasks.", None),
+    "celery_task_failures_total": ("counter", "Tasks that raised.", None),
+    "celery_tasks_total": ("counter", "Finished task runs by final state.", None),
+}
+
+
+def metrics_dir():
+    """Directory shared by worker processes for snapshots, or None."""
+    path = getattr(settings, "TASK_METRICS_DIR", None)
+    return Path(path) if path else None
+
+
+def metrics_port():
+    """Port of the worker's metrics endpoint, or None to not serve one."""
+    return getattr(settings, "TASK_METRICS_PORT", None)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and fixed-bucket histograms keyed by labels."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        """Add ``value`` to counter ``name`` for ``labels`` (a tuple of pairs)."""
+        with self.lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """Record ``value`` in histogram ``name`` for ``labels``."""
+        buckets = METRICS[name][2]
+        index = bisect.bisect_left(buckets, value)
+        with self.lock:
+            key = (name, labels)
+            series = self.histograms.get(key)
+            if series is None:
+                # One slot per bucket, then +Inf, then the running sum
+                series = self.histograms[key] = [0] * (len(buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def clear(self):
+        """Drop every series."""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """JSON-serialisable copy of every series."""
+        with self.lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(series)]
+                    for (name, labels), series in self.histograms.items()
+                ],
+            }
+
+    def merge(self, snapshot):
+        """Add the series of ``snapshot`` (as returned by ``snapshot()``)."""
+        with self.lock:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, series in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                current = self.histograms.setdefault(key, [0] * len(series))
+                for index, value in enumerate(series):
+                    current[index] += value
+
+    def render(self):
+        """Format every series in the Prometheus text exposition format."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(series) for key, series in self.histograms.items()}
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = counters if kind == "counter" else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key in keys:
+                labels = key[1]
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(labels)} {_number(series[key])}")
+                    continue
+                counts, total = series[key][:-1], series[key][-1]
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), counts):
+                    cumulative += count
+                    bucket_labels = labels + (("le", _number(bound)),)
+                    lines.append(f"{name}_bucket{_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+_started = {}
+
+
+def _task_labels(name):
+    return (("task", name),)
+
+
+def _timestamp(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp() if isinstance(value, datetime) else None
+
+
+def mark_sent(headers=None, **kwargs):
+    """Stamp outgoing messages (retries included) with their publish time."""
+    if headers is not None:
+        headers[SENT_AT_HEADER] = time.time()
+
+
+def record_received(request=None, **kwargs):
+    """Record the size of the message body as it arrived at the worker."""
+    body = getattr(request, "body", None)
+    if body is not None:
+        registry.observe(
+            "celery_task_payload_bytes", _task_labels(request.task_name), len(body)
+        )
+
+
+def record_prerun(task_id=None, task=None, **kwargs):
+    """Record queue wait and remember when the task body started."""
+    _started[task_id] = time.perf_counter()
+    sent_at = task.request.get(SENT_AT_HEADER)
+    if sent_at is None:
+        return
+    ready_at = max(sent_at, _timestamp(task.request.eta) or 0)
+    registry.observe(
+        "celery_task_queue_wait_seconds",
+        _task_labels(task.name),
+        max(0.0, time.time() - ready_at),
+    )
+
+
+def record_postrun(task_id=None, task=None, state=None, **kwargs):
+    """Record runtime and the final state of the run."""
+    started = _started.pop(task_id, None)
+    labels = _task_labels(task.name)
+    if started is not None:
+        registry.observe(
+            "celery_task_runtime_seconds", labels, time.perf_counter() - started
+        )
+    registry.inc("celery_tasks_total", labels + (("state", state or "UNKNOWN"),))
+
+
+def record_retry(sender=None, **kwargs):
+    """Count a retry request."""
+    registry.inc("celery_task_retries_total", _task_labels(sender.name))
+
+
+def record_failure(sender=None, **kwargs):
+    """Count a task that raised."""
+    registry.inc("celery_task_failures_total", _task_labels(sender.name))
+
+
+def _snapshot_path(directory, pid=None):
+    return directory / f"{pid or os.getpid()}.json"
+
+
+def flush():
+    """Write this process's snapshot next to the other workers' snapshots."""
+    directory = metrics_dir()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    path = _snapshot_path(directory)
+    partial = path.with_suffix(".tmp")
+    partial.write_text(json.dumps(registry.snapshot()))
+    os.replace(partial, path)
+
+
+def start_flusher(interval=FLUSH_INTERVAL):
+    """Flush this process's snapshot every ``interval`` seconds from a daemon thread."""
+    if metrics_dir() is None:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                flush()
+            except OSError:
+                logger.exception("Could not write task metrics snapshot")
+
+    threading.Thread(target=loop, name="task-metrics-flush", daemon=True).start()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """
+    Merge this process's registry with every other snapshot in
+    ``TASK_METRICS_DIR``.
+        Snapshots of pool processes that exited (recycled children, say) are
+        merged too, so their counts do not drop out of the totals; they are
+        removed when a worker starts (see ``remove_stale_snapshots``).
+    """
+    merged = MetricsRegistry()
+    merged.merge(registry.snapshot())
+    directory = metrics_dir()
+    if directory is None or not directory.is_dir():
+        return merged
+    for path in directory.glob("*.json"):
+        if not path.stem.isdigit() or int(path.stem) == os.getpid():
+            continue
+        try:
+            merged.merge(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable metrics snapshot %s", path)
+    return merged
+
+
+def remove_stale_snapshots():
+    """Drop snapshots left behind by worker processes that have exited."""
+    directory = metrics_dir()
+    if directory is None or not directory.is_dir():
+        return
+    for path in directory.glob("*.json"):
+        if path.stem.isdigit() and not _pid_alive(int(path.stem)):
+            path.unlink(missing_ok=True)
+
+
+def metrics_view(request):  # pylint: disable=unused-argument
+    """Django view serving the merged metrics."""
+    return HttpResponse(collect().render(), content_type=CONTENT_TYPE)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the merged metrics on any path."""
+        body = collect().render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep scrapes out of the worker log."""
+
+
+_server = {}
+
+
+def start_http_server(port, host="0.0.0.0"):
+    """Serve the merged metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="task-metrics", daemon=True
+    ).start()
+    return server
+
+
+def _on_worker_init(**kwargs):
+    remove_stale_snapshots()
+    start_flusher()
+
+
+def _on_process_init(**kwargs):
+    # The fork copied the parent's series, which its own snapshot reports
+    registry.clear()
+    _started.clear()
+    # Threads do not survive the fork, so every pool process starts its own
+    start_flusher()
+
+
+def _on_worker_ready(**kwargs):
+    port = metrics_port()
+    if not port or "server" in _server:
+        return
+    try:
+        _server["server"] = start_http_server(port)
+    except OSError as exc:
+        # Another worker on this host serves the shared snapshots, ours included
+        logger.warning("Not serving task metrics on port %s: %s", port, exc)
+        return
+    logger.info("Serving task metrics on port %s", port)
+
+
+def _on_process_shutdown(**kwargs):
+    flush()
+
+
+def _on_worker_shutdown(**kwargs):
+    server = _server.pop("server", None)
+    if server is not None:
+        server.shutdown()
+    flush()
+
+
+def instrument():
+    """Connect the metric handlers to the task and worker signals."""
+    before_task_publish.connect(mark_sent, weak=False)
+    task_received.connect(record_received, weak=False)
+    task_prerun.connect(record_prerun, weak=False)
+    task_postrun.connect(record_postrun, weak=False)
+    task_retry.connect(record_retry, weak=False)
+    task_failure.connect(record_failure, weak=False)
+    worker_init.connect(_on_worker_init, weak=False)
+    worker_process_init.connect(_on_process_init, weak=False)
+    worker_ready.connect(_on_worker_ready, weak=False)
+    worker_process_shutdown.connect(_on_process_shutdown, weak=False)
+    worker_shutdown.connect(_on_worker_shutdown, weak=False)
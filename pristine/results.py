@@ -0,0 +1,140 @@
+"""
+Result retention for the Celery app.
+
+``RESULT_POLICY`` in ``pristine.celery`` maps task name globs (first match
+wins, as in ``TASK_ROUTES``) to task attributes: ``ignore_result`` for tasks
+whose return value nobody reads, and ``result_ttl``, the seconds a stored
+result is kept when that is shorter than the app-wide ``result_expires``.
+Chains only need their last result: ``tail_only`` marks the links before
+it, whose values travel in the next task's message, as not stored.
+
+``NamedRedisBackend`` stores the task name with each result, and ``usage``
+walks a Redis result backend and reports key counts and memory per task
+name, which the ``result_backend_usage`` command prints.
+"""
+
+from collections import defaultdict
+from fnmatch import fnmatchcase
+from itertools import islice
+
+from celery import states
+from celery.backends.redis import RedisBackend
+from celery.canvas import Signature, _chain, chord, group
+from celery.signals import task_postrun
+
+# Results stored without a task name (by another backend, or eagerly)
+UNNAMED = "(unnamed)"
+SCAN_BATCH = 500
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class _WithoutArguments:
+    """A task request that hides the task's args and kwargs."""
+
+    args = kwargs = None
+
+    def __init__(self, request):
+        self.request = request
+
+    def __getattr__(self, name):
+        return getattr(self.request, name)
+
+
+class NamedRedisBackend(RedisBackend):
+    """
+    Redis result backend storing ``result_extended`` metadata without arguments.
+        ``result_extended`` adds the task name to every stored result, but
+        also the task's args and kwargs, which for ``batch_add`` is the whole
+        input list; those are stored as None.
+    """
+
+    def store_result(
+        self, task_id, result, state, traceback=None, request=None, **kwargs
+    ):
+        if request is not None:
+            request = _WithoutArguments(request)
+        return super().store_result(
+            task_id, result, state, traceback=traceback, request=request, **kwargs
+        )
+
+
+class ResultPolicy:
+    """``task_annotations`` entry applying the first matching policy."""
+
+    def __init__(self, policy):
+        self.policy = policy
+
+    def annotate(self, task):
+        """Attributes for ``task``, or None when no pattern matches."""
+        for pattern, attributes in self.policy.items():
+            if fnmatchcase(task.name, pattern):
+                return dict(attributes)
+        return None
+
+
+def expire_result(task_id=None, task=None, state=None, **kwargs):
+    """Shorten the lifetime of a finished task's result to its ``result_ttl``."""
+    ttl = getattr(task, "result_ttl", None)
+    if not ttl or state not in states.READY_STATES or task.request.is_eager:
+        return
+    # A no-op for ignored results and for backends without per-key expiry
+    task.backend.expire(task.backend.get_key_for_task(task_id), ttl)
+
+
+def tail_only(signature):
+    """
+    Store only the final result of ``signature`` if it is a chain.
+        Plain task links before the tail are marked ``ignore_result``; the
+        tail is marked to store its result even when its task's policy ignores
+        results, since that is what the caller's ``get()`` waits for. Groups
+        and chords are left alone: a group followed by a task is a chord, whose
+        callback needs the header results.
+    """
+    if not isinstance(signature, _chain):
+        return signature
+    *links, tail = signature.tasks
+    for link in links:
+        if not isinstance(link, (group, chord)):
+            link.set(ignore_result=True)
+    if isinstance(tail, Signature) and not isinstance(tail, (group, chord)):
+        tail.set(ignore_result=False)
+    return signature
+
+
+def usage(backend):
+    """
+    Return ``{task name: {"keys", "bytes", "no_ttl"}}`` for every result held
+    by a Redis result backend.
+        Task names are read from the stored results, which carry them when
+        written by ``NamedRedisBackend``; ``bytes`` is Redis's ``MEMORY USAGE``.
+    """
+    client = backend.client
+    report = defaultdict(lambda: {"keys": 0, "bytes": 0, "no_ttl": 0})
+    keys = client.scan_iter(match=backend.task_keyprefix + b"*", count=SCAN_BATCH)
+    for batch in _batches(keys, SCAN_BATCH):
+        pipe = client.pipeline(transaction=False)
+        for key in batch:
+            pipe.get(key)
+            pipe.memory_usage(key)
+            pipe.ttl(key)
+        replies = pipe.execute()
+        for value, size, ttl in _batches(replies, 3):
+            if value is None:
+                # Expired between the scan and the read
+                continue
+            meta = backend.decode_result(value)
+            row = report[meta.get("name") or UNNAMED]
+            row["keys"] += 1
+            row["bytes"] += size or len(value)
+            row["no_ttl"] += ttl == -1
+    return dict(sorted(report.items()))
+
+
+def install():
+    """Connect the per-task result expiry to ``task_postrun``."""
+    task_postrun.connect(expire_result, weak=False)
@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -76,12 +79,56 @@ WSGI_APPLICATION = "pristine.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# Pick one with the DATABASE_PROFILE environment variable. "sqlite" serves
+# concurrent request threads and Celery workers from one file: writers take
+# the write lock when their transaction begins instead of failing to upgrade a
+# read lock, and every new connection runs the pragmas of its init_command.
+# "postgres" keeps each thread's connection open between requests and checks
+# it before reuse; "postgres-pool" shares a psycopg pool instead (needs
+# psycopg[pool]). Connection details come from the standard PG* variables.
+_POSTGRES = {
+    "ENGINE": "django.db.backends.postgresql",
+    "NAME": os.environ.get("PGDATABASE", "pristine"),
+    "USER": os.environ.get("PGUSER", ""),
+    "PASSWORD": os.environ.get("PGPASSWORD", ""),
+    "HOST": os.environ.get("PGHOST", ""),
+    "PORT": os.environ.get("PGPORT", ""),
+}
+DATABASE_PROFILES = {
+    "sqlite": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            # WAL lets readers carry on while one writer commits; writers wait
+            # up to busy_timeout ms for the lock instead of failing with
+            # "database is locked"; cache_size (negative: KiB) and mmap_size
+            # (bytes) keep hot pages in memory
+            "init_command": (
+                "PRAGMA journal_mode = wal;"
+                "PRAGMA synchronous = normal;"
+                "PRAGMA busy_timeout = 20000;"
+                "PRAGMA cache_size = -64000;"
+                "PRAGMA mmap_size = 268435456;"
+                "PRAGMA temp_store = memory;"
+            ),
+        },
+    },
+    "postgres": {**_POSTGRES, "CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    "postgres-pool": {
+        **_POSTGRES,
+        "OPTIONS": {"pool": {"min_size": 2, "max_size": 16, "timeout": 10}},
+    },
 }
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "sqlite")
+if DATABASE_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(
+        f"DATABASE_PROFILE must be one of {', '.join(DATABASE_PROFILES)}, "
+        f"not {DATABASE_PROFILE!r}"
+    )
+DATABASES = {"default": DATABASE_PROFILES[DATABASE_PROFILE]}
 
 
 # Password validation
@@ -126,7 +173,51 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CELERY_BROKER_URL = "redis://localhost:6379/0"
-CELERY_RESULT_BACKEND = "redis://localhost:6379/1"
+# Redis, through a backend that stores each result's task name (but not its
+# arguments) for the result_backend_usage report (see pristine/results.py)
+CELERY_RESULT_BACKEND = "pristine.results:NamedRedisBackend+redis://localhost:6379/1"
+CELERY_RESULT_EXTENDED = True
+# Broker connections kept open per process for publishing (see pristine/celery.py);
+# size it to the server's request threads: any beyond it wait for a free connection
+CELERY_BROKER_POOL_LIMIT = 32
+
+# Per-task metrics (see pristine/metrics.py): worker processes share snapshots
+# through this directory; the worker serves them on this port, Django on /metrics/
+TASK_METRICS_DIR = os.path.join(tempfile.gettempdir(), "pristine-task-metrics")
+TASK_METRICS_PORT = 9808
+
+# Cache backing the versioned HR API payload cache (see hr/cache.py);
+# tests swap this for a local-memory cache in conftest.py
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://localhost:6379/2",
+    }
+}
+HR_API_CACHE_TIMEOUT = 60 * 60
+
+# Admin widgets switch to paginated autocomplete once a related table grows
+# past this many rows; department pages render at most this many inline rows
+HR_ADMIN_LARGE_TABLE_THRESHOLD = 1000
+HR_ADMIN_INLINE_MAX_ROWS = 50
+
+# Coalesce m2m_changed events per transaction and publish them as batch tasks
+HR_M2M_SIGNAL_BATCHING = True
+HR_M2M_SIGNAL_BATCH_SIZE = 500
+# Instead, write them to the outbox table in the changing transaction and let
+# the relay_outbox command publish them (takes precedence over batching). Only
+# turn this on with a relay_outbox process running: without one no event is
+# published and the outbox table grows without bound
+HR_M2M_SIGNAL_OUTBOX = False
+
+# Log employee and department changes for the /api/changes/ feed
+HR_CHANGE_FEED = True
+
+# Request threads hand hr.* records to a queue; a background listener writes
+# them to the console and, as JSON lines, to logs/hr.log (see pristine/logs.py).
+# Debug lines (one per m2m enqueue) are kept 1 in HR_LOG_DEBUG_SAMPLE
+LOGGING_CONFIG = "pristine.logs.configure"
+HR_LOG_DEBUG_SAMPLE = 100
 
 LOGGING = {
     "version": 1,
@@ -137,6 +228,13 @@ LOGGING = {
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
         "celery": {"format": "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"},
+        "json": {"()": "pristine.logs.JsonFormatter"},
+    },
+    "filters": {
+        "sample_debug": {
+            "()": "pristine.logs.SampleFilter",
+            "every": HR_LOG_DEBUG_SAMPLE,
+        },
     },
     "handlers": {
         "console": {
@@ -145,7 +243,7 @@ LOGGING = {
         },
         "hr_file": {
             "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "standard",
+            "formatter": "json",
             "filename": os.path.join(BASE_DIR, "logs", "hr.log"),
             "maxBytes": 1024 * 1024,
             "backupCount": 5,
@@ -153,6 +251,11 @@ LOGGING = {
             "delay": True,
             "level": "INFO",
         },
+        "hr_queue": {
+            "()": "pristine.logs.QueueHandler",
+            "handlers": ["console", "hr_file"],
+            "filters": ["sample_debug"],
+        },
     },
     "loggers": {
         "celery": {
@@ -164,12 +267,12 @@ LOGGING = {
             "level": "DEBUG",
         },
         "hr.signals": {
-            "handlers": ["console", "hr_file"],
-            "level": "INFO",
+            "handlers": ["hr_queue"],
+            "level": "DEBUG",
             "propagate": False,
         },
         "hr.tasks": {
-            "handlers": ["console", "hr_file"],
+            "handlers": ["hr_queue"],
             "level": "INFO",
             "propagate": False,
         },
@@ -0,0 +1,71 @@
+"""
+Test suite for the benchmark helpers shared by the celery_demo and hr benchmarks.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from pristine import bench
+
+
+class PercentileTests(SimpleTestCase):
+    """Nearest-rank percentiles over unsorted samples."""
+
+    def test_nearest_rank(self):
+        values = list(range(100, 0, -1))
+        self.assertEqual(bench.percentile(values, 50), 50)
+        self.assertEqual(bench.percentile(values, 99), 99)
+        self.assertEqual(bench.percentile([7], 99), 7)
+
+    def test_no_values(self):
+        self.assertEqual(bench.percentile([], 50), 0.0)
+
+
+class BaselineTests(SimpleTestCase):
+    """Reports are stored as baselines and compared metric by metric."""
+
+    tracked = {
+        "tasks_per_sec": True,
+        "p50_ms": False,
+        "p99_ms": False,
+        "overhead_per_message_ms": False,
+    }
+    report = {
+        "chain": {
+            "tasks_per_sec": 100.0,
+            "p50_ms": 10.0,
+            "p99_ms": 20.0,
+            "overhead_per_message_ms": 5.0,
+        }
+    }
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "nested" / "baseline.json"
+            self.assertIsNone(bench.load_baseline(path))
+            bench.save_baseline(path, self.report)
+            self.assertEqual(bench.load_baseline(path), self.report)
+
+    def test_within_tolerance(self):
+        current = {"chain": dict(self.report["chain"], tasks_per_sec=80.0, p99_ms=24.0)}
+        self.assertEqual(bench.regressions(current, self.report, self.tracked), [])
+
+    def test_regressions_respect_direction(self):
+        current = {
+            "chain": dict(
+                self.report["chain"], tasks_per_sec=50.0, p50_ms=5.0, p99_ms=40.0
+            ),
+            "group": {"tasks_per_sec": 1.0},
+        }
+        found = bench.regressions(current, self.report, self.tracked)
+        self.assertEqual(
+            found,
+            [
+                "chain.tasks_per_sec: 100.0 -> 50.0 (-50%)",
+                "chain.p99_ms: 20.0 -> 40.0 (+100%)",
+            ],
+        )
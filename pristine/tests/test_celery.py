@@ -0,0 +1,129 @@
+"""
+Test suite for task routing and per-workload worker profiles.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from pristine.celery import BROKER_TRANSPORT_OPTIONS, WORKLOADS, WorkloadProfile, app
+
+
+class TaskRoutingTests(SimpleTestCase):
+    """Each workload class is published to its own queue."""
+
+    def queue(self, name):
+        return app.amqp.router.route({}, name)["queue"].name
+
+    def test_routes(self):
+        self.assertEqual(self.queue("hr.tasks.process_m2m_signal"), "bulk")
+        self.assertEqual(self.queue("hr.tasks.process_m2m_signal_batch"), "bulk")
+        self.assertEqual(self.queue("celery_demo.tasks.batch_add"), "bulk")
+        self.assertEqual(self.queue("celery_demo.tasks.slow_add"), "interactive")
+        self.assertEqual(self.queue("celery_demo.tasks.multiply"), "interactive")
+        self.assertEqual(self.queue("celery.chord_unlock"), "interactive")
+
+    def test_queues_do_not_share_bindings(self):
+        bindings = {
+            (queue.exchange.name, queue.routing_key)
+            for queue in app.amqp.queues.values()
+        }
+        self.assertEqual(bindings, {("bulk", "bulk"), ("interactive", "interactive")})
+
+
+class ProducerPoolTests(SimpleTestCase):
+    """Publishers share a sized pool of health-checked broker connections."""
+
+    def test_pool_settings(self):
+        self.assertEqual(app.conf.broker_pool_limit, settings.CELERY_BROKER_POOL_LIMIT)
+        self.assertEqual(app.pool.limit, settings.CELERY_BROKER_POOL_LIMIT)
+        self.assertEqual(app.conf.broker_transport_options, BROKER_TRANSPORT_OPTIONS)
+        self.assertTrue(BROKER_TRANSPORT_OPTIONS["health_check_interval"])
+
+    def test_load_test_reports_added_latency(self):
+        command = [sys.executable, "manage.py", "bench_enqueue", "--local"]
+        command += ["--requests", "24", "--threads", "4", "--pool-limit", "4"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        for run in ("no_publish", "unpooled", "pooled", "outbox"):
+            self.assertEqual(report[run]["requests"], 24)
+            self.assertEqual(report[run]["errors"], 0)
+        self.assertIn("added_p99_ms", report["pooled"])
+        self.assertEqual(report["pooled"]["pool_limit"], 4)
+        self.assertGreater(report["pooled"]["publish_p50_ms"], 0)
+        # The outbox run publishes nothing from requests; the relay does
+        self.assertEqual(report["outbox"]["publish_p50_ms"], 0)
+        self.assertEqual(report["outbox"]["relayed"], 24 + 4)
+
+
+class WorkloadProfileTests(SimpleTestCase):
+    """``--workload`` applies the class's queue, concurrency and prefetch."""
+
+    def worker(self, workload=None, **options):
+        # As the CLI passes them: omitted values are filled from the config
+        options.setdefault("prefetch_multiplier", app.conf.worker_prefetch_multiplier)
+        parent = SimpleNamespace(
+            app=app,
+            setup_queues=mock.Mock(),
+            concurrency=options.get("concurrency") or 4,
+            min_concurrency=options.get("concurrency") or 4,
+            prefetch_multiplier=options["prefetch_multiplier"],
+        )
+        WorkloadProfile(parent, workload=workload, **options)
+        return parent
+
+    def test_bulk_profile(self):
+        worker = self.worker("bulk", concurrency=0)
+        worker.setup_queues.assert_called_once_with(["bulk"])
+        self.assertEqual(worker.concurrency, WORKLOADS["bulk"]["concurrency"])
+        self.assertEqual(worker.min_concurrency, WORKLOADS["bulk"]["concurrency"])
+        self.assertEqual(worker.prefetch_multiplier, 1)
+
+    def test_explicit_options_win(self):
+        worker = self.worker(
+            "interactive", queues=["custom"], concurrency=3, prefetch_multiplier=7
+        )
+        worker.setup_queues.assert_not_called()
+        self.assertEqual(worker.concurrency, 3)
+        self.assertEqual(worker.prefetch_multiplier, 7)
+
+    def test_without_workload_nothing_changes(self):
+        worker = self.worker(concurrency=0)
+        worker.setup_queues.assert_not_called()
+        self.assertEqual(worker.concurrency, 4)
+
+
+class ContentionTests(SimpleTestCase):
+    """Interactive latency holds during an m2m burst once queues are split."""
+
+    def test_routed_queues_protect_interactive_latency(self):
+        # In a fresh process: the in-memory workers rewire the app's transports
+        command = [sys.executable, "manage.py", "bench_pipeline", "--contention"]
+        command += ["--bulk", "400", "--count", "20", "--concurrency", "4"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        shared = report["shared"]["steps"]["multiply"]
+        routed = report["routed"]["steps"]["multiply"]
+        self.assertEqual(report["routed"]["steps"]["process_m2m_signal"]["count"], 400)
+        self.assertLess(routed["p99_ms"], shared["p99_ms"] / 4)
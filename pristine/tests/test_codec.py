@@ -0,0 +1,99 @@
+"""
+Test suite for the compact task payload codec.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from kombu import serialization
+
+from celery_demo.tasks import batch_add, slow_add
+from hr.tasks import process_m2m_signal, process_m2m_signal_batch
+from pristine import codec
+from pristine.celery import app
+
+
+class CompactCodecTests(SimpleTestCase):
+    """Frames decode to what kombu's JSON serializer would produce."""
+
+    def round_trip(self, value):
+        decoded = codec.loads(codec.dumps(value))
+        self.assertEqual(decoded, value)
+        return decoded
+
+    def test_scalars_and_containers(self):
+        self.round_trip([[42, "post_add", [1, 2, 3]], {}, {"chain": None}])
+        self.round_trip({"nested": {"ids": list(range(100))}, "flag": True})
+
+    def test_kombu_json_types(self):
+        moment = datetime(2025, 5, 19, 16, 20, 53, tzinfo=timezone.utc)
+        identifier = uuid.uuid4()
+        decoded = self.round_trip(
+            {"at": moment, "id": identifier, "amount": Decimal("1.50")}
+        )
+        self.assertIsInstance(decoded["at"], datetime)
+
+    def test_int_arrays(self):
+        for values in (
+            list(range(8)),
+            [5, 3, 1, -100, 10**6, 0, 7, 7],
+            [2**62, -(2**62), 0, 1, 2, 3, 4, 5],
+            list(range(10_000, 0, -3)),
+        ):
+            with self.subTest(values=values[:4]):
+                self.assertEqual(codec.loads(codec.dumps(values)), values)
+
+    def test_values_wider_than_64_bits_stay_json(self):
+        values = [0, 2**70, 1, 2, 3, 4, 5, 6]
+        frame = codec.dumps(values)
+        self.assertNotIn(codec.INT_ARRAY_KEY.encode(), frame)
+        self.assertEqual(codec.loads(frame), values)
+
+    def test_bools_are_not_packed(self):
+        values = [True, False, 1, 0, 1, 1, 0, 1]
+        decoded = codec.loads(codec.dumps(values))
+        self.assertEqual([type(item) for item in decoded], [type(v) for v in values])
+
+    def test_tuples_decode_as_lists(self):
+        self.assertEqual(codec.loads(codec.dumps((1, 2, 3))), [1, 2, 3])
+        self.assertEqual(codec.loads(codec.dumps(tuple(range(20)))), list(range(20)))
+
+    def test_small_frames_are_not_compressed(self):
+        self.assertEqual(codec.dumps([1, 2, 3])[:1], b"\x00")
+        self.assertEqual(codec.dumps(["x" * 2000])[:1], b"\x01")
+
+    def test_sorted_ids_cost_about_a_byte_each(self):
+        ids = list(range(1, 50_000, 7))
+        frame = codec.dumps([42, "post_add", ids])
+        self.assertLess(len(frame), len(ids) * 1.1)
+        self.assertLess(len(frame), len(json.dumps(ids)) / 4)
+
+
+class RegistrationTests(SimpleTestCase):
+    """The codec is registered with kombu and selected by the heavy tasks."""
+
+    def test_kombu_round_trip(self):
+        content_type, encoding, data = serialization.dumps(
+            [1, list(range(50))], serializer=codec.NAME
+        )
+        self.assertEqual(content_type, codec.CONTENT_TYPE)
+        self.assertEqual(encoding, "binary")
+        self.assertEqual(
+            serialization.loads(data, content_type, encoding, accept=[content_type]),
+            [1, list(range(50))],
+        )
+
+    def test_app_accepts_compact_and_stores_json(self):
+        self.assertIn(codec.NAME, app.conf.accept_content)
+        self.assertIn(codec.NAME, app.conf.result_accept_content)
+        self.assertEqual(app.conf.result_serializer, "json")
+
+    def test_task_serializers(self):
+        for task in (process_m2m_signal, process_m2m_signal_batch, batch_add):
+            self.assertEqual(task.serializer, codec.NAME)
+        self.assertEqual(slow_add.serializer, "json")
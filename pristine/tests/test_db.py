@@ -0,0 +1,117 @@
+"""
+Test suite for the database profiles and their SQLite pragmas.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase
+
+
+def _manage(*args, env=None):
+    return subprocess.run(
+        [sys.executable, "manage.py", *args],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        check=False,
+        text=True,
+        timeout=120,
+        env={**os.environ, **(env or {})},
+    )
+
+
+class SqlitePragmaTests(TestCase):
+    """New SQLite connections run the pragmas of the profile's ``init_command``."""
+
+    def pragma(self, db, name):
+        with db.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 20_000)
+        self.assertEqual(self.pragma(connection, "cache_size"), -64_000)
+        self.assertEqual(self.pragma(connection, "temp_store"), 2)  # memory
+
+    def test_file_database_uses_wal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            default = connections["default"]
+            db = default.__class__(
+                {**default.settings_dict, "NAME": os.path.join(tmp, "wal.sqlite3")},
+                # A second wrapper of the default alias, on its own file
+                alias=default.alias,
+            )
+            try:
+                self.assertEqual(self.pragma(db, "journal_mode"), "wal")
+                self.assertEqual(self.pragma(db, "synchronous"), 1)  # normal
+            finally:
+                db.close()
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    """``DATABASE_PROFILE`` picks the connection settings."""
+
+    def test_sqlite_profile(self):
+        self.assertEqual(settings.DATABASE_PROFILE, "sqlite")
+        self.assertEqual(settings.DATABASES["default"]["CONN_MAX_AGE"], 60)
+        options = settings.DATABASES["default"]["OPTIONS"]
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertIn("PRAGMA journal_mode = wal;", options["init_command"])
+
+    def test_postgres_profiles(self):
+        # Reads the settings module only: psycopg may not be installed
+        code = (
+            "import json; from pristine import settings; "
+            "print(json.dumps(settings.DATABASES['default'], default=str))"
+        )
+        for profile in ("postgres", "postgres-pool"):
+            result = subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                check=False,
+                text=True,
+                timeout=60,
+                env={**os.environ, "DATABASE_PROFILE": profile, "PGHOST": "db"},
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            database = json.loads(result.stdout)
+            self.assertEqual(database["ENGINE"], "django.db.backends.postgresql")
+            self.assertEqual(database["HOST"], "db")
+            if profile == "postgres":
+                self.assertEqual(database["CONN_MAX_AGE"], 60)
+                self.assertTrue(database["CONN_HEALTH_CHECKS"])
+            else:
+                self.assertEqual(database["OPTIONS"]["pool"]["max_size"], 16)
+
+    def test_unknown_profile(self):
+        result = _manage("check", env={"DATABASE_PROFILE": "oracle"})
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("DATABASE_PROFILE must be one of", result.stderr)
+
+
+class DatabaseLoadTestTests(SimpleTestCase):
+    """``bench_database`` compares the profile with Django's defaults."""
+
+    def test_load_test_reports_both_runs(self):
+        result = _manage(
+            "bench_database",
+            "--local",
+            *("--requests", "20", "--writers", "2", "--readers", "1"),
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        report = json.loads(result.stdout)
+        self.assertEqual(set(report), {"default", "profile"})
+        # The profile's writers wait for the lock instead of failing
+        self.assertEqual(report["profile"]["errors"], 0)
+        self.assertEqual(report["profile"]["requests"], 20)
+        self.assertEqual(report["profile"]["read_errors"], 0)
+        self.assertEqual(report["profile"]["database_profile"], "sqlite")
+        self.assertIn("write_gain", report["profile"])
@@ -0,0 +1,237 @@
+"""
+Test suite for the queued, JSON and sampled log pipeline.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.utils.log import configure_logging
+
+from pristine import logs
+
+
+def _record(msg="hello %s", args=("world",), level=logging.INFO, **extra):
+    record = logging.LogRecord("hr.signals", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class ListHandler(logging.Handler):
+    """Collect handled records."""
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class JsonFormatterTests(SimpleTestCase):
+    """Records become one JSON object per line."""
+
+    def test_fields_and_extra(self):
+        line = logs.JsonFormatter().format(_record(employee_id=7))
+        self.assertNotIn("\n", line)
+        entry = json.loads(line)
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "hr.signals")
+        self.assertEqual(entry["message"], "hello world")
+        self.assertEqual(entry["employee_id"], 7)
+        self.assertTrue(entry["time"].endswith("+00:00"))
+
+    def test_exceptions_and_unserializable_values(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = _record(payload=object())
+            record.exc_info = sys.exc_info()
+        entry = json.loads(logs.JsonFormatter().format(record))
+        self.assertIn("ValueError: boom", entry["exc_info"])
+        self.assertIn("object object", entry["payload"])
+
+
+class SampleFilterTests(SimpleTestCase):
+    """Debug records are sampled per message; others always pass."""
+
+    def test_one_in_every(self):
+        sample = logs.SampleFilter(every=10)
+        kept = [
+            record
+            for record in (
+                _record("enqueued %s", (n,), logging.DEBUG) for n in range(25)
+            )
+            if sample.filter(record)
+        ]
+        self.assertEqual([record.args[0] for record in kept], [0, 10, 20])
+        self.assertEqual({record.sample_rate for record in kept}, {10})
+        # Counted per message template
+        self.assertTrue(sample.filter(_record("flushed %s", (1,), logging.DEBUG)))
+
+    def test_more_severe_records_pass(self):
+        sample = logs.SampleFilter(every=10)
+        self.assertTrue(all(sample.filter(_record()) for _ in range(5)))
+        sample = logs.SampleFilter(every=10, level="INFO")
+        self.assertEqual(sum(bool(sample.filter(_record())) for _ in range(20)), 2)
+
+
+class QueueHandlerTests(SimpleTestCase):
+    """Records are written by the listener thread, or dropped when full."""
+
+    def test_listener_writes_records(self):
+        handler = logs.QueueHandler()
+        target = ListHandler(level=logging.INFO)
+        handler.listen([target])
+        self.addCleanup(handler.close)
+        handler.handle(_record())
+        handler.handle(_record(level=logging.DEBUG))
+        handler.stop()
+        # The target's level still applies
+        self.assertEqual([r.getMessage() for r in target.records], ["hello world"])
+
+    def test_full_queue_drops(self):
+        handler = logs.QueueHandler(maxsize=2)
+        self.addCleanup(handler.close)
+        for _ in range(5):
+            handler.handle(_record())
+        self.assertEqual(handler.dropped, 3)
+        target = ListHandler()
+        handler.listen([target])
+        handler.stop()
+        self.assertEqual(len(target.records), 2)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_forked_child_gets_its_own_listener(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "child.log")
+            target = logging.FileHandler(path, encoding="utf-8")
+            handler = logs.QueueHandler()
+            handler.listen([target])
+            self.addCleanup(target.close)
+            self.addCleanup(handler.close)
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover - runs in the child
+                handler.handle(_record("from the child", ()))
+                handler.close()
+                os._exit(0)  # pylint: disable=protected-access
+            os.waitpid(pid, 0)
+            handler.handle(_record("from the parent", ()))
+            handler.stop()
+            self.assertEqual(
+                sorted(Path(path).read_text(encoding="utf-8").splitlines()),
+                ["from the child", "from the parent"],
+            )
+
+
+class ConfigureTests(SimpleTestCase):
+    """``configure`` attaches queue handlers to handlers named in the config."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "hr.log")
+        # Put the project's logging back afterwards
+        self.addCleanup(configure_logging, settings.LOGGING_CONFIG, settings.LOGGING)
+
+    def test_named_handlers_and_pipeline(self):
+        logs.configure(
+            {
+                "version": 1,
+                "disable_existing_loggers": False,
+                "formatters": {"json": {"()": "pristine.logs.JsonFormatter"}},
+                "filters": {"sample": {"()": "pristine.logs.SampleFilter", "every": 2}},
+                "handlers": {
+                    # Sorts before its target, so dictConfig retries it
+                    "a_queue": {
+                        "()": "pristine.logs.QueueHandler",
+                        "handlers": ["file"],
+                        "filters": ["sample"],
+                    },
+                    "file": {
+                        "class": "logging.FileHandler",
+                        "filename": self.path,
+                        "formatter": "json",
+                    },
+                },
+                "loggers": {
+                    "pristine.tests.logs": {
+                        "handlers": ["a_queue"],
+                        "level": "DEBUG",
+                        "propagate": False,
+                    }
+                },
+            }
+        )
+        logger = logging.getLogger("pristine.tests.logs")
+        (handler,) = logger.handlers
+        self.assertIsInstance(handler, logs.QueueHandler)
+        for n in range(4):
+            logger.debug("enqueued %s", n)
+        logger.warning("done", extra={"employee_id": 3})
+        handler.stop()
+        entries = [
+            json.loads(line)
+            for line in Path(self.path).read_text(encoding="utf-8").splitlines()
+        ]
+        self.assertEqual(
+            [entry["message"] for entry in entries],
+            ["enqueued 0", "enqueued 2", "done"],
+        )
+        self.assertEqual(entries[0]["sample_rate"], 2)
+        self.assertEqual(entries[2]["employee_id"], 3)
+
+    def test_project_settings(self):
+        for name in ("hr.signals", "hr.tasks"):
+            # pytest adds its capturing handlers alongside
+            (handler,) = [
+                handler
+                for handler in logging.getLogger(name).handlers
+                if isinstance(handler, logs.QueueHandler)
+            ]
+            self.assertEqual(
+                [target.name for target in handler.listener.handlers],
+                ["console", "hr_file"],
+            )
+        self.assertIsInstance(
+            handler.listener.handlers[1].formatter, logs.JsonFormatter
+        )
+
+
+class LoggingLoadTestTests(SimpleTestCase):
+    """``bench_logging`` reports every pipeline."""
+
+    def test_load_test_reports_every_run(self):
+        command = [sys.executable, "manage.py", "bench_logging", "--local"]
+        command += ["--requests", "16", "--threads", "4", "--records", "200"]
+        output = subprocess.run(
+            command,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=120,
+        ).stdout
+        report = json.loads(output)
+        self.assertEqual(
+            set(report), {"silent", "sync", "queue", "queue_sampled_debug"}
+        )
+        for run in report.values():
+            self.assertEqual(run["requests"], 16)
+            self.assertEqual(run["errors"], 0)
+            self.assertGreaterEqual(run["call_p99_us"], run["call_p50_us"])
+        self.assertEqual(report["silent"]["lines_written"], 0)
+        # 4 warm-up and 16 requests each log their save, plus the timed records
+        for run in ("sync", "queue", "queue_sampled_debug"):
+            self.assertEqual(
+                report[run]["lines_written"] + report[run]["dropped"], 20 + 200
+            )
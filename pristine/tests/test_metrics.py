@@ -0,0 +1,228 @@
+"""
+Test suite for the per-task Celery metrics.
+"""
+
+# pylint: disable=missing-function-docstring,protected-access
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from celery_demo.tasks import multiply
+from pristine import metrics
+from pristine.celery import app
+
+TASK = (("task", "demo.add"),)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    """Series are kept per label set and rendered in the text format."""
+
+    def test_histogram_rendering(self):
+        registry = metrics.MetricsRegistry()
+        for value in (0.003, 0.2, 120):
+            registry.observe("celery_task_runtime_seconds", TASK, value)
+        text = registry.render()
+        self.assertIn("# TYPE celery_task_runtime_seconds histogram", text)
+        self.assertIn(
+            'celery_task_runtime_seconds_bucket{task="demo.add",le="0.005"} 1', text
+        )
+        self.assertIn(
+            'celery_task_runtime_seconds_bucket{task="demo.add",le="0.25"} 2', text
+        )
+        self.assertIn(
+            'celery_task_runtime_seconds_bucket{task="demo.add",le="60"} 2', text
+        )
+        self.assertIn(
+            'celery_task_runtime_seconds_bucket{task="demo.add",le="+Inf"} 3', text
+        )
+        self.assertIn('celery_task_runtime_seconds_count{task="demo.add"} 3', text)
+        self.assertIn('celery_task_runtime_seconds_sum{task="demo.add"} 120.203', text)
+
+    def test_counters_and_label_escaping(self):
+        registry = metrics.MetricsRegistry()
+        registry.inc("celery_task_retries_total", (("task", 'odd"name\\'),))
+        registry.inc("celery_task_retries_total", (("task", 'odd"name\\'),))
+        self.assertIn(
+            'celery_task_retries_total{task="odd\\"name\\\\"} 2', registry.render()
+        )
+
+    def test_snapshots_merge(self):
+        first, second = metrics.MetricsRegistry(), metrics.MetricsRegistry()
+        first.inc("celery_tasks_total", TASK)
+        first.observe("celery_task_payload_bytes", TASK, 100)
+        second.inc("celery_tasks_total", TASK, 2)
+        second.observe("celery_task_payload_bytes", TASK, 5000)
+        merged = metrics.MetricsRegistry()
+        merged.merge(json.loads(json.dumps(first.snapshot())))
+        merged.merge(json.loads(json.dumps(second.snapshot())))
+        text = merged.render()
+        self.assertIn('celery_tasks_total{task="demo.add"} 3', text)
+        self.assertIn('celery_task_payload_bytes_count{task="demo.add"} 2', text)
+        self.assertIn('celery_task_payload_bytes_sum{task="demo.add"} 5100', text)
+
+
+class SignalHandlerTests(SimpleTestCase):
+    """Task signals feed the process registry."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(metrics, "registry", metrics.MetricsRegistry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+
+    def test_runtime_and_state_from_task_run(self):
+        multiply.apply(args=(2,))
+        text = self.registry.render()
+        name = 'task="celery_demo.tasks.multiply"'
+        self.assertIn(f"celery_task_runtime_seconds_count{{{name}}} 1", text)
+        self.assertIn(f'celery_tasks_total{{{name},state="SUCCESS"}} 1', text)
+        # Eager runs are never published, so there is no queue wait
+        self.assertNotIn("celery_task_queue_wait_seconds", text)
+
+    def test_queue_wait_counts_from_publish_or_eta(self):
+        task = SimpleNamespace(
+            name="demo.add",
+            request=SimpleNamespace(
+                get={"sent_at": 1000.0}.get, eta="1970-01-01T00:16:50+00:00"
+            ),
+        )
+        with mock.patch("pristine.metrics.time.time", return_value=1012.5):
+            metrics.record_prerun(task_id="t1", task=task)
+        series = self.registry.histograms[("celery_task_queue_wait_seconds", TASK)]
+        # ETA (1010) is later than the publish, so the wait is 2.5s
+        self.assertEqual(series[-1], 2.5)
+
+    def test_publish_stamps_headers(self):
+        headers = {"sent_at": 1.0}
+        with mock.patch("pristine.metrics.time.time", return_value=42.0):
+            metrics.mark_sent(headers=headers)
+        self.assertEqual(headers, {"sent_at": 42.0})
+
+    def test_payload_retry_and_failure(self):
+        task = SimpleNamespace(name="demo.add")
+        metrics.record_received(
+            request=SimpleNamespace(task_name="demo.add", body=b"x" * 700)
+        )
+        metrics.record_retry(sender=task)
+        metrics.record_failure(sender=task)
+        text = self.registry.render()
+        self.assertIn(
+            'celery_task_payload_bytes_bucket{task="demo.add",le="1024"} 1', text
+        )
+        self.assertIn('celery_task_retries_total{task="demo.add"} 1', text)
+        self.assertIn('celery_task_failures_total{task="demo.add"} 1', text)
+
+
+class SnapshotTests(SimpleTestCase):
+    """Worker processes share their series through the metrics directory."""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+        override = override_settings(TASK_METRICS_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.object(metrics, "registry", metrics.MetricsRegistry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_snapshot(self, pid, count):
+        other = metrics.MetricsRegistry()
+        other.inc("celery_tasks_total", TASK, count)
+        (self.directory / f"{pid}.json").write_text(json.dumps(other.snapshot()))
+
+    def test_collect_merges_other_processes(self):
+        self.registry.inc("celery_tasks_total", TASK)
+        self.write_snapshot(os.getppid(), 4)
+        # This process's own file is stale by definition and skipped
+        self.write_snapshot(os.getpid(), 100)
+        self.assertIn(
+            'celery_tasks_total{task="demo.add"} 5', metrics.collect().render()
+        )
+
+    def test_flush_writes_own_snapshot(self):
+        self.registry.inc("celery_tasks_total", TASK)
+        metrics.flush()
+        snapshot = json.loads((self.directory / f"{os.getpid()}.json").read_text())
+        self.assertEqual(
+            snapshot["counters"], [["celery_tasks_total", [["task", "demo.add"]], 1]]
+        )
+
+    def test_stale_snapshots_are_removed(self):
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        self.write_snapshot(exited.pid, 1)
+        self.write_snapshot(os.getppid(), 1)
+        metrics.remove_stale_snapshots()
+        self.assertEqual(
+            sorted(p.name for p in self.directory.iterdir()), [f"{os.getppid()}.json"]
+        )
+
+
+class EndpointTests(SimpleTestCase):
+    """Both the Django view and the worker endpoint serve the text format."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(metrics, "registry", metrics.MetricsRegistry())
+        patcher.start().inc("celery_tasks_total", TASK)
+        self.addCleanup(patcher.stop)
+
+    @override_settings(TASK_METRICS_DIR=None)
+    def test_django_view(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn(b'celery_tasks_total{task="demo.add"} 1', response.content)
+
+    @override_settings(TASK_METRICS_DIR=None)
+    def test_worker_http_server(self):
+        server = metrics.start_http_server(0, host="127.0.0.1")
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode()
+        self.assertIn('celery_tasks_total{task="demo.add"} 1', body)
+
+    @override_settings(TASK_METRICS_DIR=None)
+    def test_second_worker_on_the_host_skips_the_port(self):
+        # The first worker's endpoint
+        server = metrics.start_http_server(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+        with (
+            override_settings(TASK_METRICS_PORT=port),
+            mock.patch.dict(metrics._server, clear=True),
+            self.assertLogs("pristine.metrics", "WARNING"),
+        ):
+            metrics._on_worker_ready()
+            self.assertNotIn("server", metrics._server)
+
+
+class ProcessInitTests(SimpleTestCase):
+    """Pool processes start from an empty registry."""
+
+    @override_settings(TASK_METRICS_DIR=None)
+    def test_forked_series_are_dropped(self):
+        registry = metrics.MetricsRegistry()
+        registry.inc("celery_tasks_total", TASK)
+        with mock.patch.object(metrics, "registry", registry):
+            metrics._on_process_init()
+        self.assertEqual(registry.snapshot(), {"counters": [], "histograms": []})
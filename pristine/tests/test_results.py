@@ -0,0 +1,199 @@
+"""
+Test suite for the result retention policy and backend usage report.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from celery import chain, group, states
+from celery.backends.cache import CacheBackend
+from celery.backends.redis import RedisBackend
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from celery_demo.tasks import batch_add, multiply, slow_add, subtract, total
+from hr.tasks import process_m2m_signal, process_m2m_signal_batch
+from pristine import results
+from pristine.celery import app
+
+COMMAND = "celery_demo.management.commands.result_backend_usage.app"
+
+
+class ResultPolicyTests(SimpleTestCase):
+    """Tasks pick up the first matching policy entry as attributes."""
+
+    def test_first_match_wins(self):
+        policy = results.ResultPolicy(
+            {"demo.add": {"ignore_result": True}, "demo.*": {"result_ttl": 60}}
+        )
+        self.assertEqual(
+            policy.annotate(SimpleNamespace(name="demo.add")), {"ignore_result": True}
+        )
+        self.assertEqual(
+            policy.annotate(SimpleNamespace(name="demo.sub")), {"result_ttl": 60}
+        )
+        self.assertIsNone(policy.annotate(SimpleNamespace(name="other.add")))
+
+    def test_app_policy(self):
+        for task in (process_m2m_signal, process_m2m_signal_batch, multiply):
+            self.assertTrue(task.ignore_result, task.name)
+        for task in (slow_add, batch_add, subtract, total):
+            self.assertFalse(task.ignore_result, task.name)
+            self.assertEqual(task.result_ttl, 3600)
+
+
+class TailOnlyTests(SimpleTestCase):
+    """Only the last link of a chain stores its result."""
+
+    def test_chain(self):
+        workflow = results.tail_only(
+            chain(slow_add.s(1, 2), multiply.s(), subtract.s())
+        )
+        self.assertEqual(
+            [link.options.get("ignore_result") for link in workflow.tasks],
+            [True, True, False],
+        )
+
+    def test_multiply_tail_is_stored(self):
+        workflow = results.tail_only(chain(slow_add.s(1, 2), multiply.s()))
+        self.assertFalse(workflow.tasks[-1].options["ignore_result"])
+
+    def test_groups_keep_their_results(self):
+        header = group(slow_add.s(i, i) for i in range(3))
+        workflow = results.tail_only(chain(multiply.s(1), header, total.s()))
+        self.assertNotIn("ignore_result", workflow.tasks[1].options)
+
+    def test_other_signatures_are_untouched(self):
+        signature = multiply.s(1)
+        self.assertIs(results.tail_only(signature), signature)
+        self.assertEqual(signature.options, {})
+
+
+class ExpireResultTests(SimpleTestCase):
+    """Finished results are given their task's ``result_ttl``."""
+
+    def task(self, result_ttl=60, is_eager=False):
+        backend = mock.Mock(get_key_for_task=lambda task_id: f"meta-{task_id}")
+        return SimpleNamespace(
+            result_ttl=result_ttl,
+            backend=backend,
+            request=SimpleNamespace(is_eager=is_eager),
+        )
+
+    def test_expires_finished_results(self):
+        task = self.task()
+        results.expire_result(task_id="t1", task=task, state=states.SUCCESS)
+        task.backend.expire.assert_called_once_with("meta-t1", 60)
+
+    def test_skips_unfinished_eager_and_unset(self):
+        for task, state in (
+            (self.task(), states.RETRY),
+            (self.task(is_eager=True), states.SUCCESS),
+            (self.task(result_ttl=None), states.SUCCESS),
+        ):
+            results.expire_result(task_id="t1", task=task, state=state)
+            task.backend.expire.assert_not_called()
+
+
+class NamedRedisBackendTests(SimpleTestCase):
+    """Stored results carry the extended metadata but not the task's arguments."""
+
+    def test_stores_the_name_only(self):
+        self.assertTrue(app.conf.result_extended)
+        self.assertIsInstance(app.backend, results.NamedRedisBackend)
+        backend = results.NamedRedisBackend(app=app, url="redis://localhost:6379/1")
+        request = SimpleNamespace(
+            task=batch_add.name, args=[[[1, 2]] * 100], kwargs={}, hostname="w1"
+        )
+        with (
+            mock.patch.object(backend, "get", return_value=None),
+            mock.patch.object(backend, "set") as store,
+        ):
+            backend.store_result("t1", [3] * 100, states.SUCCESS, request=request)
+        meta = backend.decode_result(store.call_args.args[1])
+        self.assertEqual(meta["name"], batch_add.name)
+        self.assertEqual(meta["worker"], "w1")
+        self.assertIsNone(meta["args"])
+        self.assertIsNone(meta["kwargs"])
+
+
+class FakeRedis:
+    """Just enough of a redis-py client for ``results.usage``."""
+
+    def __init__(self, data, ttls):
+        self.data, self.ttls = data, ttls
+        self.replies = []
+
+    def scan_iter(self, match, count):  # pylint: disable=unused-argument
+        return (key for key in self.data if key.startswith(match.rstrip(b"*")))
+
+    def pipeline(self, transaction):  # pylint: disable=unused-argument
+        self.replies = []
+        return self
+
+    def get(self, key):
+        self.replies.append(self.data.get(key))
+
+    def memory_usage(self, key):
+        self.replies.append(len(self.data[key]) + 50)
+
+    def ttl(self, key):
+        self.replies.append(self.ttls.get(key, -1))
+
+    def execute(self):
+        return self.replies
+
+
+class UsageTests(SimpleTestCase):
+    """Stored results are counted and sized per task name."""
+
+    def setUp(self):
+        super().setUp()
+        backend = RedisBackend(app=app, url="redis://localhost:6379/1")
+
+        def meta(name, value):
+            return backend.encode({"status": "SUCCESS", "result": value, "name": name})
+
+        data = {
+            b"celery-task-meta-1": meta("celery_demo.tasks.subtract", 1),
+            b"celery-task-meta-2": meta("celery_demo.tasks.subtract", 2),
+            b"celery-task-meta-3": meta("celery_demo.tasks.batch_add", list(range(50))),
+            b"celery-task-meta-4": backend.encode({"status": "SUCCESS", "result": 4}),
+            b"celery-taskset-meta-5": b"ignored",
+        }
+        ttls = {b"celery-task-meta-1": 100, b"celery-task-meta-3": 100}
+        patcher = mock.patch.object(
+            RedisBackend, "client", FakeRedis(data, ttls), create=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend, self.data = backend, data
+
+    def test_usage(self):
+        report = results.usage(self.backend)
+        size = len(self.data[b"celery-task-meta-1"]) + 50
+        self.assertEqual(
+            report["celery_demo.tasks.subtract"],
+            {"keys": 2, "bytes": 2 * size, "no_ttl": 1},
+        )
+        self.assertEqual(report["celery_demo.tasks.batch_add"]["keys"], 1)
+        self.assertEqual(report[results.UNNAMED]["no_ttl"], 1)
+        self.assertEqual(len(report), 3)
+
+    def test_command(self):
+        out = StringIO()
+        with mock.patch(COMMAND, SimpleNamespace(backend=self.backend)):
+            call_command("result_backend_usage", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["total"]["keys"], 4)
+        self.assertEqual(report["total"]["no_ttl"], 2)
+
+    def test_command_needs_redis(self):
+        backend = CacheBackend(app=app, backend="memory")
+        with mock.patch(COMMAND, SimpleNamespace(backend=backend)):
+            with self.assertRaisesMessage(CommandError, "CacheBackend"):
+                call_command("result_backend_usage")